@@ -18,45 +18,129 @@ import cayleygraphs as cy
 def is_prime(n):
     """
     Checks whether the integer n is prime or not.
+    We use the Miller-Rabin test with the first twelve primes as bases, which is deterministic for n < 3.3*10**24. 
+    For larger n it is a probable prime test.
     """
-    if n  == 1: return False
-    if n == 2: return True
-    for k in range(2,int(np.sqrt(n))+1):
-        if n%k == 0: return False
+    if n < 2: return False
+    bases = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+    for a in bases:
+        if n%a == 0: return n == a
+    # We write n - 1 = d*2**s with d odd.
+    d, s = n - 1, 0
+    while d%2 == 0:
+        d //= 2
+        s += 1
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1: continue
+        for _ in range(s - 1):
+            x = x*x%n
+            if x == n - 1: break
+        else: return False
     return True
 
+def legendre_symbol(a,p):
+    """
+    Calculates the Legendre symbol of a modulo an odd prime p by Euler's criterion a**((p-1)/2) = (a/p) mod p.
+    """
+    symbol = pow(a, (p-1)//2, p)
+    return -1 if symbol == p - 1 else symbol
+
 def is_quadratic_residue(p,m):
     """
-    Calculates wheter the integer p is a quadratic residue modulo the integer m.
+    Calculates wheter the integer p is a quadratic residue modulo the integer m, i.e. whether p is the square of a unit modulo m.
     For a definition of being a quadratic residue we refer to: https://en.wikipedia.org/wiki/Quadratic_residue.
+    For an odd prime m we use Euler's criterion, for other m we compare with all squares of units.
     """
+    if m > 2 and is_prime(m): return legendre_symbol(p,m) == 1
     quadratic_residues = {(x**2)%m for x in range(1,m) if math.gcd(x,m) == 1}
     if (p%m) in quadratic_residues: return True
     return False
 
+def square_root_mod(a,p):
+    """
+    Calculates the smallest square root of a modulo an odd prime p with the Tonelli-Shanks algorithm (https://en.wikipedia.org/wiki/Tonelli%E2%80%93Shanks_algorithm).
+    Raises a ValueError if a is not a square modulo p.
+    """
+    a %= p
+    if a == 0: return 0
+    if legendre_symbol(a,p) != 1: raise ValueError(f"{a} is not a square modulo {p}.")
+    # We write p - 1 = Q*2**S with Q odd and find a quadratic non-residue z.
+    Q, S = p - 1, 0
+    while Q%2 == 0:
+        Q //= 2
+        S += 1
+    z = 2
+    while legendre_symbol(z,p) != -1: z += 1
+    M, c, t, R = S, pow(z, Q, p), pow(a, Q, p), pow(a, (Q + 1)//2, p)
+    while t != 1:
+        # Find the least i with t**(2**i) = 1.
+        i, t2 = 0, t
+        while t2 != 1:
+            t2 = t2*t2%p
+            i += 1
+        b = pow(c, 2**(M - i - 1), p)
+        M, c, t, R = i, b*b%p, t*b*b%p, R*b%p
+    return min(R, p - R)
+
 def sum_of_four_squares(p):
     """
-    Given an integer p, we calculate all the ways p can be written as a sum of four squares.
-    If p is prime, there are 8*(p + 1) such solutions by Jacobi's four square theorem (https://en.wikipedia.org/wiki/Jacobi%27s_four-square_theorem).
+    Given an integer p, we calculate all the ways p can be written as a sum of four squares x_0**2 + x_1**2 + x_2**2 + x_3**2 with x_0 > 0 odd and x_1, x_2, x_3 even.
+    If p = 1 mod 4 is prime, there are (p + 1) such solutions by Jacobi's four square theorem (https://en.wikipedia.org/wiki/Jacobi%27s_four-square_theorem).
 
     Input:
     p: Integer.
 
     Output:
-    List of all tuples (x_0, x_1, x_2, x_3) satisfying p == x_0**2 + x_1**2 + x_2**2 + x_3**2 with x_i being integers.
+    List of all such tuples (x_0, x_1, x_2, x_3) with p == x_0**2 + x_1**2 + x_2**2 + x_3**2 in lexicographic order.
     """
-    # We first of all tuples (x_0, x_1, x_2, x_3) with 0 <= x_i**2 =< p for all i. 
-    list_of_four_tuples = itertools.product(range(-int(np.sqrt(p))-1,int(np.sqrt(p))+1),repeat = 4)
+    # We only iterate over x_0. Writing x_i = 2*y_i for i > 0, the remaining equation is y_1**2 + y_2**2 + y_3**2 = (p - x_0**2)/4, 
+    # which we solve on the whole grid of (y_1, y_2) at once by checking whether the rest is a square.
     output = []
-    for tuple in list_of_four_tuples:
-        if tuple[0] > 0 and tuple[0]%2 == 1 and tuple[1]%2 == 0 and tuple[2]%2 == 0 and tuple[3]%2 == 0:
-            if p == (tuple[0]**2 + tuple[1]**2 + tuple[2]**2 + tuple[3]**2):
-                output.append(tuple)
-
+    for x0 in range(1, math.isqrt(max(p,0)) + 1, 2):
+        rest = p - x0**2
+        if rest%4 != 0: continue
+        rest //= 4
+        bound = math.isqrt(rest)
+        y1, y2 = np.meshgrid(np.arange(-bound, bound + 1), np.arange(-bound, bound + 1), indexing = "ij")
+        y3_squared = rest - y1**2 - y2**2
+        y3 = np.round(np.sqrt(np.maximum(y3_squared, 0))).astype(np.int64)
+        solution = (y3_squared >= 0) & (y3**2 == y3_squared)
+        for a, b, c in zip(y1[solution].tolist(), y2[solution].tolist(), y3[solution].tolist()):
+            output.append((x0, 2*a, 2*b, -2*c))
+            if c != 0: output.append((x0, 2*a, 2*b, 2*c))
     return output
 
 
 
+def lps_set(p,q):
+    """
+    Returns the generating set of the (p,q) LPS graph.
+
+    Input:
+    p, q: Distinct primes == 1 mod 4.
+
+    Return:
+    Whether the set lies in PSL(2,q), which is the case if and only if p is a quadratic residue mod q (otherwise it lies in PGL(2,q)), 
+    and the list of the p+1 matrices as tuples (a,b,c,d).
+    """
+    iota = square_root_mod(-1,q)
+    if is_quadratic_residue(p,q):
+        p_inv = pow(p,-1,q)
+        quad_res = square_root_mod(p_inv,q)
+        set = [(quad_res*(tuple[0] + iota*tuple[1])%q, quad_res*(tuple[2] + iota*tuple[3])%q, quad_res*(-tuple[2] + iota*tuple[3])%q, quad_res*(tuple[0] - iota*tuple[1])%q) for tuple in sum_of_four_squares(p)]
+        return True, set
+    set = [((tuple[0] + iota*tuple[1])%q, (tuple[2] + iota*tuple[3])%q, (-tuple[2] + iota*tuple[3])%q, (tuple[0] - iota*tuple[1])%q) for tuple in sum_of_four_squares(p)]
+    return False, set
+
+def lps_schreier_graph(p,q,spectrum = "extremal"):
+    """
+    Returns the Schreier graph of the generating set of the (p,q) LPS graph on the projective line over F_q.
+    It has q+1 vertices instead of about q^3 and its spectrum is a subset of the spectrum of the LPS graph, so it is a cheap proxy for the spectral gap for large q.
+    """
+    return cy.SchreierGraph(cy.ProjectiveLineAction(q), lps_set(p,q)[1], spectrum = spectrum)
+
+
 class LPS(cy.CayleyGraph):
     """
     Given two distict primes p and q both satisfying == 1 mod 4, we constuct the (p,q) LPS graph.  
@@ -70,20 +154,19 @@ class LPS(cy.CayleyGraph):
     Return:
     (p,q) LPS graph as object in cy.CayleyGraphs. The resulting graph has degree (p + 1). 
     """
-    def __init__(self,p,q):
+    def __init__(self,p,q,cache = None,implicit = False):
         """
         Let p and q be distinct primes = 1 mod 4. 
+        With a graphcache.GraphCache, the group and the adjacency matrix are loaded from the cache if they have been stored before.
+        With implicit = True, the group is groups.ImplicitPSL or groups.ImplicitPGL and the adjacency matrix is a cayleygraphs.CayleyOperator, 
+        so neither the elements nor the edges are stored. This allows spectral gaps of LPS graphs with large q.
         """
-        if is_quadratic_residue(p,q):
-            group = gp.PSL(2,q)
-            iota = min([i for i in range(0,q) if i**2%q == q-1])
-            p_inv = min([i for i in range(0,q) if (i*p)%q == 1])
-            quad_res = min([i for i in range(0,q) if (i**2)%q == p_inv])
-            set = [(quad_res*(tuple[0] + iota*tuple[1])%q, quad_res*(tuple[2] + iota*tuple[3])%q, quad_res*(-tuple[2] + iota*tuple[3])%q, quad_res*(tuple[0] - iota*tuple[1])%q) for tuple in sum_of_four_squares(p)]
-
-        if is_quadratic_residue(p,q) == False:
-            group = gp.PGL(2,q)
-            iota = min([i for i in range(0,q) if i**2%q == q-1])
-            set = [((tuple[0] + iota*tuple[1])%q, (tuple[2] + iota*tuple[3])%q, (-tuple[2] + iota*tuple[3])%q, (tuple[0] - iota*tuple[1])%q) for tuple in sum_of_four_squares(p)]
-
-        super().__init__(group,set)
+        special, set = lps_set(p,q)
+        if special:
+            if implicit: group = gp.ImplicitPSL(q)
+            else: group = gp.PSL(2,q) if cache is None else cache.group("PSL",2,q)
+        else:
+            if implicit: group = gp.ImplicitPGL(q)
+            else: group = gp.PGL(2,q) if cache is None else cache.group("PGL",2,q)
+
+        super().__init__(group,set,cache = cache,implicit = implicit)
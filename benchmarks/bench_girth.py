@@ -0,0 +1,53 @@
+"""
+With this script we compare the girth computations of cayleygraphs and randomgraphs with the previous implementation, which took the shortest cycle of nx.cycle_basis.
+The cycle basis is expensive and need not contain a shortest cycle, so we also count how often the two results differ.
+"""
+
+#We first fix the system path such that we import the modules from the parent directory.
+import os,sys,inspect
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import time
+import numpy as np
+import networkx as nx
+import groups as gp
+import cayleygraphs as cg
+import randomgraphs as rg
+
+def cycle_basis_girth(graph):
+    """
+    The previous implementation of girth.
+    """
+    return min(len(cycle) for cycle in nx.cycle_basis(graph))
+
+print("Random graphs: n & degree & samples & cycle basis (ms) & breadth first search (ms) & differences")
+for n, k in [(32,2), (64,2), (128,3), (256,3)]:
+    samples = 200
+    graphs = [rg.random_simple_adjacency_matrix(n,k) for _ in range(samples)]
+
+    start = time.perf_counter()
+    old = [cycle_basis_girth(nx.from_numpy_array(A)) for A in graphs]
+    old_time = (time.perf_counter() - start)/samples
+
+    start = time.perf_counter()
+    new = [rg.girth(A) for A in graphs]
+    new_time = (time.perf_counter() - start)/samples
+
+    print(f"{n} & {2*k} & {samples} & {round(1000*old_time,3)} & {round(1000*new_time,3)} & {sum(a != b for a, b in zip(old, new))} \\\\")
+
+print("Cayley graphs on SL(2,k) with the set [(1,1,0,1), (1,0,1,1)]: k & Number of elements & cycle basis (ms) & breadth first search (ms) & girth")
+for k in [7, 11, 13, 17, 19]:
+    Cay = cg.CayleyGraph(gp.SL(2,k), [(1,1,0,1), (1,0,1,1)])
+    graph = Cay.graph
+
+    start = time.perf_counter()
+    old = cycle_basis_girth(graph)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = cg.shortest_cycle_through(Cay.adjacency, Cay.group.identity_id)
+    new_time = time.perf_counter() - start
+
+    print(f"{k} & {Cay.group.order} & {round(1000*old_time,3)} & {round(1000*new_time,3)} & {new} {'' if old == new else f'(cycle basis: {old})'} \\\\")
@@ -4,75 +4,691 @@ We are using Python 3.10.
 
 It contains the following classes:
 CayleyGraph: An implementation of Cayley graphs, building on the groups package.
+SchreierGraph: The graph of the action of a set of group elements on a set of points, e.g. on the cosets of a subgroup or on the projective line.
+ProjectiveLineAction, CosetAction: Actions for SchreierGraph.
+The function generated_subgroup finds the subgroup generated by a set together with the adjacency matrix of its Cayley graph, without enumerating the whole group.
 
 Taking a Cayley graph as input we define the following functions:
 is_connected: Returns whether or not the input Cayley graph is connected.
 is_bipartite: Returns whether or not the input Cayley graph is bipartite.
 diameter: Calculates the diameter of the Cayley graph.
+distance_profile: Calculates the diameter, the sizes of the spheres around the identity and the mean distance by a single breadth first search.
 adjacency_spectral_gap: Calculates the strong spectral gap of the normalized adjacency matrix.
 adjacency_star: Calculates the spectral gap of the adjacency matrix. 
 laplacian_spectral_gap: Calculates the spectral gap of the normalized Laplacian.
-girth: Calculates the girth of the Cayley graph (i.e. the length of the shortest cycle).
+girth: Calculates the girth of the Cayley graph (i.e. the length of the shortest cycle) by a breadth first search from the identity.
+injectivity_radius: Calculates the injectivity radius of the Cayley graph.
+These functions read invariants that CayleyGraph calculates lazily and caches, so each of them is calculated at most once per graph.
+
+The spectral functions only need the two largest and the two smallest eigenvalues, which extremal_eigenvalues calculates with a sparse Lanczos solver.
+The full spectrum of Cayley graphs of cyclic groups, SL(2,q) and PSL(2,q) is calculated from small blocks given by the irreducible representations, see the representations module.
 """
 
 import numpy as np
 import networkx as nx 
+import groups as gp
+import representations
 import math
 import itertools
+import functools
+import collections
 import time
 from numpy import matrix
 from numpy import linalg
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import eigsh, LinearOperator
+
+# Lanczos is only worthwhile for large graphs, below this number of vertices we diagonalize the dense matrix.
+DENSE_LIMIT = 512
+
+# Default relative accuracy of the extremal eigenvalues of implicit Cayley graphs. Machine precision needs more Lanczos iterations, which are expensive for the large groups of implicit graphs.
+# With 1e-8 Lanczos can stop before it finds a second copy of a multiple eigenvalue, e.g. for LPS(13,17), while 1e-10 costs about as much for LPS(5,101).
+IMPLICIT_TOL = 1e-10
+
+def extremal_eigenvalues(adjacency, tol = None, v0 = None):
+    """
+    Calculates the two largest and the two smallest eigenvalues of the adjacency matrix of a Cayley graph.
+    We use the Lanczos method (scipy.sparse.linalg.eigsh), which only needs sparse matrix-vector products. 
+    
+    A Krylov method finds each eigenvalue only once, so we determine multiplicities that matter for the spectral functions combinatorially:
+    The connected components of a Cayley graph are the cosets of the subgroup generated by the set, so they are all isomorphic.
+    If there are several components, the degree is therefore a multiple eigenvalue, and so is minus the degree if the graph is bipartite.
+
+    Arguments:
+    adjacency: Symmetric scipy.sparse matrix or CayleyOperator.
+    tol: Relative accuracy of the eigenvalues, where 0 means machine precision. By default machine precision for sparse matrices and IMPLICIT_TOL for a CayleyOperator.
+    v0: Optional starting vector of the Lanczos method. By default it is random, so with tol > 0 the result can differ in the last digits between calls.
+
+    Return:
+    Array with the two largest and the two smallest eigenvalues in descending order (all eigenvalues for graphs with at most four vertices).
+    """
+
+    n = adjacency.shape[0]
+    if n <= DENSE_LIMIT:
+        eigenvalues = linalg.eigvalsh(adjacency.toarray())[::-1]
+        return eigenvalues if n <= 4 else eigenvalues[[0,1,-2,-1]]
+
+    implicit = isinstance(adjacency, CayleyOperator)
+    if tol is None: tol = IMPLICIT_TOL if implicit else 0
+    eigenvalues = np.sort(eigsh(adjacency if implicit else adjacency.astype(float), k = 4, which = "BE", tol = tol, v0 = v0, return_eigenvectors = False))[::-1]
+    degree = eigenvalues[0]
+    components = adjacency.components() if implicit else connected_components(adjacency, directed = False, return_labels = False)
+    if components > 1:
+        eigenvalues[1] = degree
+        if np.isclose(eigenvalues[-1], -degree): eigenvalues[-2] = -degree
+    return eigenvalues
+
+class CayleyOperator(LinearOperator):
+    """
+    Adjacency matrix of a Cayley graph as a scipy.sparse.linalg.LinearOperator, which is never stored as a sparse matrix.
+    A product with a vector x is (Ax)_g = sum of x_{s*g} over the distinct elements s of the set and their inverses, 
+    where the neighbours s*g of a block of vertices g are calculated by the vectorized multiplication of the group.
+    This gives the same operator as the CSR matrix of cayley_adjacency.
+    The neighbours are calculated once in the first product and kept as an int32 table of shape (degree,|G|) if it has at most max_entries entries, which is about 12 MB for LPS(5,101).
+    Otherwise they are calculated again for every product, which needs memory proportional to block_size only.
+
+    Initialization:
+    group: Group with vectorized mul and invert, e.g. groups.ImplicitPSL.
+    generators: Ids of the elements of the set.
+    block_size: Number of vertices whose neighbours are calculated at once.
+    max_entries: Largest table of neighbours that is kept.
+    """
+
+    def __init__(self, group, generators, block_size = 2**16, max_entries = 2**26):
+        generators = np.asarray(generators, dtype=np.int64)
+        self.group = group
+        self.generators = np.unique(np.concatenate([generators, group.invert(generators)]))
+        self.degree = len(self.generators)
+        self.block_size = block_size
+        self.max_entries = max_entries
+        self.table = None
+        super().__init__(dtype = np.float64, shape = (group.order, group.order))
+
+    def neighbours(self, start, stop):
+        """
+        Returns the (degree, stop - start) array of the ids of the neighbours s*g of the vertices g = start,...,stop-1.
+        """
+
+        if self.table is not None: return self.table[:,start:stop]
+        return self.group.mul(self.generators[:,None], np.arange(start, stop)[None,:])
+
+    def _matmat(self, X):
+        X = np.asarray(X)
+        n = self.shape[0]
+        if self.table is None and self.degree*n <= self.max_entries and n < 2**31:
+            table = np.empty((self.degree, n), dtype = np.int32)
+            for start in range(0, n, self.block_size):
+                table[:,start:start + self.block_size] = self.neighbours(start, min(start + self.block_size, n))
+            self.table = table
+        Y = np.zeros((n, X.shape[1]), dtype = np.result_type(X, np.float64))
+        for start in range(0, n, self.block_size):
+            stop = min(start + self.block_size, n)
+            Y[start:stop] = X[self.neighbours(start, stop)].sum(axis = 0)
+        return Y
+
+    def _matvec(self, x):
+        return self._matmat(np.reshape(x, (-1,1))).ravel()
+
+    def _adjoint(self):
+        return self
+
+    def components(self):
+        """
+        Returns the number of connected components. They are the cosets of the subgroup generated by the set, whose elements we find by a breadth first search from the identity.
+        """
+
+        reached = np.zeros(self.shape[0], dtype = bool)
+        frontier = np.array([self.group.identity_id])
+        reached[frontier] = True
+        while len(frontier) > 0:
+            new = []
+            for start in range(0, len(frontier), self.block_size):
+                block = frontier[start:start+self.block_size]
+                neighbours = (self.group.mul(self.generators[:,None], block[None,:]) if self.table is None else self.table[:,block]).ravel()
+                neighbours = np.unique(neighbours[~reached[neighbours]])
+                reached[neighbours] = True
+                new.append(neighbours)
+            frontier = np.concatenate(new)
+        return self.shape[0]//int(reached.sum())
+
+    def toarray(self):
+        return self.matmat(np.identity(self.shape[0]))
+
+def cayley_adjacency(group, generators):
+    """
+    Returns the adjacency matrix of the Cayley graph of group with respect to the elements with the ids generators, as a scipy.sparse CSR matrix.
+    """
+
+    # We multiply all elements with the generators at once in the indexed mode of the group.
+    # The entry (i,g) of the table is the id of s_i*g, and the edges (g, s_i*g) give the adjacency matrix directly.
+    table = group.multiplication_table(generators)
+    n = group.order
+    rows = np.tile(np.arange(n), len(generators))
+    directed = sparse.csr_matrix((np.ones(len(rows)), (rows, table.ravel())), shape=(n,n))
+    adjacency = (directed + directed.T).tocsr()
+    adjacency.data[:] = 1
+    return adjacency
+
+def generated_subgroup(group, set, order = None, adjacency = True, block_size = 2**16):
+    """
+    Finds the subgroup generated by a set with a breadth first search from the identity, and builds the adjacency matrix of its Cayley graph along the way.
+    Each step multiplies a block of found elements with the set at once and looks the products up among the elements found so far, which are kept as sorted keys.
+    The work is proportional to the order of the subgroup, so a set that does not generate is recognized without building the whole group.
+    In a finite group the words in the set already form a group, so we do not need the inverses of the set.
+
+    Arguments:
+    group: Indexed group, e.g. groups.ImplicitPSL(q), or a tuple (n,q) or (n,q,scalars) for the invertible (n,n)-matrices over Z/qZ modulo the scalars, which are never enumerated.
+    set: Elements of the group, tuples of length n**2 for a tuple (n,q).
+    order: Optional order of the group, e.g. the order of SL(2,q). If the set generates more than order elements we raise a ValueError. 
+           Once the subgroup has exactly order elements it is the whole group, so the products of the remaining elements are only looked up.
+    adjacency: Whether to build the adjacency matrix. Without it the search stops as soon as exactly order elements have been found.
+    block_size: Number of products calculated at once.
+
+    Return:
+    The subgroup as an indexed group, a groups.Subgroup or for a tuple (n,q) a groups.MatrixGroup, and the adjacency matrix of its Cayley graph with respect to set as a CSR matrix indexed by its ids (None without adjacency).
+    The Cayley graph of a group is connected if and only if generated_subgroup(group, set, group.order)[0].order == group.order.
+    """
+
+    if isinstance(group, tuple):
+        n, q = group[:2]
+        scalars = sorted({int(l)%q for l in group[2]}) if len(group) > 2 else [1]
+        def normal_form(matrices):
+            matrices = gp.residues(matrices, q).reshape(-1,n,n)
+            return matrices if scalars == [1] else gp.projective_normal_form(matrices, q, scalars)
+        # The keys read a matrix as a number in base q, as in groups.MatrixGroup, so their order is the order of the ids of the subgroup.
+        powers = q**np.arange(n*n-1,-1,-1, dtype=np.int64) if q**(n*n) < 2**63 else np.array([q**k for k in range(n*n-1,-1,-1)], dtype=object)
+        keys_of = lambda matrices: np.reshape(matrices, (len(matrices),-1)) @ powers
+        generators = normal_form(np.array(list(set), dtype=object))
+        multiply = lambda frontier: normal_form(gp.matmul_mod(generators[:,None], frontier[None,:], q))
+        identity = normal_form(np.identity(n, dtype=np.int64)[None])
+    else:
+        generators = group.encode(set)
+        if (generators < 0).any(): raise ValueError("The set contains elements that are not in the group.")
+        keys_of = lambda ids: ids
+        multiply = lambda frontier: group.mul(generators[:,None], frontier[None,:]).ravel()
+        identity = np.array([group.identity_id])
+
+    # The elements in the order in which they are found, level by level, and all keys found so far in increasing order together with the positions of their elements in this order.
+    found = [identity]
+    sorted_keys, positions = keys_of(identity), np.zeros(1, dtype=np.int64)
+    count, expanded = 1, 0
+    sources, targets = [], []
+    chunk = max(1, block_size//max(len(generators),1))
+    # A level is only added if the bound still holds, so count never exceeds order and we stop early only with the whole group.
+    while expanded < count and (adjacency or order is None or count != order):
+        frontier = found[-1]
+        products = np.concatenate([multiply(frontier[start:start + chunk]) for start in range(0, len(frontier), chunk)])
+        sources.append(np.concatenate([np.tile(np.arange(expanded + start, expanded + min(start + chunk, len(frontier))), len(generators)) for start in range(0, len(frontier), chunk)]))
+        expanded += len(frontier)
+        # Looking up the distinct keys in increasing order is much faster than looking up all keys in the order of the products.
+        keys, first, inverse = np.unique(keys_of(products), return_index = True, return_inverse = True)
+        index = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys)-1)
+        known = sorted_keys[index] == keys
+        product_positions = np.where(known, positions[index], -1)
+        new_keys = keys[~known]
+        product_positions[~known] = np.arange(count, count + len(new_keys))
+        targets.append(product_positions[inverse.reshape(-1)])
+        if len(new_keys) == 0: continue
+        if order is not None and count + len(new_keys) > order: raise ValueError(f"The set generates more than order = {order} elements.")
+        found.append(products[first[~known]])
+        merged = np.argsort(np.concatenate([sorted_keys, new_keys]), kind = "stable")
+        sorted_keys = np.concatenate([sorted_keys, new_keys])[merged]
+        positions = np.concatenate([positions, np.arange(count, count + len(new_keys))])[merged]
+        count += len(new_keys)
+
+    # The ids of the subgroup are the ranks of the keys.
+    ids = np.empty(count, dtype=np.int64)
+    ids[positions] = np.arange(count)
+    if isinstance(group, tuple):
+        subgroup = gp.MatrixGroup(n, q, np.concatenate(found)[positions], scalars, canonical = True)
+    else:
+        subgroup = gp.Subgroup(group, sorted_keys)
+    if not adjacency: return subgroup, None
+    directed = sparse.csr_matrix((np.ones(count*len(generators)), (ids[np.concatenate(sources)], ids[np.concatenate(targets)])), shape = (count,count))
+    matrix = (directed + directed.T).tocsr()
+    matrix.data[:] = 1
+    return subgroup, matrix
 
 class CayleyGraph:
+    """
+    Cayley graph of a finite group with respect to a set of elements.
+    The vertices are the ids of the group elements, and g is connected to s*g for all s in set.
+    As in a networkx graph, edges are undirected, multiple edges are identified and s = identity gives a self-loop.
+
+    Attributes:
+    group:      Underlying group.
+    set:        Subset of the group that determines the Cayley graph.
+    adjacency:  Adjacency matrix as a scipy.sparse CSR matrix, indexed by the ids of the group elements. 
+                For implicit graphs a CayleyOperator, which calculates products with the adjacency matrix without storing it.
+    graph:      The Cayley graph as a networkx graph whose nodes are the group elements. It is only built when it is first used.
+    spectrum:   "extremal" or "full", see below.
+
+    Invariants:
+    The following graph invariants are calculated when they are first used and then cached, see cached_invariants.
+    eigenvalues: Eigenvalues of the normalized adjacency matrix in descending order. 
+                With spectrum = "extremal" only the two largest followed by the two smallest eigenvalues, which is all the spectral functions below use.
+                With spectrum = "full" all eigenvalues, which for the groups in representations.supports come from the irreducible representations instead of the dense adjacency matrix.
+    degree:     Degree of the graph.
+    connected:  Whether the graph is connected.
+    bipartite:  Whether a connected graph is bipartite.
+    diameter:   Diameter of the graph.
+    girth:      Length of the shortest cycle.
+    injectivity_radius: Largest radius for which the ball around a vertex looks like a ball in a tree.
+    For implicit graphs only the spectral invariants and the degree are available, the others need the stored adjacency matrix.
+    """
+
+    INVARIANTS = ("eigenvalues", "degree", "connected", "bipartite", "diameter", "girth", "injectivity_radius")
     
-    def __init__(self,group,set):
+    def __init__(self,group,set,spectrum = "extremal",tol = None,cache = None,implicit = False,adjacency = None):
         """
         Given an object in the class of finite_groups and a set of elements in finite_group, we initalize the associated Cayley graph.
         finite_group:   Underlying group.       
         set:            Subset of finite_group that determines the Cayley graph. 
+        spectrum:       "extremal" to only calculate the two largest and two smallest eigenvalues with a sparse Lanczos solver, or "full" for the whole spectrum.
+        tol:            Relative accuracy of the extremal eigenvalues, where 0 means machine precision. 
+                        By default machine precision, and IMPLICIT_TOL for implicit graphs, whose Lanczos iterations are expensive.
+        cache:          Optional graphcache.GraphCache, from which the adjacency matrix is loaded if it has been stored before.
+        implicit:       If True, the adjacency matrix is a CayleyOperator and is never stored. This is meant for large groups such as groups.ImplicitPSL.
+        adjacency:      Optional adjacency matrix that has already been calculated, e.g. by generated_subgroup.
         """
 
-        graph = nx.Graph()
-        graph.add_nodes_from(group.elements)
-        
-        for g in group.elements:
-            for s in set:
-                graph.add_edge(g,group.operation(s,g))
-
-        self.graph = graph
+        if spectrum not in ("extremal", "full"): raise ValueError(f"Unknown spectrum {spectrum}, use 'extremal' or 'full'.")
         self.group = group
         self.set = set
+        self.spectrum = spectrum
+        self.tol = tol
+
+        generators = group.encode(set)
+        if (generators < 0).any(): raise ValueError("The set contains elements that are not in the group.")
+        if adjacency is not None: self.adjacency = adjacency
+        elif implicit: self.adjacency = CayleyOperator(group, generators)
+        elif cache is None: self.adjacency = cayley_adjacency(group, generators)
+        else: self.adjacency = cache.adjacency(group, generators)
+
+    @property
+    def implicit(self):
+        return isinstance(self.adjacency, CayleyOperator)
+
+    def sparse_adjacency(self, purpose):
+        """
+        Returns the stored adjacency matrix, or raises a ValueError for implicit graphs.
+        """
+
+        if self.implicit: raise ValueError(f"The {purpose} needs the stored adjacency matrix, which implicit Cayley graphs do not have.")
+        return self.adjacency
+
+    def cached_invariants(self):
+        """
+        Returns the names of the invariants that have already been calculated.
+        """
+
+        return [name for name in self.INVARIANTS if name in self.__dict__]
+
+    @functools.cached_property
+    def graph(self):
+        """
+        The Cayley graph as a networkx graph whose nodes are the elements of the group.
+        """
+
+        adjacency = self.sparse_adjacency("networkx graph")
+        graph = nx.Graph()
+        graph.add_nodes_from(self.group.element_list)
+        rows, cols = sparse.triu(adjacency).nonzero()
+        graph.add_edges_from(zip(self.group.decode(rows), self.group.decode(cols)))
+        return graph
 
-        #We furthermore calculate the eigenvalues of our graph. 
+    @functools.cached_property
+    def eigenvalues(self):
         #For convenience we sort the eigenvalues in descending order, normalize them and round the values to 8 digits.
-        eigenvalues = list(nx.adjacency_spectrum(self.graph))
+        if self.spectrum == "full":
+            eigenvalues = list(self.full_spectrum())
+        else:
+            eigenvalues = list(extremal_eigenvalues(self.adjacency, self.tol))
         eigenvalues.sort(reverse = True)
-        self.degree = round(eigenvalues[0].real)
-        self.eigenvalues = [round(eig.real/self.degree,8) for eig in eigenvalues]
+        return [round(eig.real/self.degree,8) for eig in eigenvalues]
+
+    def full_spectrum(self):
+        """
+        Returns all eigenvalues of the adjacency matrix, from the irreducible representations for the groups in representations.supports.
+        """
+
+        if representations.supports(self.group): return representations.eigenvalues(self.group, self.group.encode(self.set))
+        return linalg.eigvalsh(self.adjacency.toarray())
+
+    @functools.cached_property
+    def degree(self):
+        # A Cayley graph is regular, so the degree is the number of entries in any row of the adjacency matrix.
+        if self.implicit: return self.adjacency.degree
+        return int(self.adjacency.indptr[1] - self.adjacency.indptr[0])
+
+    @property
+    def order(self):
+        # Number of vertices.
+        return self.group.order
+
+    @property
+    def base_vertex(self):
+        # Vertex from which distance_profile searches, the identity.
+        return self.group.identity_id
+
+    @functools.cached_property
+    def connected(self):
+        # A graph is connected if and only if the second largest eigenvalue of the adjacency matrix is strictly less than 1.
+        return bool(self.eigenvalues[1] < 1)
+
+    @functools.cached_property
+    def bipartite(self):
+        # A connected graph is bipatite if and only if -1 is an eigenvalue of the graph.
+        if self.connected == False: return "Graph not connected."
+        return bool(self.eigenvalues[-1] == -1)
+
+    @functools.cached_property
+    def diameter(self):
+        # A Cayley graph is vertex-transitive, so a single breadth first search from the identity suffices.
+        self.sparse_adjacency("diameter")
+        profile = distance_profile(self)
+        if sum(profile.sphere_sizes) < self.order: return "Not connected."
+        return profile.diameter
+
+    @functools.cached_property
+    def girth(self):
+        # A Cayley graph is vertex-transitive, so some shortest cycle passes through the identity.
+        return shortest_cycle_through(self.sparse_adjacency("girth"), self.base_vertex)
+
+    @functools.cached_property
+    def injectivity_radius(self):
+        # The first collision of non-backtracking walks from the identity is the first cycle found by a breadth first search, see injectivity_radius below.
+        if self.girth == math.inf: return math.inf
+        return (self.girth - 1)//2
     
+class ProjectiveLineAction:
+    """
+    Action of 2x2 matrices over Z/qZ on the projective line P^1(F_q) by Moebius transformations [x:y] -> [ax+by:cx+dy], for a prime q.
+    Scalar matrices act trivially, so the elements of GL, SL, PGL and PSL can be used. The stabilizer of [1:0] in SL(2,q) is the subgroup of upper triangular matrices.
+
+    Initialization:
+    q: Prime.
+
+    Attributes:
+    size: Number of points q+1.
+    points: The points (x,1) for x = 0,...,q-1, followed by (1,0). The id of a point is its position in this list.
+    """
+
+    def __init__(self, q):
+        if q != 2 and not gp.is_odd_prime(q): raise ValueError(f"q = {q} is not a prime.")
+        self.q = q
+        self.size = q + 1
+        self.points = [(x,1) for x in range(q)] + [(1,0)]
+        self.inverses = gp.units_inverses(q)
+
+    def act(self, set):
+        """
+        Returns the integer array of shape (len(set),size) whose entry (i,x) is the id of the image of the point x under the ith element of set.
+        """
+
+        q = self.q
+        a, b, c, d = (np.reshape(np.asarray(set, dtype=np.int64), (-1,4))%q).T[:,:,None]
+        x = np.arange(q + 1)
+        u, v = np.where(x < q, x, 1), np.where(x < q, 1, 0)
+        numerators, denominators = (a*u + b*v)%q, (c*u + d*v)%q
+        if ((numerators == 0) & (denominators == 0)).any(): raise ValueError("The set contains matrices that are not invertible mod q.")
+        return np.where(denominators != 0, numerators*self.inverses[denominators]%q, q)
+
+class CosetAction:
+    """
+    Action of a group on the left cosets gH of a subgroup H by multiplication from the left, s*(gH) = (s*g)H.
+    The Schreier graph of this action is the quotient of the Cayley graph of the group by the right action of H.
+
+    Initialization:
+    group: Indexed group, see groups.FiniteGroup.
+    subgroup: List of the elements of the subgroup H.
+    block_size: Number of products that are calculated at once.
+
+    Attributes:
+    size: Number of cosets.
+    representatives: Id of the smallest element of each coset. The id of a coset is its position in this array.
+    points: The representatives as elements of the group.
+    """
+
+    def __init__(self, group, subgroup, block_size = 2**20):
+        subgroup = np.unique(group.encode(subgroup))
+        if (subgroup < 0).any(): raise ValueError("The subgroup contains elements that are not in the group.")
+        self.group = group
+
+        # The smallest id of g*H identifies the coset of g.
+        smallest = np.empty(group.order, dtype=np.int64)
+        chunk = max(1, block_size//len(subgroup))
+        for start in range(0, group.order, chunk):
+            elements = np.arange(start, min(start + chunk, group.order))
+            smallest[start:start+chunk] = group.mul(elements[:,None], subgroup[None,:]).min(axis = 1)
+        self.representatives, self.cosets, counts = np.unique(smallest, return_inverse = True, return_counts = True)
+        if (counts != len(subgroup)).any(): raise ValueError("The elements do not form a subgroup.")
+        self.size = len(self.representatives)
+
+    @property
+    def points(self):
+        return self.group.decode(self.representatives)
+
+    def act(self, set):
+        """
+        Returns the integer array of shape (len(set),size) whose entry (i,x) is the id of the image of the coset x under the ith element of set.
+        """
+
+        generators = self.group.encode(set)
+        if (generators < 0).any(): raise ValueError("The set contains elements that are not in the group.")
+        return self.cosets[self.group.mul(generators[:,None], self.representatives[None,:])]
+
+class SchreierGraph(CayleyGraph):
+    """
+    Schreier graph of a set of elements of a group acting on a set of points.
+    The vertices are the ids of the points, and x is connected to s*x for all s in set and their inverses.
+    Unlike for Cayley graphs, different elements can move a point to the same point and elements can fix points, so the adjacency matrix counts multiple edges and self-loops.
+    It is the sum of the permutation matrices of the distinct permutations of the points given by the set and the inverses, so the graph is regular.
+    If the group acts faithfully, e.g. PSL(2,q) on the projective line, the spectrum is a subset of the spectrum of the Cayley graph.
+    Only the action of the elements is used, so for example the Schreier graph of PSL(2,q) on the projective line only has q+1 vertices and never enumerates the group.
+
+    The invariants and functions of CayleyGraph apply to Schreier graphs, with the number of points as order and the point with id 0 as base vertex. 
+    Since a Schreier graph is in general not vertex-transitive, the diameter and the girth are calculated by a breadth first search from every vertex, while distance_profile only describes the distances from the base vertex.
+    The girth refers to the graph in which multiple edges are identified, as for Cayley graphs, and the injectivity radius (girth-1)//2 is the smallest injectivity radius of a vertex.
+
+    Attributes:
+    action:     Action of the group, e.g. ProjectiveLineAction or CosetAction, with the number of points size, a list of points and a vectorized function act.
+    set:        Elements of the group that determine the Schreier graph.
+    permutations: The distinct permutations of the points given by the set and the inverses.
+    adjacency:  Adjacency matrix as a scipy.sparse CSR matrix, indexed by the ids of the points.
+    spectrum:   "extremal" or "full", as for CayleyGraph.
+    """
+
+    def __init__(self, action, set, spectrum = "extremal", tol = 0):
+        """
+        action:     Action of the group on the points.
+        set:        Elements of the group.
+        spectrum:   "extremal" or "full", see CayleyGraph.
+        tol:        Relative accuracy of the extremal eigenvalues, where 0 means machine precision.
+        """
+
+        if spectrum not in ("extremal", "full"): raise ValueError(f"Unknown spectrum {spectrum}, use 'extremal' or 'full'.")
+        self.action = action
+        self.set = set
+        self.spectrum = spectrum
+        self.tol = tol
+
+        images = action.act(set)
+        n = action.size
+        if (np.sort(images, axis = 1) != np.arange(n)).any(): raise ValueError("The set does not act by permutations of the points.")
+        inverses = np.empty_like(images)
+        np.put_along_axis(inverses, images, np.arange(n)[None,:], axis = 1)
+        # Elements that act in the same way, such as s and -s on the projective line, give the same permutation and are counted once.
+        distinct = {permutation.tobytes(): permutation for permutation in np.concatenate([images, inverses])}
+        self.permutations = np.array(list(distinct.values()))
+        rows = np.tile(np.arange(n), len(self.permutations))
+        self.adjacency = sparse.csr_matrix((np.ones(len(rows)), (rows, self.permutations.ravel())), shape = (n,n))
+
+    def full_spectrum(self):
+        return linalg.eigvalsh(self.adjacency.toarray())
+
+    @functools.cached_property
+    def simple_adjacency(self):
+        # The adjacency matrix with multiple edges identified.
+        adjacency = self.adjacency.copy()
+        adjacency.data[:] = 1
+        return adjacency
+
+    @functools.cached_property
+    def graph(self):
+        """
+        The Schreier graph as a networkx graph whose nodes are the points, with multiple edges identified.
+        """
+
+        graph = nx.Graph()
+        graph.add_nodes_from(self.action.points)
+        rows, cols = sparse.triu(self.adjacency).nonzero()
+        points = self.action.points
+        graph.add_edges_from((points[i], points[j]) for i, j in zip(rows.tolist(), cols.tolist()))
+        return graph
+
+    @functools.cached_property
+    def degree(self):
+        return len(self.permutations)
+
+    @property
+    def order(self):
+        return self.action.size
+
+    @property
+    def base_vertex(self):
+        return 0
+
+    @functools.cached_property
+    def diameter(self):
+        eccentricity = 0
+        for source in range(self.action.size):
+            distances = breadth_first_search(self.adjacency, source)
+            if (distances < 0).any(): return "Not connected."
+            eccentricity = max(eccentricity, int(distances.max()))
+        return eccentricity
+
+    @functools.cached_property
+    def girth(self):
+        best = math.inf
+        for source in range(self.action.size):
+            best = min(best, shortest_cycle_through(self.simple_adjacency, source))
+            if best == 1: break
+        return best
+
 def is_connected(Cay):
         """
         Returns whether or not the Cayley graph is connected.
         We use the condition that a graph is connected if and only if the second largest eigenvalue of the adjacency matrix is strictly less than 1.
         """
-        if Cay.eigenvalues[1] < 1: return True
-        return False
+        return Cay.connected
 
 def is_bipartite(Cay):
         """
         Returns whether or not a connected Cayley graph is bipartite.
         We use the spectral condition that a connected graph is bipatite if and only if -1 is an eigenvalue of the graph.
         """
-        if is_connected(Cay) == False: return "Graph not connected."
-        if Cay.eigenvalues[-1] == -1: return True
-        return False
+        return Cay.bipartite
 
 def diameter(Cay):
         """
         Returns the diameter of the Cayley graph.
         """
-        if is_connected(Cay)==False: return "Not connected."
-        return nx.diameter(Cay.graph)
+        return Cay.diameter
+
+# The result of distance_profile.
+DistanceProfile = collections.namedtuple("DistanceProfile", ["diameter", "sphere_sizes", "mean_distance"])
+
+def edges_from(adjacency, vertices):
+        """
+        Returns all edges starting in the given vertices, read off from the arrays of a CSR matrix without a Python loop.
+
+        Return:
+        Two integer arrays with the start and the end of each edge.
+        """
+        starts, ends = adjacency.indptr[vertices], adjacency.indptr[np.asarray(vertices)+1]
+        lengths = ends - starts
+        positions = np.arange(lengths.sum()) + np.repeat(starts - (lengths.cumsum() - lengths), lengths)
+        return np.repeat(vertices, lengths), adjacency.indices[positions]
+
+def breadth_first_search(adjacency, source):
+        """
+        Calculates the distances from the vertex source by a breadth first search that handles a whole sphere at once.
+
+        Arguments:
+        adjacency: scipy.sparse CSR matrix.
+        source: Integer, a vertex.
+
+        Return:
+        Integer array of the distances from source, with -1 for vertices in other components.
+        """
+        distances = np.full(adjacency.shape[0], -1, dtype=np.int64)
+        distances[source] = 0
+        sphere = np.array([source])
+        r = 0
+        while len(sphere) > 0:
+                neighbours = np.unique(edges_from(adjacency, sphere)[1])
+                sphere = neighbours[distances[neighbours] == -1]
+                r += 1
+                distances[sphere] = r
+        return distances
+
+def shortest_cycle_through(adjacency, source):
+        """
+        Calculates the length of the first cycle found by a breadth first search from the vertex source.
+        This is at most the length of a shortest cycle through source and at least the girth.
+        When we handle the sphere of radius r, an edge inside the sphere closes a cycle of length 2r+1 and a vertex of the next sphere with two neighbours in the sphere closes a cycle of length 2r+2.
+        Hence we can stop as soon as a cycle of length at most 2r+1 has been found. 
+        The value does not depend on source for a vertex-transitive graph, so it is the girth of a Cayley graph.
+        A self-loop counts as a cycle of length 1.
+
+        Arguments:
+        adjacency: Symmetric scipy.sparse CSR matrix of a graph without multiple edges.
+        source: Integer, a vertex.
+
+        Return:
+        Length of the cycle, or math.inf if the component of source is a tree.
+        """
+        n = adjacency.shape[0]
+        distances = np.full(n, -1, dtype=np.int64)
+        parents = np.full(n, -1, dtype=np.int64)
+        distances[source] = 0
+        sphere = np.array([source])
+        best = math.inf
+        r = 0
+        while len(sphere) > 0 and best > 2*r + 1:
+                starts, ends = edges_from(adjacency, sphere)
+                # The edge back to the parent is part of the breadth first search tree and closes no cycle.
+                keep = ends != parents[starts]
+                starts, ends = starts[keep], ends[keep]
+                if (distances[ends] == r).any(): best = min(best, 2*r + 1)
+                new = distances[ends] == -1
+                reached, first, multiplicity = np.unique(ends[new], return_index = True, return_counts = True)
+                if (multiplicity > 1).any(): best = min(best, 2*r + 2)
+                parents[reached] = starts[new][first]
+                distances[reached] = r + 1
+                sphere = reached
+                r += 1
+        return best
+
+def distance_profile(Cay):
+        """
+        Returns the distances in the Cayley graph from a single breadth first search from the base vertex, which is the identity.
+        Since a Cayley graph is vertex-transitive, the distances from the identity determine the diameter and the mean distance.
+        For a disconnected graph these refer to the component of the identity. For a Schreier graph they are the distances from its base vertex only.
+
+        Return:
+        DistanceProfile with the fields
+        diameter:       Largest distance from the base vertex.
+        sphere_sizes:   List whose rth entry is the number of vertices at distance r from the base vertex.
+        mean_distance:  Mean distance between two distinct vertices of a Cayley graph, or the mean distance from the base vertex.
+        """
+        distances = breadth_first_search(Cay.adjacency, Cay.base_vertex)
+        sphere_sizes = np.bincount(distances[distances >= 0])
+        reached = sphere_sizes.sum()
+        mean_distance = float((np.arange(len(sphere_sizes))*sphere_sizes).sum()/(reached - 1)) if reached > 1 else 0.0
+        return DistanceProfile(len(sphere_sizes) - 1, sphere_sizes.tolist(), mean_distance)
 
 def adjacency_spectral_gap(Cay):
         """
@@ -100,10 +716,10 @@ def girth(Cay):
         """
         Returns girth (length of shortest cycle) of the Cayley graph.
         """
-        return min(len(cycle) for cycle in nx.cycle_basis(Cay.graph))
+        return Cay.girth
 
-#We next aim to calculate the injectivity radius, as defined 
-#To do so, we first calculate the size of the d-sphere in the free group.
+#We next aim to calculate the injectivity radius. 
+#For comparison with the free group, we also calculate the size of the d-sphere in the free group.
 
 def size_of_sphere(d,r):
         """
@@ -113,12 +729,10 @@ def size_of_sphere(d,r):
         else: return d*((d-1)**(r-1))
 
 def injectivity_radius(Cay):
-        A = nx.to_numpy_array(Cay.graph)  
-        n = len(Cay.group.elements)
-        d = Cay.degree
-        r = 1
-        B = A
-        while list(B[0,:]).count(1) == size_of_sphere(d,r):
-                B = np.matmul(B,A)
-                r += 1
-        return r-1
\ No newline at end of file
+        """
+        Returns the injectivity radius of the Cayley graph.
+        This is the largest r such that the ball of radius r around the identity looks like the ball in the tree of degree d, i.e. distinct non-backtracking walks of length at most r end at distinct vertices.
+        A breadth first search from the identity finds its first cycle, of length 2r+1 or 2r+2, exactly when it handles the sphere of radius r where such walks first collide.
+        By vertex-transitivity this cycle has the length of the girth, so the injectivity radius is (girth - 1)//2.
+        """
+        return Cay.injectivity_radius
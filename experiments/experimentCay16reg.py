@@ -14,11 +14,9 @@ import math
 import numpy as np
 import groups as gp
 import cayleygraphs as cg
+import sweeps as sw
 import LPS
 
-print("We show the following quantities:")
-print("k & Number of elements & Diameter & gamma & lambda_1 & girth & girth ratio & mean injectivity radius")
-
 #In 
 def inverse(n,k):
     """
@@ -31,24 +29,18 @@ def inverse(n,k):
         if (m*n)%k == 1: 
             return m 
 
-for k in range(11,35):
+#The generating set of SL(2,k).
+def generators(k):
+    return [(1,1,0,1), (1,0,1,1), (1,3,0,1), (1,0,3,1), (2,0,0,inverse(2,k)), (1,7,0,1), (1,0,7,1), (5,0,0,inverse(5,k))]
+
+if __name__ == "__main__":
+    print("We show the following quantities:")
+    print("k & Number of elements & Diameter & gamma & lambda_1 & girth & girth ratio & mean injectivity radius")
+
+    #Construction of the Cayley graphs and calculation of their graph theoretic properties in parallel, largest groups first.
     #For simplicity, we only consider primes k > 10.
-    if LPS.is_prime(k):
-
-        #Construction of Cayley graph. 
-        G = gp.SL(2,k)
-        set = [(1,1,0,1), (1,0,1,1), (1,3,0,1), (1,0,3,1), (2,0,0,inverse(2,k)), (1,7,0,1), (1,0,7,1), (5,0,0,inverse(5,k))]
-        Cay = cg.CayleyGraph(G,set)
-
-        #Calculation of graph theoretic properties.
-        noe = len(Cay.group.elements)
-        diam = cg.diameter(Cay)
-        asg = cg.adjacency_spectral_gap(Cay)
-        lsg = cg.laplacian_spectral_gap(Cay)
-        gth = cg.girth(Cay)
-        deg = Cay.degree
-        gthratio = gth*np.log(deg - 1)/np.log(noe)
-        minj = cg.injectivity_radius(Cay)
-
-        #We output the graph theoretic quantities such that it can be used for a Latex table. 
-        print(f"{k} & {noe} & {diam} &  {round(asg,3)} & {round(lsg,3)} & {gth} & {round(gthratio,3)} & {minj} \\\\")
+    points = [(k,) for k in range(11,35) if LPS.is_prime(k)]
+    table = sw.sweep("SL2", points, generators = generators)
+
+    #We output the graph theoretic quantities such that it can be used for a Latex table.
+    print(table.to_latex())
@@ -12,29 +12,21 @@ sys.path.insert(0, parent_dir)
 import numpy as np
 import groups as gp
 import cayleygraphs as cg
+import sweeps as sw
 import LPS
 
-print("We show the following quantities:")
-print("k & Number of elements & Diameter & gamma & lambda_1 & girth & girth ratio & mean injectivity radius")
+#The generating set of SL(2,k).
+def generators(k):
+    return [(1,2,0,1), (1,0,2,1)]
 
-for k in range(29,35):
-    #Since we require 2 to be invertible, we only consider odd k. 
-    if k%2!=0:
+if __name__ == "__main__":
+    print("We show the following quantities:")
+    print("k & Number of elements & Diameter & gamma & lambda_1 & girth & girth ratio & mean injectivity radius")
 
-        #Construction of Cayley graph. It suffices to take the set [(1,2,0,1), (1,0,2,1)]
-        G = gp.SL(2,k)
-        set = [(1,2,0,1), (1,0,2,1)]
-        Cay = cg.CayleyGraph(G,set)
+    #Construction of the Cayley graphs and calculation of their graph theoretic properties in parallel, largest groups first.
+    #Since we require 2 to be invertible, we only consider odd k.
+    points = [(k,) for k in range(29,35) if k%2!=0]
+    table = sw.sweep("SL2", points, generators = generators)
 
-        #Calculation of graph theoretic properties.
-        noe = len(Cay.group.elements)
-        diam = cg.diameter(Cay)
-        asg = cg.adjacency_spectral_gap(Cay)
-        lsg = cg.laplacian_spectral_gap(Cay)
-        gth = cg.girth(Cay)
-        deg = Cay.degree
-        gthratio = gth*np.log(deg-1)/np.log(noe)
-        minj = cg.injectivity_radius(Cay)
-
-        #We output the graph theoretic quantities such that it can be used for a Latex table. 
-        print(f"{k} & {noe} & {diam} &  {round(asg,3)} & {round(lsg,3)} & {gth} & {round(gthratio,3)} & {minj} \\\\")
+    #We output the graph theoretic quantities such that it can be used for a Latex table.
+    print(table.to_latex())
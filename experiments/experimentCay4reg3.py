@@ -12,29 +12,21 @@ sys.path.insert(0, parent_dir)
 import numpy as np
 import groups as gp
 import cayleygraphs as cg
+import sweeps as sw
 import LPS
 
-print("We show the following quantities:")
-print("k & Number of elements & Diameter & gamma & lambda_1 & girth & girth ratio & mean injectivity radius")
+#The generating set of SL(2,k).
+def generators(k):
+    return [(1,3,0,1), (1,0,3,1)]
 
-for k in range(2,35):
-    #Since we require 3 to be invertible, we only consider k that are not divisible by 3.
-    if k%3!=0:
-
-        #Construction of Cayley graph. It suffices to take the set [(1,3,0,1), (1,0,3,1)]
-        G = gp.SL(2,k)
-        set = [(1,3,0,1), (1,0,3,1)]
-        Cay = cg.CayleyGraph(G,set)
+if __name__ == "__main__":
+    print("We show the following quantities:")
+    print("k & Number of elements & Diameter & gamma & lambda_1 & girth & girth ratio & mean injectivity radius")
 
-        #Calculation of graph theoretic properties.
-        noe = len(Cay.group.elements)
-        diam = cg.diameter(Cay)
-        asg = cg.adjacency_spectral_gap(Cay)
-        lsg = cg.laplacian_spectral_gap(Cay)
-        gth = cg.girth(Cay)
-        deg = Cay.degree
-        gthratio = gth*np.log(deg-1)/np.log(noe)
-        minj = cg.injectivity_radius(Cay)
+    #Construction of the Cayley graphs and calculation of their graph theoretic properties in parallel, largest groups first.
+    #Since we require 3 to be invertible, we only consider k that are not divisible by 3.
+    points = [(k,) for k in range(2,35) if k%3!=0]
+    table = sw.sweep("SL2", points, generators = generators)
 
-        #We output the graph theoretic quantities such that it can be used for a Latex table. 
-        print(f"{k} & {noe} & {diam} &  {round(asg,3)} & {round(lsg,3)} & {gth} & {round(gthratio,3)} & {minj} \\\\")
\ No newline at end of file
+    #We output the graph theoretic quantities such that it can be used for a Latex table.
+    print(table.to_latex())
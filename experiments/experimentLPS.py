@@ -11,28 +11,23 @@ sys.path.insert(0, parent_dir)
 import numpy as np
 import groups as gp
 import cayleygraphs as cg
+import sweeps as sw
+import resultstore as rs
 import LPS
 
-print("We show the following quantities:")
-print("(p,q) & Number of elements & Diameter & gamma & lambda_star & lambda_1 & girth & girth ratio & mean injectivity radius")
+if __name__ == "__main__":
+    print("We show the following quantities:")
+    print("(p,q) & Number of elements & Diameter & gamma & lambda_star & lambda_1 & girth & girth ratio & mean injectivity radius")
 
-for p in range(20,50):
-    for q in range(3,20):
-        if LPS.is_prime(p) and p%4==1:
-            if LPS.is_prime(q) and q%4==1 and q!=p: 
-                #Construction of Cayley graph. It suffices to take the set [(1,1,0,1), (1,0,1,1)]
-                Cay = LPS.LPS(p,q)
+    #Both p and q need to be distinct primes = 1 mod 4.
+    points = [(p,q) for p in range(20,50) for q in range(3,20)
+              if LPS.is_prime(p) and p%4==1 and LPS.is_prime(q) and q%4==1 and q!=p]
 
-                #Calculation of graph theoretic properties.
-                noe = len(Cay.group.elements)
-                diam = cg.diameter(Cay)
-                asg = cg.adjacency_spectral_gap(Cay)
-                lst = cg.adjacency_star(Cay)
-                lsg = cg.laplacian_spectral_gap(Cay)
-                gth = cg.girth(Cay)
-                deg = Cay.degree
-                gthratio = gth*np.log(deg-1)/np.log(noe)
-                minj = cg.injectivity_radius(Cay)
+    #Construction of the LPS graphs and calculation of their graph theoretic properties in parallel, largest groups first.
+    #The results are kept in a database next to this script, so a rerun only calculates the points that are missing.
+    invariants = ("order", "diameter", "adjacency_spectral_gap", "adjacency_star", "laplacian_spectral_gap", "girth", "girth_ratio", "injectivity_radius")
+    store = rs.ResultStore(os.path.join(current_dir, "experimentLPS.sqlite"))
+    table = sw.sweep("LPS", points, invariants, store = store)
 
-                #We output the graph theoretic quantities such that it can be used for a Latex table.  
-                print(f"{p,q} & {noe} & {diam} &  {round(asg,3)} & {round(lst,3)} & {round(lsg,3)} & {gth} & {round(gthratio,3)} & {minj} \\\\")
+    #We output the graph theoretic quantities such that it can be used for a Latex table.
+    print(table.to_latex())
@@ -0,0 +1,23 @@
+"""
+With this script we search for good expanders among the Cayley graphs of SL(2,k) for a fixed k.
+For every degree we sample random symmetric generating sets and show the sets with the largest strong spectral gap.
+This can be compared with the generating sets of the experiments experimentCay4reg1.py to experimentCay16reg.py.
+"""
+
+#We first fix the system path such that we import the modules from the parent directory.
+import os,sys,inspect
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import groups as gp
+import generatorsearch as gs
+
+if __name__ == "__main__":
+    k = 13
+    group = gp.SL(2,k)
+    print(f"We show the best generating sets of SL(2,{k}):")
+    print("degree & gamma & generating set")
+    for degree in (4,6,8,10,16):
+        for candidate in gs.search(group, degree, 1000, top = 3, seed = 0):
+            print(degree, "&", round(candidate.score, 3), "&", candidate.set, "\\\\")
@@ -0,0 +1,194 @@
+"""
+In this script we search for generating sets of a fixed group whose Cayley graphs are good expanders.
+
+The experiment scripts experimentCay*reg.py each use one hand-picked generating set of SL(2,k). Here we sample many random symmetric sets of a given size and keep the ones with the best spectral gap.
+All candidates share one group and one multiplication table: the elements of the sets are drawn from a pool of elements closed under inversion, and the rows of the multiplication table of the pool are calculated once.
+The adjacency matrix of a candidate is then read off from the rows of its elements without any further group multiplication.
+A candidate is evaluated in two steps:
+1. A breadth first search from the identity checks whether the set generates the group. Sets that do not are discarded before any eigenvalue is calculated.
+2. The candidate is scored with the extremal eigenvalues of its adjacency matrix, see cayleygraphs.extremal_eigenvalues.
+The candidates are evaluated in batches by a process pool. They only depend on the seed, so the result does not depend on the number of workers.
+
+Example:
+best = search(gp.SL(2,13), 4, 1000, top = 5, seed = 0)
+Cay = cg.CayleyGraph(gp.SL(2,13), best[0].set)
+"""
+
+import collections
+import concurrent.futures
+import os
+import numpy as np
+from scipy import sparse
+import cayleygraphs as cg
+
+# A scored generating set. The set is symmetric and contains the elements of the group, eigenvalues are the normalized extremal eigenvalues.
+Candidate = collections.namedtuple("Candidate", ["score", "set", "eigenvalues"])
+
+def is_bipartite(eigenvalues):
+    return bool(np.isclose(eigenvalues[-1], -1))
+
+# The scores of a candidate as functions of its normalized extremal eigenvalues, as in cayleygraphs.
+SCORES = {
+    "adjacency_spectral_gap": lambda e: 1 - max(abs(e[1]), abs(e[-1])),
+    "adjacency_star": lambda e: 1 - max(abs(e[1]), abs(e[-2])) if is_bipartite(e) else 1 - max(abs(e[1]), abs(e[-1])),
+    "laplacian_spectral_gap": lambda e: 1 - e[1],
+}
+
+class GeneratorSearch:
+    """
+    Pool of elements of a group with the rows of its multiplication table, from which symmetric sets are sampled and evaluated.
+
+    Initialization:
+    group: Indexed group, see groups.FiniteGroup.
+    pool: Elements from which the sets are drawn. By default all elements if the full multiplication table has at most max_entries entries, and otherwise pool_size random elements.
+    pool_size: Number of random elements of the default pool of a large group.
+    seed: Seed of the random pool.
+    max_entries: Bound on the number of entries of the multiplication table of the pool.
+
+    Attributes:
+    ids: Ids of the pool, which is closed under inversion and does not contain the identity.
+    inverses: Positions of the inverses of the elements of the pool within ids.
+    table: The rows of the multiplication table of the pool, the entry (i,g) is the id of ids[i]*g.
+    """
+
+    def __init__(self, group, pool = None, pool_size = 256, seed = None, max_entries = 2**26):
+        self.group = group
+        if pool is not None:
+            ids = group.encode(pool)
+            if (ids < 0).any(): raise ValueError("The pool contains elements that are not in the group.")
+        elif group.table is not None or group.order**2 <= max_entries:
+            ids = np.arange(group.order)
+        else:
+            rng = np.random.default_rng(seed)
+            ids = rng.choice(group.order, size = min(pool_size, group.order), replace = False)
+        ids = np.unique(np.concatenate([ids, group.invert(ids)]))
+        self.ids = ids[ids != group.identity_id]
+        self.inverses = np.searchsorted(self.ids, group.invert(self.ids))
+        if group.table is not None: self.table = group.table[self.ids]
+        else: self.table = group.multiplication_table(self.ids, max_entries = max_entries)
+
+    def sample(self, degree, rng):
+        """
+        Returns the positions in the pool of a random symmetric set with degree elements.
+        We add random elements together with their inverses until the set has the right size. 
+        An element of order 2 is its own inverse. Such an element is only added if the set can still be completed afterwards, which for an even number of missing elements needs a second element of order 2.
+        """
+
+        if degree > len(self.ids): raise ValueError(f"The pool has only {len(self.ids)} elements, which is less than the degree {degree}.")
+        involutions = int((self.inverses == np.arange(len(self.ids))).sum())
+        chosen = set()
+        order = rng.permutation(len(self.ids)).tolist()
+        for i in order:
+            room = degree - len(chosen)
+            if room == 0: break
+            if i in chosen: continue
+            if self.inverses[i] != i:
+                if room >= 2: chosen |= {i, int(self.inverses[i])}
+            elif room%2 == 1 or involutions >= 2:
+                chosen.add(i)
+                involutions -= 1
+        if degree - len(chosen) == 1:
+            # The only element of order 2 that completes the set came before the last pair in the permutation.
+            chosen.add(next(i for i in order if self.inverses[i] == i and i not in chosen))
+        if len(chosen) < degree: raise ValueError(f"Could not sample a symmetric set with {degree} elements from the pool.")
+        return np.array(sorted(chosen))
+
+    def candidates(self, degree, samples, seed = None):
+        """
+        Returns a list of distinct random symmetric sets (as positions in the pool). Duplicates are sampled only once, so the list can be shorter than samples.
+        """
+
+        rng = np.random.default_rng(seed)
+        seen = set()
+        result = []
+        for _ in range(samples):
+            positions = self.sample(degree, rng)
+            key = tuple(positions.tolist())
+            if key in seen: continue
+            seen.add(key)
+            result.append(positions)
+        return result
+
+    def generates(self, positions):
+        """
+        Returns whether the set generates the group, by a breadth first search from the identity that only uses the rows of the table.
+        """
+
+        rows = self.table[positions]
+        reached = np.zeros(self.group.order, dtype = bool)
+        frontier = np.array([self.group.identity_id])
+        reached[frontier] = True
+        count = 1
+        while len(frontier) > 0 and count < self.group.order:
+            neighbours = np.unique(rows[:, frontier].ravel())
+            frontier = neighbours[~reached[neighbours]]
+            reached[frontier] = True
+            count += len(frontier)
+        return count == self.group.order
+
+    def adjacency(self, positions):
+        """
+        Returns the adjacency matrix of the Cayley graph of the set as a CSR matrix. Since the set is symmetric, the row of g consists of s*g for s in the set.
+        """
+
+        rows = self.table[positions]
+        n = self.group.order
+        degree = len(positions)
+        return sparse.csr_matrix((np.ones(n*degree), rows.T.ravel(), np.arange(0, n*degree + 1, degree)), shape = (n,n))
+
+    def evaluate(self, positions, score = "adjacency_spectral_gap", tol = 1e-4):
+        """
+        Returns the score and the normalized extremal eigenvalues of a set, or None if the set does not generate the group.
+        """
+
+        if not self.generates(positions): return None
+        # A fixed starting vector makes the scores reproducible, which matters for the ranking of sets with equal spectra.
+        v0 = np.random.default_rng(0).standard_normal(self.group.order)
+        eigenvalues = cg.extremal_eigenvalues(self.adjacency(positions), tol, v0)/len(positions)
+        return float(SCORES[score](eigenvalues)), eigenvalues
+
+#The GeneratorSearch of a worker process, which is sent to every worker once instead of with every batch.
+WORKER_SEARCH = None
+
+def start_worker(searcher):
+    global WORKER_SEARCH
+    WORKER_SEARCH = searcher
+
+def evaluate_batch(batch, score, tol):
+    return [WORKER_SEARCH.evaluate(positions, score, tol) for positions in batch]
+
+def search(group, degree, samples, top = 10, score = "adjacency_spectral_gap", seed = None, workers = None, batch_size = 64, tol = 1e-4, **options):
+    """
+    Searches random symmetric sets of a group for the best expanders.
+
+    Input:
+    group: Indexed group, e.g. groups.SL(2,k).
+    degree: Number of elements of the sets, which is the degree of the Cayley graphs.
+    samples: Number of sampled sets.
+    top: Number of sets that are returned.
+    score: Name of the score in SCORES, larger is better.
+    seed: Seed of the sampling. For a fixed seed the result does not depend on workers.
+    workers: Number of processes. With workers = 1 everything runs in the current process, with None we use all cores.
+    batch_size: Number of sets that a worker evaluates at once.
+    tol: Relative accuracy of the extremal eigenvalues. The scores only need a few digits, which is much cheaper than machine precision for large groups.
+    options: Further keyword arguments of GeneratorSearch, e.g. pool or pool_size.
+
+    Return:
+    List of at most top Candidates, sorted by decreasing score. Sets that do not generate the group are not returned.
+    """
+
+    if score not in SCORES: raise ValueError(f"Unknown score {score}, use one of {', '.join(SCORES)}.")
+    searcher = GeneratorSearch(group, seed = seed, **options)
+    candidates = searcher.candidates(degree, samples, seed = seed)
+    batches = [candidates[start:start + batch_size] for start in range(0, len(candidates), batch_size)]
+    if workers is None: workers = os.cpu_count() or 1
+    if workers == 1 or len(batches) <= 1:
+        results = [[searcher.evaluate(positions, score, tol) for positions in batch] for batch in batches]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = workers, initializer = start_worker, initargs = (searcher,)) as pool:
+            results = list(pool.map(evaluate_batch, batches, [score]*len(batches), [tol]*len(batches)))
+
+    # Ties are broken by the order of sampling, so the result is deterministic.
+    scored = [(result, positions) for batch, batch_results in zip(batches, results) for positions, result in zip(batch, batch_results) if result is not None]
+    order = sorted(range(len(scored)), key = lambda i: -scored[i][0][0])
+    return [Candidate(scored[i][0][0], group.decode(searcher.ids[scored[i][1]]), scored[i][0][1]) for i in order[:top]]
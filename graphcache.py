@@ -0,0 +1,188 @@
+"""
+In this script we implement a persistent cache of linear groups and Cayley graphs on disk.
+
+Constructing GL(n,q), SL(n,q), PGL(n,q) and PSL(n,q) dominates the runtime of most experiments, and several experiments use the same groups with different generating sets.
+The cache stores
+groups: The matrices of the group (and optionally its multiplication table), keyed by (group type, n, q).
+Cayley graphs: The CSR arrays of the adjacency matrix, keyed by the group and the ids of the generating set.
+
+Every entry is a directory named after a hash of its description, containing .npy files and meta.json.
+The arrays are memory-mapped on load, so loading a large group only reads the parts that are used.
+When the cache grows beyond max_bytes, the least recently used entries are deleted.
+
+Example:
+cache = GraphCache("cache")
+Cay = cg.CayleyGraph(cache.group("SL",2,31), [(1,1,0,1), (1,0,1,1)], cache = cache)
+Cay = LPS.LPS(5,29, cache = cache)
+"""
+
+import collections
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from scipy import sparse
+import groups as gp
+import cayleygraphs as cg
+
+#The groups that can be cached.
+GROUPS = {"GL": gp.GL, "SL": gp.SL, "PGL": gp.PGL, "PSL": gp.PSL}
+
+def group_description(group):
+    """
+    Returns the description (group type, n, q) of a group in GROUPS, or None for other groups.
+    """
+    name = type(group).__name__
+    if GROUPS.get(name) is not type(group): return None
+    return {"group": name, "n": int(group.n), "q": int(group.q)}
+
+def content_key(description):
+    """
+    Returns the hash of a description, which is the name of its entry in the cache.
+    """
+    return hashlib.sha256(json.dumps(description, sort_keys = True).encode()).hexdigest()[:32]
+
+class GraphCache:
+    """
+    Cache of groups and Cayley graphs in a directory.
+
+    Initialization:
+    directory: Directory of the cache, which is created if necessary.
+    max_bytes: Bound on the total size of the cache.
+
+    Attributes:
+    stats: Counter of hits, misses, stores and evictions.
+    """
+    def __init__(self, directory, max_bytes = 2**30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = collections.Counter()
+        os.makedirs(directory, exist_ok = True)
+
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"]/lookups if lookups else 0.0
+
+    def entries(self):
+        """
+        Returns the list of keys of the entries in the cache.
+        Directories starting with .tmp are entries that another process is still writing, see store, so they are neither listed nor evicted.
+        """
+        return [key for key in os.listdir(self.directory) if not key.startswith(".tmp") and os.path.exists(os.path.join(self.directory, key, "meta.json"))]
+
+    def entry_size(self, key):
+        path = os.path.join(self.directory, key)
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+    def size(self):
+        """
+        Returns the total size of the entries in bytes.
+        """
+        return sum(self.entry_size(key) for key in self.entries())
+
+    def load(self, key):
+        """
+        Returns the metadata and a dictionary of memory-mapped arrays of an entry, or None if the entry does not exist.
+        Loading an entry marks it as recently used.
+        """
+        path = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(path, "meta.json")) as f: meta = json.load(f)
+            arrays = {f[:-4]: np.load(os.path.join(path, f), mmap_mode = "r") for f in os.listdir(path) if f.endswith(".npy")}
+            os.utime(os.path.join(path, "meta.json"))
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return meta, arrays
+
+    def store(self, key, meta, arrays):
+        """
+        Stores an entry. The entry is written to a temporary directory first and then renamed, so other processes never see a partial entry.
+        """
+        path = os.path.join(self.directory, key)
+        temporary = tempfile.mkdtemp(dir = self.directory, prefix = ".tmp")
+        for name, array in arrays.items():
+            np.save(os.path.join(temporary, name + ".npy"), np.asarray(array))
+        with open(os.path.join(temporary, "meta.json"), "w") as f: json.dump(meta, f)
+        try:
+            os.rename(temporary, path)
+        except OSError:
+            # Another process stored the same entry in the meantime.
+            shutil.rmtree(temporary, ignore_errors = True)
+            return
+        self.stats["stores"] += 1
+        self.evict(keep = key)
+
+    def add_array(self, key, name, array):
+        """
+        Adds an array to an existing entry.
+        """
+        path = os.path.join(self.directory, key)
+        with tempfile.NamedTemporaryFile(dir = path, suffix = ".npy", delete = False) as f:
+            np.save(f, np.asarray(array))
+        os.replace(f.name, os.path.join(path, name + ".npy"))
+        self.evict(keep = key)
+
+    def evict(self, keep = None):
+        """
+        Deletes the least recently used entries until the cache is not larger than max_bytes. The entry keep is not deleted.
+        """
+        entries = [(os.path.getmtime(os.path.join(self.directory, key, "meta.json")), key) for key in self.entries()]
+        total = sum(self.entry_size(key) for _, key in entries)
+        for _, key in sorted(entries):
+            if total <= self.max_bytes: break
+            if key == keep: continue
+            total -= self.entry_size(key)
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors = True)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        for key in self.entries():
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors = True)
+
+    def group(self, name, n, q, table = False):
+        """
+        Returns the group name(n,q) for name in GROUPS, from the cache if possible.
+        With table = True the full multiplication table is also calculated, cached and memory-mapped.
+        """
+        description = {"group": name, "n": n, "q": q}
+        key = content_key(description)
+        entry = self.load(key)
+        if entry is None:
+            group = GROUPS[name](n,q)
+            self.store(key, dict(description, scalars = [int(l) for l in group.scalars]), {"matrices": group.matrices})
+        else:
+            meta, arrays = entry
+            group = GROUPS[name].__new__(GROUPS[name])
+            gp.MatrixGroup.__init__(group, n, q, arrays["matrices"], meta["scalars"], canonical = True)
+            if "table" in arrays: group.table = arrays["table"]
+        if table and group.table is None:
+            self.add_array(key, "table", group.multiplication_table())
+            group.table = np.load(os.path.join(self.directory, key, "table.npy"), mmap_mode = "r")
+        return group
+
+    def adjacency(self, group, generators):
+        """
+        Returns the adjacency matrix of the Cayley graph of group with respect to the elements with the ids generators, see cayleygraphs.cayley_adjacency.
+        Graphs of groups that are not in GROUPS are not cached.
+        """
+        description = group_description(group)
+        if description is None: return cg.cayley_adjacency(group, generators)
+        description["generators"] = sorted(set(int(g) for g in generators))
+        key = content_key(description)
+        entry = self.load(key)
+        if entry is None:
+            adjacency = cg.cayley_adjacency(group, generators)
+            self.store(key, description, {"indptr": adjacency.indptr, "indices": adjacency.indices, "data": adjacency.data})
+            return adjacency
+        meta, arrays = entry
+        return sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape = (group.order, group.order), copy = False)
+
+    def cayley_graph(self, name, n, q, set, **kwargs):
+        """
+        Returns the Cayley graph of name(n,q) with respect to set, where the group and the adjacency matrix are taken from the cache if possible.
+        """
+        return cg.CayleyGraph(self.group(name, n, q), set, cache = self, **kwargs)
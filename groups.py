@@ -6,15 +6,28 @@ It contains the following classes:
 FiniteGroups: The main class for this module. Defines a group an several useful methods.
 FiniteGroups has the following subclasses:
 CyclicGroup: Class of cyclic groups Z/nZ.
+Subgroup: Class of subgroups of an indexed group, given by the ids of their elements.
 GL: Class of groups GL_n(Z/qZ).
 SL: Class of groups SL_n(Z/qZ).
 PSL: Class of groups PSL_n(Z/qZ).
 PGL: Class of groups PGL_n(Z/qZ).
+GL, SL, PSL and PGL share the superclass MatrixGroup, which stores the matrices as a NumPy array.
+ImplicitPGL and ImplicitPSL implement PGL(2,q) and PSL(2,q) for large primes q without storing the elements, see ImplicitProjectiveGroup.
+Importing this module does not construct any group. The group axioms and orders are checked by the test suite in tests/test_groups.py.
+
+The linear groups are enumerated with the following functions:
+matmul_mod: Products modulo q of stacks of matrices, in the smallest integer type in which they cannot overflow.
+triangularize_mod: Gaussian elimination modulo q, which also works for composite q.
+determinants_mod: Exact determinants modulo q of a stack of integer matrices.
+inverses_mod: Inverses modulo q of a stack of integer matrices.
+enumerate_matrices: All matrices over Z/qZ whose determinant satisfies a given condition.
+projective_normal_form: Canonical representatives of matrices up to scalars, used for PGL and PSL.
 """
 
 import numpy as np
 import math
 import itertools
+import functools
 import time
 from numpy import matrix
 from numpy import linalg
@@ -31,6 +44,15 @@ class FiniteGroup:
     Methods:
     inverse: Calculates the inverse of a given element.
     is_group: Checks if multiplication is well-defined and inverses exist.
+
+    Indexed mode:
+    The elements are also numbered by dense ids 0,1,...,|G|-1, such that products of many elements can be computed with NumPy arrays.
+    element_list: List of the elements, the element with id i is element_list[i].
+    identity_id: Id of the identity.
+    encode: Translates elements to ids. Objects that are not elements get the id -1.
+    decode: Translates ids to elements.
+    mul: Vectorized multiplication of ids.
+    multiplication_table: Precomputed products as an int32 array, which turns multiplication into an array lookup.
     """
     
     def __init__(self, elements, identity, operation):
@@ -46,32 +68,161 @@ class FiniteGroup:
         The group determined by the above data.
         """
 
-        self.elements = elements
+        # Subclasses that construct the elements lazily pass None.
+        if elements is not None: self.elements = elements
         self.identity = identity
         self.operation = operation
+        self.table = None
+
+    @functools.cached_property
+    def element_list(self):
+        """
+        List of the elements of the group. The element with id i is element_list[i].
+        """
+
+        try: return sorted(self.elements)
+        except TypeError: return list(self.elements)
+
+    @functools.cached_property
+    def index(self):
+        """
+        Dictionary sending an element to its id.
+        """
+
+        return {g: i for i, g in enumerate(self.element_list)}
+
+    @property
+    def order(self):
+        return len(self.element_list)
+
+    @property
+    def identity_id(self):
+        return int(self.encode([self.identity])[0])
+
+    def encode(self, elements):
+        """
+        Returns the integer array of ids of the given elements. Objects that are not elements of the group get the id -1.
+        """
+
+        return np.array([self.index.get(g,-1) for g in elements], dtype=np.int64)
+
+    def decode(self, ids):
+        """
+        Returns the list of elements with the given ids.
+        """
+
+        return [self.element_list[i] for i in np.ravel(ids)]
+
+    def mul(self, a, b):
+        """
+        Multiplies the elements with ids a and b. Here a and b are integers or integer arrays, which are broadcast against each other.
+        If the full multiplication table has been calculated, this is an array lookup.
+        """
+
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64))
+        if self.table is not None: return self.table[a,b].astype(np.int64)
+        elements = self.element_list
+        products = [self.operation(elements[x], elements[y]) for x, y in zip(a.ravel().tolist(), b.ravel().tolist())]
+        return self.encode(products).reshape(a.shape)
+
+    def multiplication_table(self, ids = None, max_entries = 2**26):
+        """
+        Returns the products of the elements with the given ids with all elements of the group as an int32 array.
+        The entry (i,g) of the table is the id of the product of ids[i] and g.
+        Without ids we calculate the full (|G|,|G|)-table and keep it, such that mul becomes an array lookup. 
+
+        Arguments:
+        ids: Integer array of ids or None.
+        max_entries: We refuse to calculate tables with more entries than this.
+
+        Return:
+        Integer array of shape (len(ids),|G|), or (|G|,|G|) if ids is None.
+        """
+
+        if ids is None and self.table is not None: return self.table
+        rows = np.arange(self.order) if ids is None else np.asarray(ids, dtype=np.int64)
+        if len(rows)*self.order > max_entries:
+            raise MemoryError(f"A multiplication table with {len(rows)*self.order} entries exceeds max_entries = {max_entries}.")
+        table = np.empty((len(rows), self.order), dtype=np.int32)
+        chunk = max(1, 2**20//max(self.order,1))
+        for start in range(0, len(rows), chunk):
+            table[start:start+chunk] = self.mul(rows[start:start+chunk,None], np.arange(self.order)[None,:])
+        if ids is None: self.table = table
+        return table
     
+    @functools.cached_property
+    def inverse_ids(self):
+        """
+        Integer array whose entry g is the id of the inverse of the element with id g, or -1 if there is no inverse.
+        We search a block of rows of the multiplication table for the identity at once.
+        """
+
+        everything = np.arange(self.order)
+        identity = self.identity_id
+        inverses = np.full(self.order, -1, dtype=np.int64)
+        chunk = max(1, 2**20//max(self.order,1))
+        for start in range(0, self.order, chunk):
+            is_identity = self.mul(everything[start:start+chunk,None], everything[None,:]) == identity
+            found = is_identity.any(axis=1)
+            inverses[start:start+chunk] = np.where(found, np.argmax(is_identity, axis=1), -1)
+        return inverses
+
+    def invert(self, ids):
+        """
+        Returns the ids of the inverses of the elements with the given ids.
+        """
+
+        return self.inverse_ids[np.asarray(ids, dtype=np.int64)]
+
     def inverse(self, g):
         """
         g: Find inverse of the group element g. If no inverse exists, we return False.
         """
 
-        for h in self.elements:
-            if self.operation(g, h) == self.identity:
-                return h
-        return False
+        g_id = self.encode([g])[0]
+        if g_id < 0 or self.inverse_ids[g_id] < 0: return False
+        return self.decode([self.inverse_ids[g_id]])[0]
     
-    def is_group(self):
+    def is_group(self, samples = None, associativity_samples = 10000, seed = None, batch_size = 2**20):
         """
-        Checks if multiplication is well-defined and the inverses exist.  
+        Checks if multiplication is well-defined, associative, and that the identity and inverses exist.  
+        We multiply whole batches of ids at once, which avoids Python loops over pairs of elements.
+
+        Arguments:
+        samples: If None, we check closure for all |G|**2 products. Otherwise we only check the given number of random products, which is meant for large groups.
+        associativity_samples: Number of random triples for which we check associativity.
+        seed: Seed of the random number generator used for sampling.
+        batch_size: Number of products calculated at once.
+
+        Return:
+        True if no violation of the group axioms was found.
         """
 
-        for e1 in self.elements:
-            for e2 in self.elements:
-                if self.operation(e1,e2) not in self.elements: return False
+        rng = np.random.default_rng(seed)
+        everything = np.arange(self.order)
+        identity = self.identity_id
+        if identity < 0: return False
+
+        # Closure: all products, or random samples of products, lie in the group.
+        if samples is None:
+            chunk = max(1, batch_size//max(self.order,1))
+            for start in range(0, self.order, chunk):
+                if (self.mul(everything[start:start+chunk,None], everything[None,:]) < 0).any(): return False
+        else:
+            for start in range(0, samples, batch_size):
+                a, b = rng.integers(0, self.order, size=(2, min(batch_size, samples - start)))
+                if (self.mul(a,b) < 0).any(): return False
 
-        for e1 in self.elements:
-            if not self.inverse(e1): return False
-            if self.inverse(e1) not in self.elements: return False
+        # Identity and inverses.
+        if (self.mul(identity, everything) != everything).any() or (self.mul(everything, identity) != everything).any(): return False
+        inverses = self.inverse_ids
+        if (inverses < 0).any(): return False
+        if (self.mul(everything, inverses) != identity).any() or (self.mul(inverses, everything) != identity).any(): return False
+
+        # Associativity on random triples.
+        for start in range(0, associativity_samples, batch_size):
+            a, b, c = rng.integers(0, self.order, size=(3, min(batch_size, associativity_samples - start)))
+            if (self.mul(self.mul(a,b),c) != self.mul(a,self.mul(b,c))).any(): return False
         
         return True
     
@@ -93,9 +244,470 @@ class CyclicGroup(FiniteGroup):
         set = range(0,n)
         def op(a,b): return (a+b)%n
         super().__init__(set, 0, op)
+        self.n = n
+
+    # The element k has the id k, so the indexed mode is plain modular arithmetic.
+    @functools.cached_property
+    def element_list(self):
+        return list(self.elements)
+
+    def encode(self, elements):
+        # Every integer is a residue modulo n, so unreduced integers such as sums of elements are reduced instead of rejected.
+        return np.array(list(elements), dtype=np.int64)%self.n
+
+    def decode(self, ids):
+        return np.ravel(ids).tolist()
+
+    def mul(self, a, b):
+        return (np.asarray(a, dtype=np.int64) + np.asarray(b, dtype=np.int64))%self.n
+
+    @functools.cached_property
+    def inverse_ids(self):
+        return (-np.arange(self.n))%self.n
+
+class Subgroup(FiniteGroup):
+    """
+    This class implements a subgroup of an indexed group, given by the ids of its elements in the group, as a subclass of FiniteGroup.
+    The id of an element in the subgroup is the position of its id in the group among the sorted ids parent_ids.
+    Products and inverses are calculated in the indexed mode of the group and translated back, so the group itself is never enumerated, e.g. for groups.ImplicitPSL.
+
+    Initialization:
+    group: Indexed group.
+    ids: Ids of the elements of the subgroup in group, e.g. found by cayleygraphs.generated_subgroup.
+    """
+
+    def __init__(self, group, ids):
+        self.group = group
+        self.parent_ids = np.unique(np.asarray(ids, dtype=np.int64))
+        super().__init__(None, group.identity, group.operation)
+
+    @property
+    def order(self):
+        return len(self.parent_ids)
+
+    @functools.cached_property
+    def elements(self):
+        return set(self.element_list)
+
+    @functools.cached_property
+    def element_list(self):
+        return self.group.decode(self.parent_ids)
+
+    def restrict(self, ids):
+        """
+        Translates ids in the group to ids in the subgroup. Elements that are not in the subgroup get the id -1.
+        """
+
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.parent_ids, ids), len(self.parent_ids)-1)
+        return np.where(self.parent_ids[positions] == ids, positions, -1)
+
+    def encode(self, elements):
+        return self.restrict(self.group.encode(elements))
+
+    def decode(self, ids):
+        return self.group.decode(self.parent_ids[np.ravel(ids)])
+
+    def mul(self, a, b):
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64))
+        if self.table is not None: return self.table[a,b].astype(np.int64)
+        return self.restrict(self.group.mul(self.parent_ids[a], self.parent_ids[b]))
+
+    @functools.cached_property
+    def inverse_ids(self):
+        return self.restrict(self.group.invert(self.parent_ids))
+
+
+# The linear groups below are enumerated directly with NumPy instead of testing every tuple in Z/qZ^(n**2) one at a time.
+# All arithmetic is exact integer arithmetic modulo q. Entries are reduced modulo q, and products are calculated in the smallest integer type in which they cannot overflow.
+def product_dtype(terms, q):
+    """
+    Returns the dtype in which a sum of terms products of two residues modulo q is exact: int32, int64, or object for Python integers if q is too large for int64.
+    NumPy calculates with int32 about twice as fast as with int64.
+    """
+
+    bound = terms*(q - 1)**2
+    if bound < 2**31: return np.int32
+    if bound < 2**63: return np.int64
+    return object
+
+def residues(array, q):
+    """
+    Returns the residues modulo q of an integer array, as int64 if they fit and as Python integers otherwise.
+    """
+
+    if q <= 2**63: return np.asarray(array).astype(np.int64)%q
+    return np.asarray(array).astype(object)%q
+
+def mul_mod(a, b, q):
+    """
+    Multiplies two broadcastable arrays of residues modulo q elementwise without overflow.
+    """
+
+    dtype = product_dtype(1, q)
+    return residues(np.asarray(a).astype(dtype)*np.asarray(b).astype(dtype)%q, q)
+
+def matmul_mod(A, B, q):
+    """
+    Multiplies two stacks of matrices over Z/qZ (with the broadcasting of np.matmul) without overflow.
+
+    Arguments:
+    A, B: Integer arrays of shape (...,n,m) and (...,m,k) with entries in 0,...,q-1.
+    q: Positive integer.
+
+    Return:
+    Array of shape (...,n,k) with the products modulo q.
+    """
+
+    dtype = product_dtype(np.shape(A)[-1], q)
+    return residues(np.matmul(np.asarray(A).astype(dtype), np.asarray(B).astype(dtype))%q, q)
+
+def triangularize_mod(matrices, q, augmented = None):
+    """
+    Brings a stack of matrices over Z/qZ to upper triangular form by Gaussian elimination.
+    We only swap rows and add multiples of a row to another row, so the determinant only changes its sign with every swap.
+    For composite q a pivot need not be invertible, so we eliminate a column with the Euclidean algorithm: 
+    the row with the smallest nonzero entry becomes the pivot row, and the rows below are reduced by multiples of it, until the pivot is the only nonzero entry.
+    Each round at least halves the smallest entry on average, so a column needs O(log q) rounds, which handle all matrices of the stack at once.
+
+    Arguments:
+    matrices: Integer array of shape (N,n,n).
+    q: Positive integer.
+    augmented: Optional integer array of shape (N,n,k) to which the same row operations are applied.
+
+    Return:
+    The triangular matrices, the signs (+1 or -1) of the row permutations and the transformed augmented array.
+    """
+
+    matrices = residues(matrices, q).copy()
+    if augmented is not None: augmented = residues(augmented, q).copy()
+    N, n = matrices.shape[0], matrices.shape[-1]
+    signs = np.ones(N, dtype=np.int64)
+    everything = np.arange(N)
+    for k in range(n):
+        while True:
+            column = matrices[:,k:,k]
+            nonzero = column != 0
+            pivots = np.argmin(np.where(nonzero, column, q), axis=1) + k
+
+            # The row with the smallest nonzero entry is swapped into row k.
+            swap = (pivots != k) & nonzero.any(axis=1)
+            if swap.any():
+                rows, pivots = everything[swap], pivots[swap]
+                for array in ([matrices] if augmented is None else [matrices, augmented]):
+                    array[rows,k], array[rows,pivots] = array[rows,pivots], array[rows,k].copy()
+                signs[swap] *= -1
+
+            active = nonzero.sum(axis=1) > 1
+            if not active.any(): break
+            rows = everything[active]
+            factors = matrices[rows,k+1:,k]//matrices[rows,k,k][:,None]
+            matrices[rows,k+1:] = (matrices[rows,k+1:] - mul_mod(factors[:,:,None], matrices[rows,k][:,None,:], q))%q
+            if augmented is not None:
+                augmented[rows,k+1:] = (augmented[rows,k+1:] - mul_mod(factors[:,:,None], augmented[rows,k][:,None,:], q))%q
+    return matrices, signs, augmented
+
+def determinants_mod(matrices, q):
+    """
+    Calculates the determinants modulo q of a stack of integer matrices.
+    We use Gaussian elimination modulo q, see triangularize_mod, which needs O(n^3 log q) operations per matrix instead of the n! terms of the cofactor expansion.
+
+    Arguments:
+    matrices: Integer array of shape (N,n,n).
+    q: Positive integer.
+
+    Return:
+    Integer array of shape (N,) with the determinants modulo q.
+    """
+
+    matrices = residues(matrices, q)
+    N, n = matrices.shape[0], matrices.shape[-1]
+    if n == 0: return residues(np.ones(N, dtype=np.int64), q)
+    if n == 1: return matrices[:,0,0]
+    triangular, signs, _ = triangularize_mod(matrices, q)
+    det = residues(signs, q)
+    for i in range(n):
+        det = mul_mod(det, triangular[:,i,i], q)
+    return det
+
+def unit_inverses_mod(units, q):
+    """
+    Returns the inverses modulo q of an integer array of units modulo q. There are at most q different units, so we invert each of them only once.
+    """
+
+    values, position = np.unique(np.asarray(units), return_inverse=True)
+    inverses = residues(np.array([pow(int(u), -1, q) for u in values], dtype=object), q)
+    return inverses[position.reshape(-1)].reshape(np.shape(units))
+
+def inverses_mod(matrices, q):
+    """
+    Calculates the inverses modulo q of a stack of integer matrices by Gauss-Jordan elimination of (A|I).
+    After triangularize_mod, the product of the diagonal entries is plus or minus the determinant, so for an invertible matrix all of them are units and the elimination can be completed.
+
+    Arguments:
+    matrices: Integer array of shape (N,n,n) of matrices whose determinants are units modulo q.
+    q: Positive integer.
+
+    Return:
+    Integer array of shape (N,n,n) with the inverses modulo q.
+    """
+
+    matrices = residues(matrices, q)
+    N, n = matrices.shape[0], matrices.shape[-1]
+    identity = np.broadcast_to(np.identity(n, dtype=np.int64), (N,n,n))
+    triangular, signs, inverses = triangularize_mod(matrices, q, identity)
+    diagonal = triangular[:,np.arange(n),np.arange(n)]
+    if (np.gcd(diagonal.astype(object), q) != 1).any(): raise ValueError("The stack contains matrices that are not invertible modulo q.")
+    scale = unit_inverses_mod(diagonal, q)
+    triangular = mul_mod(triangular, scale[:,:,None], q)
+    inverses = mul_mod(inverses, scale[:,:,None], q)
+    for i in range(n-1,0,-1):
+        factors = triangular[:,:i,i].copy()
+        triangular[:,:i] = (triangular[:,:i] - mul_mod(factors[:,:,None], triangular[:,i][:,None,:], q))%q
+        inverses[:,:i] = (inverses[:,:i] - mul_mod(factors[:,:,None], inverses[:,i][:,None,:], q))%q
+    return inverses
+
+def enumerate_matrices(n, q, accept, block_size = 2**22):
+    """
+    Enumerates all invertible (n,n)-matrices over Z/qZ whose determinant satisfies a given condition.
+    We parametrize a matrix by its first n-1 rows: the determinant is then a linear form c_1 x_1 + ... + c_n x_n in the last row x, whose coefficients c are the cofactors of the first n-1 rows.
+    First rows whose cofactors generate a proper ideal of Z/qZ can never give an invertible matrix and are skipped.
+    If c_n is a unit, we solve the linear form for x_n: for all x_1,...,x_{n-1} and every accepted determinant t we get x_n = c_n^(-1)(t - c_1 x_1 - ... - c_{n-1} x_{n-1}).
+    This produces exactly the accepted last rows. For the other first rows all q^n last rows are tested at once by a single integer matrix product.
+    For prime q only a fraction 1/q of the first rows is tested, so the work is O(q^(n^2-1)) plus the number of accepted matrices, e.g. for SL(n,q) instead of q^(n^2).
+
+    Arguments:
+    n: Positive integer.
+    q: Positive integer.
+    accept: Function that maps an integer array of determinants modulo q to a boolean array of the same shape. Only units modulo q may be accepted.
+    block_size: Rough upper bound for the number of last rows calculated at once.
+
+    Return:
+    Integer array of shape (N,n,n) with all accepted matrices, in lexicographic order of the corresponding tuples.
+    """
+
+    rows = np.array(list(itertools.product(range(q), repeat = n)), dtype=np.int64).reshape(-1,n)
+    # Every qth row ends with 0, so the first n-1 entries of these rows are all choices of x_1,...,x_{n-1} in lexicographic order.
+    free = rows[::q,:-1]
+    determinants = np.nonzero(accept(np.arange(q)))[0]
+    unit_inverses = np.array([pow(a, -1, q) if math.gcd(a, q) == 1 else 0 for a in range(q)], dtype=np.int64)
+    number_of_heads = q**(n*(n-1))
+    chunk = max(1, block_size//max(len(free)*len(determinants), 1))
+    blocks = []
+    for start in range(0, number_of_heads, chunk):
+        # We write the index of the first n-1 rows in base q**n to find the corresponding rows.
+        index = np.arange(start, min(start + chunk, number_of_heads), dtype=np.int64)
+        digits = np.zeros((len(index),n-1), dtype=np.int64)
+        for i in range(n-1):
+            digits[:,i] = (index//len(rows)**(n-2-i))%len(rows)
+        heads = rows[digits]
+        cofactors = np.stack([(-1)**(n-1+j)*determinants_mod(np.delete(heads, j, axis=2), q) for j in range(n)], axis=1)%q
+        unimodular = np.gcd.reduce(np.concatenate([cofactors, np.full((len(heads),1), q)], axis=1), axis=1) == 1
+        heads, cofactors = heads[unimodular], cofactors[unimodular]
+        solvable = np.gcd(cofactors[:,-1], q) == 1
+
+        # Solved last rows, sorted over the accepted determinants for every choice of x_1,...,x_{n-1}, so they are in lexicographic order.
+        coefficients = cofactors[solvable]
+        rest = matmul_mod(coefficients[:,:-1], free.T, q)
+        last = np.sort(mul_mod(unit_inverses[coefficients[:,-1]][:,None,None], (determinants[None,None,:] - rest[:,:,None])%q, q), axis=2)
+        solved = np.empty((len(coefficients), len(free), len(determinants), n, n), dtype=np.int64)
+        solved[...,:-1,:] = heads[solvable][:,None,None]
+        solved[...,-1,:-1] = free[None,:,None]
+        solved[...,-1,-1] = last
+
+        # Tested last rows.
+        head_index, row_index = np.nonzero(accept(matmul_mod(cofactors[~solvable], rows.T, q)))
+        tested = np.concatenate([heads[~solvable][head_index], rows[row_index][:,None,:]], axis=1)
+
+        # Both parts are sorted by first rows, a stable sort of the positions of the first rows merges them in lexicographic order.
+        positions = np.concatenate([np.repeat(np.nonzero(solvable)[0], len(free)*len(determinants)), np.nonzero(~solvable)[0][head_index]])
+        blocks.append(np.concatenate([solved.reshape(-1,n,n), tested])[np.argsort(positions, kind = "stable")])
+    if not blocks: return np.zeros((0,n,n), dtype=np.int64)
+    return np.concatenate(blocks)
 
+def matrix_operation(n, q):
+    """
+    Returns the multiplication of (n,n)-matrices over Z/qZ written as tuples of length n**2.
+    """
+
+    # For a single product, Python integers are faster than NumPy and cannot overflow.
+    def op(A,B): 
+        return tuple(sum(A[i*n+k]*B[k*n+j] for k in range(n))%q for i in range(n) for j in range(n))
+    return op
+
+def matrices_to_list(matrices):
+    """
+    Converts an integer array of shape (N,n,n) to a list of tuples of length n**2.
+    """
+    
+    return list(map(tuple, np.reshape(matrices, (len(matrices),-1)).tolist()))
+
+def matrices_to_tuples(matrices):
+    """
+    Converts an integer array of shape (N,n,n) to a set of tuples of length n**2.
+    """
+    
+    return set(matrices_to_list(matrices))
+
+def projective_normal_form(matrices, q, scalars):
+    """
+    Chooses a canonical representative of each matrix up to multiplication by the given scalars.
+    The representative is the lexicographically smallest scalar multiple of the matrix, where we compare the entries row by row.
+    In particular the identity matrix is always its own representative.
+    If q is prime and the scalars are all of (Z/qZ)^*, this is the multiple whose first nonzero entry is 1, which we calculate directly.
+    Otherwise we compare all scalar multiples, which is cheap for the few roots of unity used by PSL.
+
+    Arguments:
+    matrices: Integer array of shape (N,n,n).
+    q: Positive integer.
+    scalars: Collection of units of Z/qZ.
+
+    Return:
+    Integer array of shape (N,n,n) with the representatives.
+    """
+
+    flat = residues(np.reshape(matrices, (len(matrices),-1)), q)
+    rows = np.arange(len(flat))
+    scalars = sorted(set(scalars))
+    if len(scalars) == q-1 and all(q%k != 0 for k in range(2,int(np.sqrt(q))+1)):
+        inverses = np.array([0] + [pow(a,-1,q) for a in range(1,q)], dtype=np.int64)
+        leading = flat[rows, np.argmax(flat != 0, axis=1)]
+        return mul_mod(flat, inverses[leading][:,None], q).reshape(np.shape(matrices))
+    
+    best = flat
+    for l in scalars:
+        candidate = mul_mod(l, flat, q)
+        differ = candidate != best
+        first = np.argmax(differ, axis=1)
+        smaller = differ.any(axis=1) & (candidate[rows, first] < best[rows, first])
+        best = np.where(smaller[:,None], candidate, best)
+    return best.reshape(np.shape(matrices))
+
+def projective_representative(A, q, scalars):
+    """
+    Returns the same representative as projective_normal_form for a single matrix written as a tuple.
+    This avoids the overhead of NumPy when multiplying two elements of PGL or PSL.
+    """
+
+    scalars = list(scalars)
+    if len(scalars) == q-1 and all(q%k != 0 for k in range(2,int(np.sqrt(q))+1)):
+        inverse = pow(next(a for a in A if a%q != 0), -1, q)
+        return tuple((inverse*a)%q for a in A)
+    return min(tuple((l*a)%q for a in A) for l in scalars)
+
+class MatrixGroup(FiniteGroup):
+    """
+    This class implements groups of invertible (n,n)-matrices over Z/qZ, possibly modulo a group of scalars, as a subclass of FiniteGroup.
+    It is the common superclass of GL, SL, PGL and PSL.
+
+    Besides the set of tuples, the elements are stored as an integer array matrices of shape (N,n,n) in lexicographic order.
+    The id of an element is its position in this array, and we find the id of a matrix by binary search in the array keys, where we read a matrix as a number in base q.
+    This way the indexed mode of FiniteGroup works on whole arrays of matrices at once.
+
+    Initialization:
+    n: Positive integer.
+    q: Positive integer.
+    matrices: Integer array of shape (N,n,n) with the matrices of the group. 
+    scalars: The scalars we divide by. Every matrix is replaced by its representative from projective_normal_form.
+    canonical: Whether matrices are already sorted canonical representatives, e.g. the matrices of a group loaded from a cache.
+    """
+
+    def __init__(self, n, q, matrices, scalars = (1,), canonical = False):
+        """
+        Initialization of MatrixGroup.
 
-class GL(FiniteGroup):
+        Arguments:
+        n: Positive integer.
+        q: Positive integer.
+        matrices: Integer array of shape (N,n,n) with the matrices of the group. 
+        scalars: Collection of units of Z/qZ.
+        canonical: If True, matrices must be the distinct representatives of projective_normal_form in lexicographic order. 
+                   They are then used as they are, which also keeps a memory-mapped array memory-mapped.
+
+        Return:
+        The group of the given matrices as a FiniteGroup object.
+        """
+
+        self.n = n
+        self.q = q
+        self.scalars = sorted(set(scalars))
+        if not canonical:
+            matrices = np.asarray(matrices, dtype=np.int64).reshape(-1,n,n)%q
+            if self.scalars != [1]: 
+                matrices = projective_normal_form(matrices, q, self.scalars)
+
+        # If q**(n**2) does not fit into an int64, we fall back to the dictionary of FiniteGroup to find ids.
+        self.powers = q**np.arange(n*n-1,-1,-1, dtype=np.int64) if q**(n*n) < 2**63 else None
+        if canonical:
+            self.matrices = matrices
+            self.keys = None if self.powers is None else self.matrix_keys(matrices)
+        elif self.powers is not None:
+            self.keys, first = np.unique(self.matrix_keys(matrices), return_index=True)
+            self.matrices = matrices[first]
+        else:
+            self.keys = None
+            self.matrices = np.unique(matrices.reshape(len(matrices),-1), axis=0).reshape(-1,n,n)
+        
+        identity = tuple(np.identity(n,dtype = int).reshape(n**2).tolist())
+        mul = matrix_operation(n,q)
+        if self.scalars == [1]: op = mul
+        else:
+            def op(A,B): 
+                return projective_representative(mul(A,B), q, self.scalars)
+
+        super().__init__(None, identity, op)
+
+    @functools.cached_property
+    def elements(self):
+        """
+        Set of the elements as tuples of length n**2, which is only built when it is first used.
+        """
+
+        return matrices_to_tuples(self.matrices)
+
+    def matrix_keys(self, matrices):
+        """
+        Reads each matrix of an integer array of shape (N,n,n) as a number in base q.
+        """
+
+        return np.reshape(matrices, (len(matrices),-1)) @ self.powers
+
+    @functools.cached_property
+    def element_list(self):
+        return list(map(tuple, self.matrices.reshape(len(self.matrices),-1).tolist()))
+
+    def encode_matrices(self, matrices):
+        """
+        Returns the ids of an integer array of matrices of shape (...,n,n). Matrices that are not in the group get the id -1.
+        If we divide by scalars, any matrix of a class is sent to the id of its representative.
+        """
+
+        matrices = np.asarray(matrices, dtype=np.int64)
+        shape = matrices.shape[:-2]
+        matrices = matrices.reshape(-1,self.n,self.n)%self.q
+        if self.scalars != [1]: 
+            matrices = projective_normal_form(matrices, self.q, self.scalars)
+        if self.keys is None:
+            return FiniteGroup.encode(self, matrices_to_list(matrices)).reshape(shape)
+        keys = self.matrix_keys(matrices)
+        ids = np.minimum(np.searchsorted(self.keys, keys), len(self.keys)-1)
+        return np.where(self.keys[ids] == keys, ids, -1).reshape(shape)
+
+    def encode(self, elements):
+        elements = list(elements)
+        return self.encode_matrices(np.array(elements, dtype=np.int64).reshape(len(elements),self.n,self.n))
+
+    def mul(self, a, b):
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64))
+        if self.table is not None: return self.table[a,b].astype(np.int64)
+        return self.encode_matrices(matmul_mod(self.matrices[a], self.matrices[b], self.q))
+
+    @functools.cached_property
+    def inverse_ids(self):
+        # The inverses are calculated in closed form, the inverse of the class of a matrix is the class of its inverse.
+        return self.encode_matrices(inverses_mod(self.matrices, self.q))
+
+class GL(MatrixGroup):
     """
     This class implements the groups GL_n(Z/qZ) as a subclass of FiniteGroup.
 
@@ -116,35 +728,12 @@ class GL(FiniteGroup):
         The group GL_n(Z/qZ) as a FiniteGroup object.
         """
 
-        # We initalize the set of tuples coresponding to matrices of non-zero determinant.
+        # We initalize the set of tuples coresponding to matrices whose determinant is a unit modulo q.
         # A (n,n)-array corresponds to a tuple of length n**2 by writing the rows of the matrix behind each other. 
-        set_of_matrices = set()
-        set_of_tuples = set(itertools.product(range(0,q),repeat = n**2))
-        for t in set_of_tuples: 
-            A = np.reshape(t,(n,n))
-            if round(linalg.det(A))%q != 0:
-                set_of_matrices.add(t) 
-    
-        # To define the group operation, we reshape the tuples and apply np.matmul.
-        def op(A,B): 
-            A_matrix = np.reshape(A,(n,n))
-            B_matrix = np.reshape(B,(n,n))
-            C = np.matmul(A_matrix, B_matrix)%q
-            return tuple(C.reshape(n**2))
-
-        super().__init__(set_of_matrices, tuple(np.identity(n,dtype = int).reshape(n**2)), op)
-
-# We assert that we have implemented GL correctly.
-# For cardinality formulas of linear groups we refer to https://groupprops.subwiki.org/wiki/Order_formulas_for_linear_groups
-G = GL(2,3)
-assert G.is_group(), "GL is not a group."
-assert len(G.elements) == 48, "GL has the wrong cardinality."
-assert G.inverse((1,1,0,1)) == (1,2,0,1), "GL does not calculate inverses correctly."
-G = GL(3,2)
-assert G.is_group(), "GL is not a group."
-assert len(G.elements) == 168, "GL has the wrong cardinality."
-
-class SL(FiniteGroup):
+        super().__init__(n, q, enumerate_matrices(n, q, lambda det: np.gcd(det, q) == 1))
+
+
+class SL(MatrixGroup):
     """
     This class implements the groups SL_n(Z/qZ) as a subclass of FiniteGroup.
 
@@ -165,26 +754,11 @@ class SL(FiniteGroup):
         The group SL_n(Z/qZ) as an FiniteGroup object.
         """
 
-        # This class has the same initalization as GL(n,q), with the only difference to require the matrices to have determinant to be 1.
-        G = GL(n,q)
-        set_of_matrices = set()
-        for t in G.elements: 
-            A = np.reshape(t,(n,n))
-            if round(linalg.det(A))%q == 1:
-                set_of_matrices.add(t) 
-
-        super().__init__(set_of_matrices, G.identity, G.operation)
+        # We enumerate the matrices of determinant 1 directly, without building GL(n,q) first.
+        super().__init__(n, q, enumerate_matrices(n, q, lambda det: det == 1%q))
 
-# We assert that we have implemented SL correctly.
-# For cardinality formulas of linear groups we refer to https://groupprops.subwiki.org/wiki/Order_formulas_for_linear_groups
-G = SL(2,3)
-assert G.is_group(), "GL is not a group."
-assert len(G.elements) == 24, "GL has the wrong cardinality."
-G = SL(3,2)
-assert G.is_group(), "SL is not a group."
-assert len(G.elements) == 168, "SL has the wrong cardinality."
 
-class PGL(FiniteGroup):
+class PGL(MatrixGroup):
     """
     This class implements the groups PGL_n(Z/qZ) as a subclass of FiniteGroup.
     For a definition of PGL_n(Z/qZ) we refer to https://en.wikipedia.org/wiki/Projective_linear_group.
@@ -206,37 +780,11 @@ class PGL(FiniteGroup):
         The group PGL_n(Z/qZ) as a FiniteGroup object.
         """
         
-        # We start with the initialization of GL(n,q) and endow the latter group with an equivalence relation.
-        G = GL(n,q)
-        def is_equivalent(A,B):
-            "Checks if two matrices in GL(n,q) are equivalent in PGL(n,q)."
-            for l in range(1,q):
-                if tuple([(l*a)%q for a in A]) == B: return True
-            return False
-        
-        # For each element of the resulting equivalence classes, we choose one element as a representative.
-        # We implement the resulting projection mapping from GL(n,q) to PGL(n,q) as a dictionary.
-        # To make sure that the identity matrix is chosen as the representative of its equivalence class we initialize the dicitionary as follows.
-        projection = {G.identity: G.identity}
-        for A in G.elements:
-            for B in set(projection.values()):
-                if is_equivalent(A,B):
-                    projection[A] = B
-            projection.setdefault(A,A)
-        
-        def op(A,B): 
-            return projection[G.operation(A,B)]
-
-        super().__init__(set(projection.values()),G.identity,op) 
+        # We enumerate GL(n,q) and send each matrix to the canonical representative of its class modulo scalars.
+        # The projection is applied to the whole array of matrices at once, so the quotient costs a constant amount of work per element.
+        units = [l for l in range(1,q) if math.gcd(l,q) == 1]
+        super().__init__(n, q, enumerate_matrices(n, q, lambda det: np.gcd(det, q) == 1), units)
 
-# We assert that we have implemented PGL correctly.
-# For cardinality formulas of linear groups we refer to https://groupprops.subwiki.org/wiki/Order_formulas_for_linear_groups
-G = PGL(2,3)
-assert G.is_group(), "GL is not a group."
-assert len(G.elements) == 24, "GL has the wrong cardinality."
-G = PGL(3,2)
-assert G.is_group(), "SL is not a group."
-assert len(G.elements) == 168, "SL has the wrong cardinality."
 
 # PSL_n(Z/qZ) is also implemented. To do so, we need to find the nth roots of unity of Z/qZ.
 def roots_of_unity(n,q):
@@ -257,7 +805,7 @@ def roots_of_unity(n,q):
             roots.add(k)
     return roots
 
-class PSL(FiniteGroup):
+class PSL(MatrixGroup):
     """
     This class implements the groups PSL_n(Z/qZ) as a subclass of FiniteGroup.
     For a definition of PSL_n(Z/qZ) we refer to https://en.wikipedia.org/wiki/Projective_linear_group.
@@ -279,32 +827,198 @@ class PSL(FiniteGroup):
         The group PSL_n(Z/qZ) as a FiniteGroup object.
         """
 
-        # We use the same implementation as PGL(n,q), with the only difference of starting with SL(n,q) and using a different equivalence relation.
-        G = SL(n,q)
-        roots = roots_of_unity(n,q)
-        def is_equivalent(A,B):
-            "Checks if two matrices in SL(n,q) are equivalent in PSL(n,q)."
-            for l in roots:
-                if tuple([(l*a)%q for a in A]) == B: return True
-            return False
-
-        projection = {G.identity: G.identity}
-        for A in G.elements:
-            for B in set(projection.values()):
-                if is_equivalent(A,B):
-                    projection[A] = B
-            projection.setdefault(A,A)
-        
-        def op(A,B): 
-            return projection[G.operation(A,B)]
-
-        super().__init__(set(projection.values()),G.identity,op)   
-
-# We assert that we have implemented PSL correctly.
-# For cardinality formulas of linear groups we refer to https://groupprops.subwiki.org/wiki/Order_formulas_for_linear_groups
-G = PSL(2,3)
-assert G.is_group(), "GL is not a group."
-assert len(G.elements) == 12, "GL has the wrong cardinality."
-G = PSL(3,2)
-assert G.is_group(), "SL is not a group."
-assert len(G.elements) == 168, "SL has the wrong cardinality."
\ No newline at end of file
+        # We use the same implementation as PGL(n,q), with the only difference of starting with SL(n,q) and only dividing by the nth roots of unity.
+        super().__init__(n, q, enumerate_matrices(n, q, lambda det: det == 1%q), roots_of_unity(n,q))
+
+
+def is_odd_prime(q):
+    return q > 2 and all(q%k != 0 for k in range(2,math.isqrt(q)+1))
+
+def units_inverses(q):
+    """
+    Returns the array of inverses of 0,1,...,q-1 modulo a prime q, where 0 is sent to 0. 
+    We use Fermat's little theorem a**(q-2) = a**(-1) on the whole array at once.
+    """
+
+    base = np.arange(q, dtype=np.int64)
+    inverses = np.ones(q, dtype=np.int64)
+    exponent = q - 2
+    while exponent > 0:
+        if exponent%2 == 1: inverses = inverses*base%q
+        base = base*base%q
+        exponent //= 2
+    return inverses
+
+class ImplicitProjectiveGroup(FiniteGroup):
+    """
+    This class implements PGL(2,q) and PSL(2,q) for an odd prime q without enumerating the elements.
+    MatrixGroup stores all matrices, which is not possible for large q since the groups have about q**3 elements.
+    Here the id of an element is calculated in closed form from its canonical representative (rank), and the representative from the id (unrank).
+    Products, inverses and ids of arrays of elements then only need memory proportional to the arrays.
+
+    Canonical representatives (a,b,c,d) of the matrices [[a,b],[c,d]]:
+    PGL: The first nonzero entry is 1. With a = 1 we count the pairs (b,c) and the q-1 values d != b*c, with a = 0 we have b = 1, c != 0 and d arbitrary.
+    PSL: The determinant is 1 and the first nonzero entry lies in 1,...,(q-1)/2. With a != 0 the entry d = (1 + b*c)/a is determined by (a,b,c), with a = 0 we have c = -1/b and d arbitrary.
+
+    Initialization:
+    q: Odd prime.
+    special: False for PGL(2,q), True for PSL(2,q).
+    """
+
+    def __init__(self, q, special = False):
+        """
+        Initialization of ImplicitProjectiveGroup.
+
+        Arguments:
+        q: Odd prime.
+        special: False for PGL(2,q), True for PSL(2,q).
+
+        Return:
+        The group PGL(2,q) or PSL(2,q) as a FiniteGroup object, whose elements are tuples (a,b,c,d) of canonical representatives.
+        """
+
+        if not is_odd_prime(q): raise ValueError(f"q = {q} is not an odd prime.")
+        self.n = 2
+        self.q = q
+        self.special = special
+        self.half = (q-1)//2
+        # All entries and ids fit into the faster int32 if q**3 < 2**31, which is the case for all groups whose spectrum we can calculate.
+        self.dtype = np.int32 if q**3 < 2**31 else np.int64
+        self.inverses = units_inverses(q).astype(self.dtype)
+        if special:
+            # Some square root of every square, and -1 for the non-squares.
+            self.roots = np.full(q, -1, dtype=self.dtype)
+            self.roots[np.arange(q, dtype=np.int64)**2%q] = np.arange(q)
+        super().__init__(None, (1,0,0,1), lambda A, B: self.decode(self.encode_matrices(np.matmul(np.reshape(A,(2,2)), np.reshape(B,(2,2)))[None]))[0])
+
+    @property
+    def order(self):
+        q = self.q
+        return q*(q*q - 1)//2 if self.special else q*(q*q - 1)
+
+    @functools.cached_property
+    def elements(self):
+        return set(self.element_list)
+
+    @functools.cached_property
+    def element_list(self):
+        return self.decode(np.arange(self.order))
+
+    def canonical(self, matrices):
+        """
+        Returns the canonical representatives of an integer array of matrices of shape (N,2,2) as an array of shape (N,4), and a boolean array of which matrices lie in the group.
+        """
+
+        a, b, c, d = (np.asarray(matrices).reshape(-1,4)%self.q).astype(self.dtype).T
+        a, b, c, d, valid = self.canonical_entries(a, b, c, d)
+        return np.stack([a, b, c, d], axis=1), valid
+
+    def canonical_entries(self, a, b, c, d):
+        """
+        Same as canonical, for the arrays of entries a, b, c, d in 0,...,q-1 of the matrices [[a,b],[c,d]].
+        """
+
+        q = self.q
+        det = (a*d - b*c)%q
+        valid = det != 0
+        if self.special:
+            # We scale by a square root of 1/det, such that the determinant becomes 1.
+            scale = self.roots[self.inverses[det]]
+            valid &= scale >= 0
+            # For invertible matrices, b != 0 if a = 0. We flip the sign if the first nonzero entry is larger than (q-1)/2.
+            scale = np.where(np.where(a != 0, a, b)*scale%q > self.half, q - scale, scale)
+        else:
+            scale = self.inverses[np.where(a != 0, a, b)]
+        return a*scale%q, b*scale%q, c*scale%q, d*scale%q, valid
+
+    def rank(self, flat):
+        """
+        Returns the ids of canonical representatives, given as an integer array of shape (N,4).
+        """
+
+        return self.rank_entries(*np.asarray(flat, dtype=self.dtype).T)
+
+    def rank_entries(self, a, b, c, d):
+        q = self.q
+        if self.special:
+            return np.where(a != 0, ((a-1)*q + b)*q + c, self.half*q*q + (b-1)*q + d)
+        return np.where(a != 0, (b*q + c)*(q-1) + (d - b*c%q - 1)%q, q*q*(q-1) + (c-1)*q + d)
+
+    def unrank(self, ids):
+        """
+        Returns the canonical representatives of the elements with the given ids as an integer array of shape (...,2,2).
+        """
+
+        q = self.q
+        ids = np.asarray(ids).astype(self.dtype)
+        if self.special:
+            first = ids < self.half*q*q
+            # The elements with a != 0, and then the elements (0,b,-1/b,d).
+            a, rest = np.divmod(ids, q*q)
+            b, c = np.divmod(rest, q)
+            a += 1
+            d = (1 + b*c%q)%q*self.inverses[np.where(first, a, 1)]%q
+            b2, d2 = np.divmod(ids - self.half*q*q, q)
+            b2 += 1
+            flat = [np.where(first, a, 0), np.where(first, b, b2), np.where(first, c, q - self.inverses[np.where(first, 1, b2)]), np.where(first, d, d2)]
+        else:
+            first = ids < q*q*(q-1)
+            # The elements (1,b,c,d) with d != b*c, and then the elements (0,1,c,d) with c != 0.
+            bc, r = np.divmod(ids, q-1)
+            b, c = np.divmod(bc, q)
+            c2, d2 = np.divmod(ids - q*q*(q-1), q)
+            flat = [first.astype(self.dtype), np.where(first, b, 1), np.where(first, c, c2 + 1), np.where(first, (r + 1 + b*c%q)%q, d2)]
+        return np.stack(flat, axis=-1).astype(self.dtype).reshape(ids.shape + (2,2))
+
+    def encode_matrices(self, matrices):
+        """
+        Returns the ids of an integer array of matrices of shape (...,2,2). Matrices that do not represent an element of the group get the id -1.
+        """
+
+        matrices = np.asarray(matrices, dtype=np.int64)
+        shape = matrices.shape[:-2]
+        flat, valid = self.canonical(matrices.reshape(-1,2,2))
+        return np.where(valid, self.rank(flat), -1).astype(np.int64).reshape(shape)
+
+    def encode(self, elements):
+        elements = list(elements)
+        return self.encode_matrices(np.array(elements, dtype=np.int64).reshape(len(elements),2,2))
+
+    def decode(self, ids):
+        return matrices_to_list(self.unrank(np.ravel(ids)))
+
+    def mul(self, a, b):
+        # We unrank a and b before broadcasting them, so a column of generators times a row of vertices only unranks each once.
+        a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+        if self.table is not None: return self.table[a,b].astype(np.int64)
+        A, B = self.unrank(a), self.unrank(b)
+        q = self.q
+        entries = [(A[...,i,0]*B[...,0,j] + A[...,i,1]*B[...,1,j])%q for i in range(2) for j in range(2)]
+        *entries, valid = self.canonical_entries(*entries)
+        return np.where(valid, self.rank_entries(*entries), -1).astype(np.int64)
+
+    def invert(self, ids):
+        # The inverse of the class of [[a,b],[c,d]] is the class of its adjugate [[d,-b],[-c,a]].
+        ids = np.asarray(ids, dtype=np.int64)
+        a, b, c, d = self.unrank(ids).reshape(-1,4).T
+        return self.encode_matrices(np.stack([d, -b, -c, a], axis=1).reshape(-1,2,2)).reshape(ids.shape)
+
+    @functools.cached_property
+    def inverse_ids(self):
+        return self.invert(np.arange(self.order))
+
+class ImplicitPGL(ImplicitProjectiveGroup):
+    """
+    PGL(2,q) for an odd prime q without enumerating the elements, see ImplicitProjectiveGroup.
+    """
+
+    def __init__(self, q):
+        super().__init__(q, special = False)
+
+class ImplicitPSL(ImplicitProjectiveGroup):
+    """
+    PSL(2,q) for an odd prime q without enumerating the elements, see ImplicitProjectiveGroup.
+    """
+
+    def __init__(self, q):
+        super().__init__(q, special = True)
@@ -0,0 +1,203 @@
+"""
+In this script we run Monte Carlo experiments on random regular graphs.
+
+The sample budget is split into chunks of fixed size. Every chunk gets its own random stream from numpy.random.SeedSequence.spawn and is processed by a worker of a process pool.
+Since the chunks and their streams only depend on the seed and the chunk size, the results are the same for any number of workers.
+For long runs, run_streaming only keeps RunningStatistics of the samples and can checkpoint them to disk and resume from the checkpoint.
+"""
+
+import concurrent.futures
+import os
+import numpy as np
+import randomgraphs as rg
+
+#The quantities that are calculated for every sampled graph.
+QUANTITIES = ("diameter", "adjacency_spectral_gap", "adjacency_star", "laplacian_spectral_gap", "girth", "girth_ratio", "mean_injectivity_radius")
+
+def sample_invariants(n, d, size, seed, model = "permutation"):
+    """
+    Samples random simple graphs and calculates their graph theoretic quantities.
+
+    Input:
+    n: Number of vertices.
+    d: Number of permutations, the graphs are 2d-regular.
+    size: Number of graphs.
+    seed: Seed or numpy.random.SeedSequence of the random stream.
+    model: Sampling model, see randomgraphs.random_regular_neighbours.
+
+    Return:
+    Dictionary with an array of length size for each of the QUANTITIES. The diameter of a disconnected graph is inf.
+    """
+    A = rg.random_simple_adjacency_matrices(n, d, size, model = model, rng = np.random.default_rng(seed))
+    results = {key: np.empty(size) for key in QUANTITIES}
+    summary = rg.spectral_summary(A)
+    for key in ("adjacency_spectral_gap", "adjacency_star", "laplacian_spectral_gap"):
+        results[key][:] = summary[key]
+    for i in range(size):
+        results["diameter"][i] = rg.diameter(A[i]) if summary["is_connected"][i] else np.inf
+        results["girth"][i] = rg.girth(A[i])
+        results["mean_injectivity_radius"][i] = rg.mean_injectivity_radius(A[i])
+    results["girth_ratio"][:] = results["girth"]*np.log(2*d-1)/np.log(n)
+    return results
+
+def chunks(m, chunk_size):
+    """
+    Returns the list of (start, stop) of the chunks of a sample budget m.
+    """
+    return [(start, min(start + chunk_size, m)) for start in range(0, m, chunk_size)]
+
+def chunk_results(n, d, bounds, seeds, model, workers):
+    """
+    Yields the results of sample_invariants for the chunks in the given order, computed by a pool of workers processes.
+    """
+    sizes = [stop - start for start, stop in bounds]
+    if workers is None: workers = os.cpu_count() or 1
+    if workers == 1 or len(bounds) <= 1:
+        for size, s in zip(sizes, seeds):
+            yield sample_invariants(n, d, size, s, model)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+        yield from pool.map(sample_invariants, [n]*len(sizes), [d]*len(sizes), sizes, seeds, [model]*len(sizes))
+
+def run(n, d, m, seed = None, workers = None, chunk_size = 1000, model = "permutation"):
+    """
+    Samples m random simple 2d-regular graphs on n vertices and calculates their graph theoretic quantities.
+
+    Input:
+    n, d, model: As in sample_invariants.
+    m: Number of graphs.
+    seed: Seed of the root numpy.random.SeedSequence. For a fixed seed and chunk_size the results do not depend on workers.
+    workers: Number of processes. With workers = 1 everything runs in the current process, with None we use all cores.
+    chunk_size: Number of graphs that a worker samples at once.
+
+    Return:
+    Dictionary with an array of length m for each of the QUANTITIES.
+    """
+    bounds = chunks(m, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(bounds))
+    results = {key: np.empty(m) for key in QUANTITIES}
+    for (start, stop), chunk in zip(bounds, chunk_results(n, d, bounds, seeds, model, workers)):
+        for key in QUANTITIES: results[key][start:stop] = chunk[key]
+    return results
+
+class RunningStatistics:
+    """
+    Streaming statistics of samples of the QUANTITIES, so that the samples themselves need not be kept in memory.
+    For every quantity we keep the number of finite samples, their mean and sum of squared deviations (Welford's method, merged batchwise), their minimum and maximum and the number of infinite samples.
+    Optionally we count samples in histograms with fixed bin edges; samples outside the edges are not counted in the histogram.
+    """
+    def __init__(self, quantities = QUANTITIES, histograms = None):
+        """
+        Input:
+        quantities: Names of the quantities.
+        histograms: Dictionary of bin edges for the quantities that should be counted in a histogram.
+        """
+        self.quantities = tuple(quantities)
+        k = len(self.quantities)
+        self.count = np.zeros(k, dtype = np.int64)
+        self.infinite = np.zeros(k, dtype = np.int64)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+        self.edges = {key: np.asarray(edges, dtype = float) for key, edges in (histograms or {}).items()}
+        self.histograms = {key: np.zeros(len(edges) - 1, dtype = np.int64) for key, edges in self.edges.items()}
+
+    def update(self, results):
+        """
+        Adds a batch of samples, given as a dictionary with an array for each quantity.
+        """
+        for i, key in enumerate(self.quantities):
+            values = np.asarray(results[key], dtype = float)
+            finite = values[np.isfinite(values)]
+            self.infinite[i] += len(values) - len(finite)
+            if key in self.histograms:
+                self.histograms[key] += np.histogram(finite, bins = self.edges[key])[0]
+            if len(finite) == 0: continue
+            count = self.count[i] + len(finite)
+            mean = finite.mean()
+            delta = mean - self.mean[i]
+            self.m2[i] += ((finite - mean)**2).sum() + delta**2*self.count[i]*len(finite)/count
+            self.mean[i] += delta*len(finite)/count
+            self.count[i] = count
+            self.min[i] = min(self.min[i], finite.min())
+            self.max[i] = max(self.max[i], finite.max())
+
+    def summary(self):
+        """
+        Returns a dictionary with the mean, standard deviation, minimum, maximum and the number of infinite samples for every quantity.
+        """
+        std = np.sqrt(self.m2/np.maximum(self.count, 1))
+        return {key: {"mean": self.mean[i], "std": std[i], "min": self.min[i], "max": self.max[i], "infinite": int(self.infinite[i])}
+                for i, key in enumerate(self.quantities)}
+
+    def save(self, path, **metadata):
+        """
+        Writes the statistics and additional metadata to a .npz file. The file is replaced atomically, so an interrupted write keeps the previous checkpoint.
+        """
+        arrays = {"quantities": np.array(self.quantities), "count": self.count, "infinite": self.infinite,
+                  "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+        for key in self.histograms:
+            arrays["edges_" + key] = self.edges[key]
+            arrays["histogram_" + key] = self.histograms[key]
+        for key, value in metadata.items():
+            arrays["meta_" + key] = np.asarray(value)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads statistics written by save.
+
+        Return:
+        The statistics and the dictionary of metadata.
+        """
+        with np.load(path) as data:
+            names = list(data.keys())
+            stats = cls([str(q) for q in data["quantities"]], {key[6:]: data[key] for key in names if key.startswith("edges_")})
+            for attribute in ("count", "infinite", "mean", "m2", "min", "max"):
+                setattr(stats, attribute, data[attribute].copy())
+            for key in stats.histograms:
+                stats.histograms[key] = data["histogram_" + key].copy()
+            metadata = {key[5:]: data[key][()] for key in names if key.startswith("meta_")}
+        return stats, metadata
+
+def run_streaming(n, d, m, seed = None, workers = None, chunk_size = 1000, model = "permutation", histograms = None, checkpoint = None, checkpoint_every = 10):
+    """
+    Samples m random simple 2d-regular graphs on n vertices as in run, but only keeps streaming statistics of the graph theoretic quantities.
+    The chunks are added in order, so the statistics do not depend on workers.
+
+    Input:
+    n, d, m, seed, workers, chunk_size, model: As in run.
+    histograms: Bin edges as in RunningStatistics. By default girth, diameter and mean injectivity radius are counted in unit bins from 0 to n.
+    checkpoint: Path of a checkpoint file. If it exists, the run is resumed from it, otherwise it is created. 
+                A resumed run continues the random stream of the checkpoint, so a seed other than None must be the seed of the checkpoint.
+    checkpoint_every: Number of chunks between two checkpoints.
+
+    Return:
+    RunningStatistics of all m samples.
+    """
+    if histograms is None:
+        histograms = {key: np.arange(n + 2) for key in ("girth", "diameter", "mean_injectivity_radius")}
+    parameters = {"n": n, "d": d, "m": m, "chunk_size": chunk_size, "model": model}
+    done = 0
+    if checkpoint is not None and os.path.exists(checkpoint):
+        stats, metadata = RunningStatistics.load(checkpoint)
+        for key, value in parameters.items():
+            if metadata[key] != value: raise ValueError(f"The checkpoint was written with {key} = {metadata[key]}, not {value}.")
+        entropy, done = int(metadata["entropy"]), int(metadata["done"])
+        if seed is not None and np.random.SeedSequence(seed).entropy != entropy: raise ValueError(f"The checkpoint was written with a different seed than {seed}.")
+    else:
+        stats = RunningStatistics(QUANTITIES, histograms)
+        entropy = np.random.SeedSequence(seed).entropy
+
+    bounds = chunks(m, chunk_size)
+    seeds = np.random.SeedSequence(entropy).spawn(len(bounds))
+    for chunk in chunk_results(n, d, bounds[done:], seeds[done:], model, workers):
+        stats.update(chunk)
+        done += 1
+        if checkpoint is not None and (done % checkpoint_every == 0 or done == len(bounds)):
+            stats.save(checkpoint, entropy = str(entropy), done = done, **parameters)
+    return stats
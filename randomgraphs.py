@@ -1,9 +1,11 @@
 """
 In this script we construct random graphs, with the hope of establishing Ramanujan graphs.
+Many graphs can be sampled at once with random_regular_neighbours, and spectral_summary calculates the spectral quantities of a whole stack of adjacency matrices at once.
 """
 import numpy as np
 from numpy import linalg
-import networkx as nx
+from scipy import sparse
+import cayleygraphs as cg
 
 def random_permutation_matrix(n):
     """
@@ -18,8 +20,7 @@ def random_permutation_matrix(n):
     
     perm = np.random.permutation(n)
     A = np.zeros((n,n), dtype=int)
-    for k in range(0,n):
-        A[k,perm[k]] = 1
+    A[np.arange(n),perm] = 1
     return A
 
 def random_adjacency_matrix(n,d):
@@ -53,50 +54,180 @@ def is_simple(A):
     return A.max()==1
 
 
-def random_simple_adjacency_matrix(n,d):
+def random_simple_adjacency_matrix(n,d,rng = None):
     """
     Returns a random adjacecy matrix corresponding to a graph with n vertices and degree 2*d.
+    We add d random permutations one after another and redraw a permutation whenever it would create a loop or a multiple edge, see random_regular_neighbours.
     
     Input: 
     n: positive integer.
     d: positive integer.
-
+    rng: numpy.random.Generator or seed for numpy.random.default_rng. With None the graph depends on the global NumPy random state, see random_regular_neighbours.
 
     Return: 
-    Random adjacency matrix corresponding to a graph with n vertices and degree d.
+    Random adjacency matrix corresponding to a graph with n vertices and degree 2*d.
     """
 
-    A = np.zeros((n,n), dtype=int)
-    count = 0
-    while count < d:
-        R = random_permutation_matrix(n)
-        A_new = A + R + R.T
-        if is_simple(A_new):
-            A = A_new
-            count += 1
-    return A 
+    return neighbours_to_adjacency(random_regular_neighbours(n,d,1,rng = rng))[0]
+
+# To sample many graphs at once, we describe a 2d-regular graph on n vertices by its (n,2d)-array of neighbours.
+# A batch of B graphs is then a (B,n,2d)-array, on which we can check simplicity with array operations.
+
+def is_simple_neighbours(neighbours):
+    """
+    Returns for each graph of a batch whether it is simple, i.e. has no loops and no multiple edges.
+
+    Input:
+    neighbours: (B,n,2d) integer array of neighbour lists.
+
+    Return:
+    Boolean array of length B.
+    """
+    n = neighbours.shape[1]
+    loops = (neighbours == np.arange(n)[None,:,None]).any(axis=(1,2))
+    ordered = np.sort(neighbours, axis=2)
+    multiple_edges = (ordered[:,:,1:] == ordered[:,:,:-1]).any(axis=(1,2))
+    return ~loops & ~multiple_edges
+
+def random_regular_neighbours(n,d,size,model = "permutation",rng = None):
+    """
+    Returns the neighbour lists of a batch of random simple graphs with n vertices and degree 2*d.
+
+    We support two models:
+    permutation:   As in random_simple_adjacency_matrix, we add d random permutations and their inverses one after another. 
+                   We draw the kth permutation for all graphs at once and only redraw it for the graphs in which it would create a loop or a multiple edge.
+    configuration: We match the 2*d*n half-edges uniformly at random, and redraw the whole matching for the graphs that are not simple.
+                   This gives the uniform distribution on simple 2d-regular graphs, but only a fraction of about exp(-((2d)**2-1)/4) of the matchings is simple.
+
+    Input:
+    n: positive integer.
+    d: positive integer.
+    size: number of graphs.
+    model: "permutation" or "configuration".
+    rng: numpy.random.Generator or seed for numpy.random.default_rng. The same seed gives the same graphs. 
+         With None the seed is drawn from the global NumPy random state, so np.random.seed makes the graphs reproducible as for random_adjacency_matrix.
+
+    Return:
+    (size,n,2*d) integer array, whose entry (b,v) lists the neighbours of the vertex v in the bth graph.
+    """
+
+    if rng is None: rng = np.random.randint(2**32, size = 4)
+    rng = np.random.default_rng(rng)
+    vertices = np.arange(n)
+    neighbours = np.empty((size,n,2*d), dtype=np.int64)
+
+    if model == "permutation":
+        # Only a small fraction of the permutations is admissible, so we draw several candidates per graph and keep the first admissible one.
+        tries = 8
+        for k in range(d):
+            pending = np.arange(size)
+            while len(pending) > 0:
+                perms = rng.random((len(pending),tries,n)).argsort(axis=2)
+                inverses = np.argsort(perms, axis=2)
+                # A fixed point is a loop, and a 2-cycle or an existing edge would be a multiple edge.
+                existing = neighbours[pending,:,:2*k][:,None,:,:]
+                bad = (perms == vertices) | (perms == inverses) | (existing == perms[:,:,:,None]).any(axis=3)
+                admissible = ~bad.any(axis=2)
+                good = admissible.any(axis=1)
+                first = np.argmax(admissible, axis=1)[good]
+                neighbours[pending[good],:,2*k] = perms[good, first]
+                neighbours[pending[good],:,2*k+1] = inverses[good, first]
+                pending = pending[~good]
+
+    elif model == "configuration":
+        half_edges = np.repeat(vertices, 2*d)
+        pending = np.arange(size)
+        while len(pending) > 0:
+            matching = rng.permuted(np.tile(half_edges, (len(pending),1)), axis=1).reshape(len(pending),-1,2)
+            starts = np.concatenate([matching[:,:,0], matching[:,:,1]], axis=1)
+            ends = np.concatenate([matching[:,:,1], matching[:,:,0]], axis=1)
+            # Every vertex is the start of exactly 2*d edges, so sorting by the start gives the neighbour lists.
+            order = np.argsort(starts, axis=1, kind="stable")
+            candidates = np.take_along_axis(ends, order, axis=1).reshape(len(pending),n,2*d)
+            good = is_simple_neighbours(candidates)
+            neighbours[pending[good]] = candidates[good]
+            pending = pending[~good]
+
+    else: raise ValueError(f"Unknown model {model}, use 'permutation' or 'configuration'.")
+    return neighbours
+
+def neighbours_to_adjacency(neighbours):
+    """
+    Converts a (B,n,2d)-array of neighbour lists into the (B,n,n)-array of adjacency matrices.
+    """
+    size, n, degree = neighbours.shape
+    A = np.zeros((size,n,n), dtype=int)
+    np.add.at(A, (np.arange(size)[:,None,None], np.arange(n)[None,:,None], neighbours), 1)
+    return A
+
+def random_simple_adjacency_matrices(n,d,size,model = "permutation",rng = None):
+    """
+    Returns a (size,n,n)-array of adjacency matrices of random simple graphs with n vertices and degree 2*d, see random_regular_neighbours.
+    """
+    return neighbours_to_adjacency(random_regular_neighbours(n,d,size,model = model,rng = rng))
 
 def sorted_eigenvalues(A):
     deg =  A[:,1].sum()
     evals = np.round(np.sort(linalg.eigvalsh(A))[::-1],6) 
     return evals/deg 
 
+def extremal_sorted_eigenvalues(A):
+    """
+    Returns the two largest and the two smallest eigenvalues of a large adjacency matrix, rounded and normalized as in sorted_eigenvalues.
+    We use cayleygraphs.extremal_eigenvalues, which also determines the multiplicities of the degree and minus the degree from the connected components.
+    """
+    deg = A[:,1].sum()
+    return np.round(cg.extremal_eigenvalues(sparse.csr_matrix(A)),6)/deg
+
+def spectral_summary(A):
+    """
+    Calculates the spectral quantities of a stack of adjacency matrices with a single batched call of numpy.linalg.eigvalsh.
+    For graphs with more than cayleygraphs.DENSE_LIMIT vertices we only calculate the extremal eigenvalues of each graph, see extremal_sorted_eigenvalues.
+
+    Input:
+    A: (B,n,n) array of adjacency matrices of regular graphs.
+
+    Return:
+    Dictionary of arrays of length B with the keys
+    eigenvalues: (B,4) array with the two largest and the two smallest normalized eigenvalues in descending order.
+    is_connected, is_bipartite: Booleans as in is_connected and is_bipartite, where a disconnected graph counts as not bipartite.
+    adjacency_spectral_gap, adjacency_star, laplacian_spectral_gap: As the functions of the same name.
+    """
+    A = np.asarray(A)
+    if A.shape[1] > cg.DENSE_LIMIT:
+        evals = np.array([extremal_sorted_eigenvalues(M) for M in A])
+    else:
+        deg = A[:,:,1].sum(axis=1)
+        evals = np.round(linalg.eigvalsh(A)[:,::-1],6)/deg[:,None]
+        evals = evals[:,[0,1,-2,-1]]
+
+    connected = evals[:,1] < 1
+    bipartite = connected & (evals[:,-1] == -1)
+    gap = 1 - np.maximum(np.abs(evals[:,1]), np.abs(evals[:,-1]))
+    # For a disconnected graph the second eigenvalue is 1, so both formulas for adjacency_star give 0.
+    star = np.where(bipartite | ~connected, 1 - np.maximum(np.abs(evals[:,1]), np.abs(evals[:,-2])), gap)
+    return {"eigenvalues": evals,
+            "is_connected": connected,
+            "is_bipartite": bipartite,
+            "adjacency_spectral_gap": gap,
+            "adjacency_star": star,
+            "laplacian_spectral_gap": 1 - evals[:,1]}
+
 def is_connected(A):
     """
     Returns whether or not the Cayley graph is connected.
     We use the condition that a graph is connected if and only if the second largest eigenvalue of the adjacency matrix is strictly less than 1.
     """
-    if sorted_eigenvalues(A)[1] < 1: return True
-    return False
+    return bool(spectral_summary(A[None])["is_connected"][0])
 
 def is_bipartite(A):
     """
     Returns whether or not a connected Cayley graph is bipartite.
     We use the spectral condition that a connected graph is bipatite if and only if -1 is an eigenvalue of the graph.
     """
-    if is_connected(A) == False: return "Graph not connected."
-    if sorted_eigenvalues(A)[-1] == -1: return True
-    return False
+    summary = spectral_summary(A[None])
+    if summary["is_connected"][0] == False: return "Graph not connected."
+    return bool(summary["is_bipartite"][0])
 
 def diameter(A):
     diameter = 1
@@ -110,30 +241,71 @@ def adjacency_spectral_gap(A):
     """
     Returns the strong spectral gap of the normalized adjacency matrix of a connected graph. 
     """
-    return 1 - max(abs(sorted_eigenvalues(A)[1]),abs(sorted_eigenvalues(A)[-1]))
+    return spectral_summary(A[None])["adjacency_spectral_gap"][0]
 
 def adjacency_star(A):
     """
     Returns the spectral gap of the normalized adjacency matrix of a connected graph. 
     This is the distance to one of the largest modulus that is not one.  
     """
-    if is_bipartite(A): 
-            return 1 - max(abs(sorted_eigenvalues(A)[1]),abs(sorted_eigenvalues(A)[-2]))
-    else: return adjacency_spectral_gap(A)
+    return spectral_summary(A[None])["adjacency_star"][0]
 
 def laplacian_spectral_gap(A):
     """
     Returns the first eigenvalue of the normalized Laplacian. 
     We note that the spectrum of the normalized Laplacian is simply the 1 - (spectrum of the normalized adjacency matrix).
     """
-    return (1 - sorted_eigenvalues(A)[1])
+    return spectral_summary(A[None])["laplacian_spectral_gap"][0]
+
+def shortest_cycles_through(A, stop_at_best = False, batch_size = 256):
+    """
+    Calculates for each vertex v the length of the first cycle found by a breadth first search from v.
+    This is at most the length of a shortest cycle through v and at least the girth, so the minimum over all vertices is the girth.
+    We run the searches from a batch of vertices at once, where the spheres are the rows of a 0-1-matrix S and S @ A counts the edges from the spheres to each vertex.
+    When we handle the sphere of radius r, an edge inside the sphere closes a cycle of length 2r+1 and a vertex of the next sphere with two edges to the sphere closes a cycle of length 2r+2.
+    Hence a search stops as soon as it has found a cycle. A self-loop is a cycle of length 1 and a multiple edge a cycle of length 2.
+
+    Input:
+    A: (n,n) adjacency matrix.
+    stop_at_best: If True, all searches stop once they cannot find a cycle shorter than the shortest cycle found so far. Then only the minimum of the output, the girth, is meaningful.
+    batch_size: Number of searches that run at once.
+
+    Return:
+    Array of length n with the cycle lengths, where np.inf means that no cycle was found.
+    """
+    A = np.asarray(A, dtype=float)
+    n = A.shape[0]
+    lengths = np.full(n, np.inf)
+    best = np.inf
+    for start in range(0, n, batch_size):
+        sources = np.arange(start, min(start + batch_size, n))
+        sphere = np.zeros((len(sources), n))
+        sphere[np.arange(len(sources)), sources] = 1
+        visited = sphere > 0
+        found = lengths[sources]
+        r = 0
+        while sphere.any() and (not stop_at_best or best > 2*r + 1):
+            counts = sphere @ A
+            new = (counts > 0) & ~visited
+            inside = ((counts > 0) & (sphere > 0)).any(axis=1)
+            double = ((counts > 1) & new).any(axis=1)
+            found = np.where(np.isinf(found) & inside, 2*r + 1, found)
+            found = np.where(np.isinf(found) & double, 2*r + 2, found)
+            best = min(best, found.min())
+
+            # Searches that found a cycle are finished and get an empty sphere.
+            sphere = np.where(np.isinf(found)[:,None] & new, 1.0, 0.0)
+            visited |= new
+            r += 1
+        lengths[sources] = found
+    return lengths
 
 def girth(A):
     """
-    Returns girth (length of shortest cycle) of the graph associated to A.
+    Returns girth (length of shortest cycle) of the graph associated to A, or np.inf for a forest.
+    We run breadth first searches from all vertices in batches and stop as soon as no shorter cycle can be found, see shortest_cycles_through.
     """
-    gph = nx.from_numpy_array(A)
-    return min(len(cycle) for cycle in nx.cycle_basis(gph))
+    return shortest_cycles_through(A, stop_at_best = True).min()
 
 def size_of_sphere(d,r):
     """
@@ -143,19 +315,23 @@ def size_of_sphere(d,r):
     else: return d*((d-1)**(r-1))
 
 def injectivity_radius(A):
-    n = A.shape[0]
-    d = A[:,1].sum()
-    output = np.zeros((n,2),int) - 1
-    B = A
-    r = 1
-    while output.min() == -1:
-        for i in range(0,n):
-            if output[i,1] == -1 and list(B[i,:]).count(1) < size_of_sphere(d,r):
-                output[i,0] = r-1
-                output[i,1] = 0
-        r += 1
-        B = np.matmul(B,A)
-    return output[:,0]
+    """
+    Returns the injectivity radius of every vertex of the graph associated to A.
+    The injectivity radius of v is the largest r such that the ball of radius r around v looks like a ball in a tree, i.e. distinct non-backtracking walks of length at most r from v end at distinct vertices.
+    The first collision of such walks is exactly the first cycle found by a breadth first search from v, so we read the radius off shortest_cycles_through:
+    a cycle of length 2r+1 or 2r+2 found while handling the sphere of radius r gives the injectivity radius r.
+
+    Input: 
+    A: (n,n) adjacency matrix.
+
+    Return: 
+    Integer array of length n (with np.inf for vertices in a tree component).
+    """
+    radii = (shortest_cycles_through(A) - 1)//2
+    return radii.astype(int) if np.isfinite(radii).all() else radii
 
 def mean_injectivity_radius(A):
+    """
+    Returns the mean injectivity radius over all vertices, from one batched pass of breadth first searches.
+    """
     return np.mean(injectivity_radius(A))
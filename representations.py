@@ -0,0 +1,253 @@
+"""
+In this script we calculate the full spectrum of Cayley graphs with the representation theory of the group.
+
+The adjacency matrix A of the Cayley graph of G with respect to a symmetric set T acts on functions on G by (Af)(g) = sum_{s in T} f(s*g).
+It commutes with the right translations of G, so it decomposes along the irreducible representations rho of G:
+The spectrum of A is the union of the spectra of the (dim rho x dim rho)-matrices rho(T) = sum_{s in T} rho(s), where every eigenvalue of rho(T) is repeated dim rho times.
+This replaces one eigendecomposition of a |G| x |G| matrix by many small ones.
+
+Supported groups:
+CyclicGroup: The irreducible representations are the characters, so the spectrum is the discrete Fourier transform of the indicator function of T, which costs O(n log n).
+SL(2,q) and PSL(2,q) for an odd prime q, including groups.ImplicitPSL: The irreducible representations of SL(2,q) are constructed in two families.
+    principal series: For a character chi of F_q^*, the functions f on F_q^2 - {0} with f(t*v) = chi(t) f(v), on which g acts by f(v) -> f(v*g). They have dimension q+1.
+        For chi = 1 this is the sum of the trivial and the Steinberg representation, for the quadratic character it is the sum of two irreducible representations of dimension (q+1)/2.
+    discrete series: For a character theta of the group C of elements of norm 1 in F_{q^2}, the functions f on F_{q^2} - {0} with f(c*x) = theta(c) f(x) in the Weil representation of the norm form. They have dimension q-1.
+        For the quadratic character theta this is the sum of two irreducible representations of dimension (q-1)/2. The character theta = 1 is not needed.
+    Apart from these exceptions chi and chi^(-1) (theta and theta^(-1)) give the same irreducible representation, so every block is counted with half its dimension.
+    The irreducible representations of PSL(2,q) are those of SL(2,q) on which -I acts trivially, which are the characters chi and theta with chi(-1) = theta(-1) = 1.
+    All blocks of one family are calculated at once as a stack of matrices, which costs about q^4 operations instead of q^9 for the dense adjacency matrix.
+
+Main functions:
+supports: Whether the spectrum of Cayley graphs of a group can be calculated here.
+spectrum: Eigenvalues and their multiplicities.
+eigenvalues: All eigenvalues in descending order, which are the eigenvalues of the dense adjacency matrix.
+"""
+
+import numpy as np
+import groups as gp
+
+def supports(group):
+    """
+    Returns whether the spectrum of the Cayley graphs of the group can be calculated by spectrum.
+    """
+
+    if isinstance(group, gp.CyclicGroup): return True
+    if type(group) in (gp.SL, gp.PSL): return group.n == 2 and gp.is_odd_prime(group.q)
+    return isinstance(group, gp.ImplicitProjectiveGroup) and group.special
+
+def prime_factors(n):
+    factors = []
+    p = 2
+    while p*p <= n:
+        if n%p == 0: factors.append(p)
+        while n%p == 0: n //= p
+        p += 1
+    if n > 1: factors.append(n)
+    return factors
+
+def discrete_logarithms(q):
+    """
+    Returns an array whose entry t is the discrete logarithm of t to the base of the smallest primitive root modulo the prime q (and 0 for t = 0).
+    """
+
+    factors = prime_factors(q - 1)
+    root = next(g for g in range(1,q) if all(pow(g, (q-1)//p, q) != 1 for p in factors))
+    logarithms = np.zeros(q, dtype=np.int64)
+    t = 1
+    for k in range(q - 1):
+        logarithms[t] = k
+        t = t*root%q
+    return logarithms
+
+def cyclic_spectrum(n, generators):
+    """
+    Returns the eigenvalues sum_{s in T} exp(2 pi i j s/n) of the Cayley graph of Z/nZ with respect to the symmetric set T, ordered by the character j.
+    """
+
+    indicator = np.zeros(n)
+    indicator[generators] = 1
+    return np.fft.fft(indicator).real
+
+def principal_series_blocks(q, matrices):
+    """
+    Returns the stack of the matrices rho_chi(T) of the principal series for the characters chi_j(g^k) = exp(2 pi i jk/(q-1)), j = 0,...,q-2, of F_q^*.
+    A basis are the functions supported on the multiples of the points v_i = (x,1) and (1,0) of the projective line.
+    If v_i*s = t*v_k, then (rho(s)f)(v_i) = f(v_i*s) = chi(t) f(v_k), so rho(s) has a single entry chi(t) in each row.
+
+    Arguments:
+    q: Odd prime.
+    matrices: Array of shape (|T|,2,2) of the matrices of the symmetric set T with determinant 1.
+
+    Return:
+    Complex array of shape (q-1,q+1,q+1).
+    """
+
+    inverses = gp.units_inverses(q)
+    logarithms = discrete_logarithms(q)
+    points = np.array([(x,1) for x in range(q)] + [(1,0)], dtype=np.int64)
+    characters = np.arange(q - 1)
+    blocks = np.zeros((q - 1, q + 1, q + 1), dtype=complex)
+    for s in matrices:
+        images = points@np.asarray(s, dtype=np.int64)%q
+        x, y = images[:,0], images[:,1]
+        scalars = np.where(y != 0, y, x)
+        columns = np.where(y != 0, x*inverses[y]%q, q)
+        blocks[:, np.arange(q + 1), columns] += np.exp(2j*np.pi*np.outer(characters, logarithms[scalars])/(q - 1))
+    return blocks
+
+class QuadraticExtension:
+    """
+    The field F_{q^2} = F_q(sqrt(eps)) for a non-square eps, whose elements x0 + x1*sqrt(eps) are stored as integer arrays of shape (...,2).
+
+    Attributes:
+    elements: The q^2 - 1 nonzero elements.
+    norms: Their norms x0^2 - eps*x1^2.
+    representatives: Array whose entry u is an element of norm u, for u = 1,...,q-1.
+    positions: For every nonzero element x the exponent k with x = c^k * representatives[N(x)], where c generates the group C of elements of norm 1.
+    """
+
+    def __init__(self, q):
+        self.q = q
+        self.eps = next(e for e in range(2,q) if pow(e, (q-1)//2, q) == q - 1)
+        self.inverses = gp.units_inverses(q)
+        grid = np.arange(q*q)
+        self.elements = np.stack([grid//q, grid%q], axis = -1)[1:]
+        self.norms = self.norm(self.elements)
+        self.representatives = np.zeros((q,2), dtype=np.int64)
+        self.representatives[self.norms] = self.elements
+
+        # A generator of the cyclic group C of order q+1.
+        unit_circle = self.elements[self.norms == 1]
+        factors = prime_factors(q + 1)
+        generator = next(c for c in unit_circle if all(tuple(self.power(c, (q+1)//p)) != (1,0) for p in factors))
+        self.exponents = np.full(q*q, -1, dtype=np.int64)
+        c = np.array([1,0])
+        for k in range(q + 1):
+            self.exponents[self.key(c)] = k
+            c = self.mul(c, generator)
+        self.positions = self.exponents[self.key(self.to_circle(self.elements))]
+
+    def key(self, x):
+        return x[...,0]*self.q + x[...,1]
+
+    def mul(self, x, y):
+        q, eps = self.q, self.eps
+        return np.stack([(x[...,0]*y[...,0] + eps*x[...,1]*y[...,1])%q, (x[...,0]*y[...,1] + x[...,1]*y[...,0])%q], axis = -1)
+
+    def norm(self, x):
+        return (x[...,0]**2 - self.eps*x[...,1]**2)%self.q
+
+    def power(self, x, exponent):
+        result = np.array([1,0])
+        while exponent > 0:
+            if exponent%2 == 1: result = self.mul(result, x)
+            x = self.mul(x, x)
+            exponent //= 2
+        return result
+
+    def to_circle(self, x):
+        """
+        Returns x/representatives[N(x)], which has norm 1.
+        """
+
+        norms = self.norm(x)
+        representatives = self.representatives[norms]
+        conjugates = np.stack([representatives[...,0], -representatives[...,1]%self.q], axis = -1)
+        return self.mul(x, conjugates)*self.inverses[norms][...,None]%self.q
+
+def discrete_series_blocks(q, matrices):
+    """
+    Returns the stack of the matrices omega_theta(T) of the discrete series for the characters theta_j(c^k) = exp(2 pi i jk/(q+1)), j = 0,...,q, of C.
+    A basis are the functions supported on C*x_u for the representatives x_u of norm u = 1,...,q-1.
+    The Weil representation of the norm form N on functions on F_{q^2} is given on generators of SL(2,q) by
+    omega([[1,b],[0,1]]) f(x) = psi(b N(x)) f(x),
+    omega([[a,0],[0,1/a]]) f(x) = f(a x),
+    omega([[0,1],[-1,0]]) f(x) = -1/q sum_y psi(tr(x conj(y))) f(y),
+    where psi(t) = exp(2 pi i t/q). A general matrix with c != 0 is [[1,a/c],[0,1]] [[-1/c,0],[0,-c]] [[0,1],[-1,0]] [[1,d/c],[0,1]].
+    The matrices of the Weyl element for all theta at once are a discrete Fourier transform over C.
+
+    Arguments:
+    q: Odd prime.
+    matrices: Array of shape (|T|,2,2) of the matrices of the symmetric set T with determinant 1.
+
+    Return:
+    Complex array of shape (q+1,q-1,q-1).
+    """
+
+    field = QuadraticExtension(q)
+    x = field.representatives[1:]
+    y = field.elements
+    traces = 2*(x[:,None,0]*y[None,:,0] - field.eps*x[:,None,1]*y[None,:,1])%q
+    kernel = np.zeros((q - 1, q - 1, q + 1), dtype=complex)
+    kernel[:, field.norms - 1, field.positions] = np.exp(2j*np.pi*traces/q)
+    weyl = np.moveaxis(-(q + 1)/q*np.fft.ifft(kernel, axis = 2), 2, 0)
+
+    u = np.arange(1,q)
+    characters = np.arange(q + 1)
+    def psi(b): return np.exp(2j*np.pi*(b*u%q)/q)
+    def torus(a):
+        # omega([[a,0],[0,1/a]]) maps the basis function of a*x_u = c^k x_{a^2 u} to theta(c^k) times the one of x_u.
+        images = x*a%q
+        return a*a*u%q - 1, np.exp(2j*np.pi*np.outer(characters, field.positions[field.key(images) - 1])/(q + 1))
+
+    blocks = np.zeros((q + 1, q - 1, q - 1), dtype=complex)
+    for s in matrices:
+        (a,b), (c,d) = np.asarray(s, dtype=np.int64).tolist()
+        if c == 0:
+            columns, phases = torus(a)
+            blocks[:, u - 1, columns] += phases*psi(b*int(field.inverses[a]))[columns]
+        else:
+            inverse = int(field.inverses[c])
+            rows, phases = torus(-inverse%q)
+            blocks += psi(a*inverse)[None,:,None]*phases[:,:,None]*weyl[:, rows, :]*psi(d*inverse)[None,None,:]
+    return blocks
+
+def sl2_spectrum(q, matrices, projective = False):
+    """
+    Returns the eigenvalues and multiplicities of the Cayley graph of SL(2,q), or of PSL(2,q) if projective is True.
+
+    Arguments:
+    q: Odd prime.
+    matrices: Array of shape (|T|,2,2) of the matrices of the symmetric set T with determinant 1. For PSL(2,q) any representative of each element can be used.
+    projective: Whether the group is PSL(2,q).
+    """
+
+    # Principal series. The largest eigenvalue of the block of chi = 1 is the one of the trivial representation, the others belong to the Steinberg representation.
+    principal = np.linalg.eigvalsh(principal_series_blocks(q, matrices))
+    characters = np.arange(1, q - 1)
+    if projective: characters = characters[characters%2 == 0]
+    values = [principal[0], principal[characters].ravel()]
+    multiplicities = [np.r_[np.full(q, q), 1], np.full(len(characters)*(q + 1), (q + 1)//2)]
+
+    # Discrete series. The character theta_j(-1) = (-1)^j is the action of -I.
+    discrete = discrete_series_blocks(q, matrices)
+    characters = np.arange(1, q + 1)
+    if projective: characters = characters[characters%2 == 0]
+    values.append(np.linalg.eigvalsh(discrete[characters]).ravel())
+    multiplicities.append(np.full(len(characters)*(q - 1), (q - 1)//2))
+    return np.concatenate(values), np.concatenate(multiplicities)
+
+def spectrum(group, generators):
+    """
+    Returns the spectrum of the Cayley graph of the group with respect to the elements with the ids generators, see cayleygraphs.CayleyGraph.
+    As in the adjacency matrix, the set is made symmetric and elements that occur several times are counted once.
+
+    Return:
+    Arrays of eigenvalues and of their multiplicities, which add up to the order of the group. The eigenvalues are not sorted and can occur several times.
+    """
+
+    if not supports(group): raise ValueError(f"The spectrum of Cayley graphs of {type(group).__name__} cannot be calculated with representations.")
+    generators = np.asarray(generators, dtype=np.int64)
+    generators = np.unique(np.concatenate([generators, group.invert(generators)]))
+    if isinstance(group, gp.CyclicGroup):
+        return cyclic_spectrum(group.n, generators), np.ones(group.n, dtype=np.int64)
+    matrices = group.unrank(generators) if isinstance(group, gp.ImplicitProjectiveGroup) else np.asarray(group.matrices)[generators]
+    return sl2_spectrum(group.q, matrices, projective = not isinstance(group, gp.SL))
+
+def eigenvalues(group, generators):
+    """
+    Returns all eigenvalues of the adjacency matrix of the Cayley graph in descending order.
+    """
+
+    values, multiplicities = spectrum(group, generators)
+    return np.sort(np.repeat(values, multiplicities))[::-1]
@@ -0,0 +1,61 @@
+"""
+In this script we implement a store of calculated graph invariants in a local SQLite database.
+
+The invariants of a graph are stored under a fingerprint, which is a hash of a canonical description of the graph, e.g. the group parameters and the sorted generating set, together with ALGORITHM_VERSION.
+A rerun of an experiment then only calculates the invariants that are not in the store yet, see sweeps.sweep.
+Values are stored as JSON, so integers, floats (including inf) and strings such as "Not connected." can be stored.
+"""
+
+import hashlib
+import json
+import sqlite3
+import numpy as np
+
+#Increase this number when the calculation of an invariant changes, so that results of the old calculation are no longer used.
+ALGORITHM_VERSION = 1
+
+def fingerprint(description):
+    """
+    Returns the fingerprint of the description of a graph, which is a dictionary of JSON-serializable values.
+    """
+    canonical = json.dumps(dict(description, version = ALGORITHM_VERSION), sort_keys = True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def to_json(value):
+    if isinstance(value, np.generic): value = value.item()
+    return json.dumps(value)
+
+class ResultStore:
+    """
+    Invariants of graphs in an SQLite database with one row per (fingerprint, invariant).
+
+    Initialization:
+    path: Path of the database file, which is created if necessary. ":memory:" gives a store that is not written to disk.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS invariants (fingerprint TEXT, name TEXT, value TEXT, PRIMARY KEY (fingerprint, name))")
+
+    def get(self, key, names = None):
+        """
+        Returns the dictionary of stored invariants of the fingerprint key, optionally restricted to the given names.
+        """
+        rows = self.connection.execute("SELECT name, value FROM invariants WHERE fingerprint = ?", (key,)).fetchall()
+        values = {name: json.loads(value) for name, value in rows}
+        if names is None: return values
+        return {name: values[name] for name in names if name in values}
+
+    def put(self, key, values):
+        """
+        Stores a dictionary of invariants of the fingerprint key, replacing stored values of the same names.
+        """
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO invariants VALUES (?, ?, ?)", [(key, name, to_json(value)) for name, value in values.items()])
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(DISTINCT fingerprint) FROM invariants").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,210 @@
+"""
+In this script we sweep graph theoretic invariants over the parameters of a family of graphs.
+
+A family is built from one parameter point, e.g. the Cayley graph of SL(2,k) for a given generating set, the LPS graph of (p,q) or a random regular graph.
+Every parameter point is a task of a process pool. The largest graphs are scheduled first, so that one large graph at the end does not keep a single worker busy while the others are idle.
+The result is a Table with one row per parameter point, which the experiment scripts render as rows of a LaTeX table.
+With a resultstore.ResultStore, invariants that have been calculated in an earlier run are taken from the store.
+
+It contains the following families:
+SL2: Cayley graph of SL(2,k) with a generating set, the parameter point is (k,).
+LPS: LPS graph of two primes, the parameter point is (p,q).
+random: Random simple 2d-regular graph on n vertices, the parameter point is (n,d).
+"""
+
+import concurrent.futures
+import os
+import numpy as np
+import groups as gp
+import cayleygraphs as cg
+import randomgraphs as rg
+import resultstore
+import LPS
+
+#The invariants that the experiment scripts show by default.
+DEFAULT_INVARIANTS = ("order", "diameter", "adjacency_spectral_gap", "laplacian_spectral_gap", "girth", "girth_ratio", "injectivity_radius")
+
+def prime_factors(n):
+    """
+    Returns the set of prime factors of n.
+    """
+    factors = set()
+    p = 2
+    while p*p <= n:
+        while n%p == 0:
+            factors.add(p)
+            n //= p
+        p += 1
+    if n > 1: factors.add(n)
+    return factors
+
+def sl2_graph(k, generators, cache = None):
+    """
+    Returns the Cayley graph of SL(2,k). The generators are either a list of tuples or a function of k returning such a list.
+    With a graphcache.GraphCache, the group and the graph are taken from the cache if possible.
+    """
+    if callable(generators): generators = generators(k)
+    if cache is not None: return cache.cayley_graph("SL", 2, k, generators)
+    return cg.CayleyGraph(gp.SL(2,k), generators)
+
+def sl2_description(k, generators, cache = None):
+    """
+    Returns the description of the Cayley graph of SL(2,k), with the generators reduced mod k and sorted.
+    """
+    if callable(generators): generators = generators(k)
+    return {"group": "SL", "n": 2, "q": k, "generators": sorted({tuple(int(x)%k for x in g) for g in generators})}
+
+def sl2_size(k, **options):
+    """
+    Returns the order k^3 prod_{p|k} (1 - 1/p^2) of SL(2,k).
+    """
+    order = k**3
+    for p in prime_factors(k): order = order//(p*p)*(p*p - 1)
+    return order
+
+def lps_graph(p, q, cache = None):
+    return LPS.LPS(p,q,cache = cache)
+
+def lps_description(p, q, cache = None):
+    return {"graph": "LPS", "p": p, "q": q}
+
+def lps_size(p, q, **options):
+    """
+    Returns the order of PSL(2,q) or PGL(2,q), depending on whether or not p is a quadratic residue mod q.
+    """
+    return q*(q*q - 1)//2 if LPS.is_quadratic_residue(p,q) else q*(q*q - 1)
+
+def random_graph(n, d, seed = None):
+    """
+    Returns the adjacency matrix of a random simple 2d-regular graph on n vertices. With a seed the graph only depends on (seed, n, d).
+    """
+    rng = np.random.default_rng(None if seed is None else [seed, n, d])
+    return rg.random_simple_adjacency_matrix(n, d, rng = rng)
+
+def random_description(n, d, seed = None):
+    """
+    Returns the description of the random graph, or None without a seed, since the graph is then not reproducible.
+    """
+    if seed is None: return None
+    return {"graph": "random", "n": n, "d": d, "seed": seed}
+
+def random_size(n, d, seed = None):
+    return n*d
+
+def girth_ratio(girth, degree, order):
+    return girth*np.log(degree - 1)/np.log(order)
+
+CAYLEY_INVARIANTS = {
+    "order": lambda Cay: Cay.order,
+    "degree": lambda Cay: Cay.degree,
+    "diameter": cg.diameter,
+    "adjacency_spectral_gap": cg.adjacency_spectral_gap,
+    "adjacency_star": cg.adjacency_star,
+    "laplacian_spectral_gap": cg.laplacian_spectral_gap,
+    "girth": cg.girth,
+    "girth_ratio": lambda Cay: girth_ratio(cg.girth(Cay), Cay.degree, Cay.order),
+    "injectivity_radius": cg.injectivity_radius,
+}
+
+RANDOM_INVARIANTS = {
+    "order": lambda A: A.shape[0],
+    "degree": lambda A: int(A[0].sum()),
+    "diameter": lambda A: rg.diameter(A) if rg.is_connected(A) else np.inf,
+    "adjacency_spectral_gap": rg.adjacency_spectral_gap,
+    "adjacency_star": rg.adjacency_star,
+    "laplacian_spectral_gap": rg.laplacian_spectral_gap,
+    "girth": rg.girth,
+    "girth_ratio": lambda A: girth_ratio(rg.girth(A), A[0].sum(), A.shape[0]),
+    "injectivity_radius": rg.mean_injectivity_radius,
+}
+
+#For every family the function that builds the graph, the function that estimates its size, the invariants and the function that describes the graph for the result store.
+FAMILIES = {
+    "SL2": (sl2_graph, sl2_size, CAYLEY_INVARIANTS, sl2_description),
+    "LPS": (lps_graph, lps_size, CAYLEY_INVARIANTS, lps_description),
+    "random": (random_graph, random_size, RANDOM_INVARIANTS, random_description),
+}
+
+class Table:
+    """
+    Result of a sweep.
+
+    columns: Names of the columns, the first column is the parameter point.
+    rows: List of rows, one for each parameter point in the order of the sweep.
+    """
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.rows = list(rows)
+
+    def column(self, name):
+        """
+        Returns the values of the column with the given name.
+        """
+        i = self.columns.index(name)
+        return [row[i] for row in self.rows]
+
+    def to_latex(self, digits = 3):
+        """
+        Returns the rows as rows of a LaTeX table, with floats rounded to the given number of digits.
+        """
+        def entry(value):
+            if isinstance(value, (float, np.floating)): return str(round(value, digits))
+            return str(value)
+        return "\n".join(" & ".join(entry(value) for value in row) + " \\\\" for row in self.rows)
+
+def evaluate(family, point, invariants, options):
+    """
+    Builds the graph of the family at the parameter point and calculates the invariants.
+    """
+    graph_of, size_of, functions, description_of = FAMILIES[family]
+    graph = graph_of(*point, **options)
+    return [functions[name](graph) for name in invariants]
+
+def sweep(family, points, invariants = DEFAULT_INVARIANTS, workers = None, store = None, **options):
+    """
+    Calculates invariants of a family of graphs for a list of parameter points.
+
+    Input:
+    family: Name of the family in FAMILIES.
+    points: List of parameter points, e.g. [(k,) for k in range(3,35)] for SL2.
+    invariants: Names of the invariants, see CAYLEY_INVARIANTS and RANDOM_INVARIANTS.
+    workers: Number of processes. With workers = 1 everything runs in the current process, with None we use all cores.
+    store: Optional resultstore.ResultStore. Invariants that are in the store are not calculated again, and new invariants are added to the store as soon as they are calculated.
+    options: Further keyword arguments of the family, e.g. generators for SL2, seed for random and a graphcache.GraphCache as cache for SL2 and LPS.
+
+    Return:
+    Table with a row (point, invariants...) for each point.
+    """
+    graph_of, size_of, functions, description_of = FAMILIES[family]
+    for name in invariants:
+        if name not in functions: raise ValueError(f"Unknown invariant {name} for the family {family}.")
+    points = [tuple(point) for point in points]
+
+    #We look up the invariants that have been calculated before.
+    keys = [None]*len(points)
+    values = [{} for point in points]
+    if store is not None:
+        for i, point in enumerate(points):
+            description = description_of(*point, **options)
+            if description is None: continue
+            keys[i] = resultstore.fingerprint(dict(description, family = family))
+            values[i] = store.get(keys[i], invariants)
+    missing = [[name for name in invariants if name not in values[i]] for i in range(len(points))]
+
+    def finish(i, calculated):
+        values[i].update(zip(missing[i], calculated))
+        if keys[i] is not None: store.put(keys[i], dict(zip(missing[i], calculated)))
+
+    #Largest graphs first.
+    order = sorted([i for i in range(len(points)) if missing[i]], key = lambda i: -size_of(*points[i], **options))
+    if workers is None: workers = os.cpu_count() or 1
+    if workers == 1 or len(order) <= 1:
+        for i in order: finish(i, evaluate(family, points[i], missing[i], options))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+            futures = {pool.submit(evaluate, family, points[i], missing[i], options): i for i in order}
+            for future in concurrent.futures.as_completed(futures):
+                finish(futures[future], future.result())
+
+    labels = [point[0] if len(point) == 1 else point for point in points]
+    return Table(["point"] + list(invariants), [[label] + [values[i][name] for name in invariants] for i, label in enumerate(labels)])
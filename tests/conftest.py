@@ -0,0 +1,6 @@
+"""
+The modules of this repository live in the parent directory. As in the experiment scripts, we add it to the system path.
+"""
+
+import os,sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
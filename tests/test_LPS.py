@@ -0,0 +1,81 @@
+import itertools
+import math
+
+import pytest
+
+import cayleygraphs as cg
+import LPS
+import sweeps as sw
+
+def test_is_prime():
+    primes = [n for n in range(2000) if n > 1 and all(n%k != 0 for k in range(2, math.isqrt(n) + 1))]
+    assert [n for n in range(2000) if LPS.is_prime(n)] == primes
+    # Strong pseudoprimes to several bases and large primes.
+    assert not LPS.is_prime(3215031751) and not LPS.is_prime(3825123056546413051)
+    assert LPS.is_prime(2**61 - 1) and LPS.is_prime(2**89 - 1)
+
+@pytest.mark.parametrize("m", [2, 5, 8, 12, 13, 29, 45])
+def test_is_quadratic_residue(m):
+    residues = {x*x%m for x in range(1,m) if math.gcd(x,m) == 1}
+    assert [LPS.is_quadratic_residue(p,m) for p in range(-m, 2*m)] == [p%m in residues for p in range(-m, 2*m)]
+
+@pytest.mark.parametrize("q", [5, 13, 17, 41, 97, 113, 257])
+def test_square_root_mod(q):
+    for a in range(q):
+        roots = [x for x in range(q) if x*x%q == a]
+        if roots: assert LPS.square_root_mod(a,q) == roots[0]
+        else:
+            with pytest.raises(ValueError): LPS.square_root_mod(a,q)
+
+def reference_sum_of_four_squares(p):
+    bound = math.isqrt(p) + 1
+    return [t for t in itertools.product(range(-bound, bound + 1), repeat = 4)
+            if t[0] > 0 and t[0]%2 == 1 and t[1]%2 == 0 and t[2]%2 == 0 and t[3]%2 == 0 and sum(x*x for x in t) == p]
+
+@pytest.mark.parametrize("p", [1, 5, 9, 13, 17, 21, 29, 37, 3, 7])
+def test_sum_of_four_squares(p):
+    assert LPS.sum_of_four_squares(p) == reference_sum_of_four_squares(p)
+
+def test_sum_of_four_squares_large():
+    # Jacobi's four square theorem gives p + 1 solutions for primes p = 1 mod 4.
+    for p in [1009, 4993, 10009]:
+        solutions = LPS.sum_of_four_squares(p)
+        assert len(solutions) == len(set(solutions)) == p + 1
+        assert all(sum(x*x for x in t) == p for t in solutions)
+
+@pytest.mark.parametrize("p,q", [(5,13), (13,5), (5,29), (13,17)])
+def test_lps(p,q):
+    Cay = LPS.LPS(p,q)
+    assert Cay.degree == p + 1
+    assert Cay.group.order == (q*(q*q - 1)//2 if LPS.is_quadratic_residue(p,q) else q*(q*q - 1))
+    assert cg.is_connected(Cay)
+
+@pytest.mark.parametrize("p,q", [(5,13), (13,5), (13,17)])
+def test_implicit_lps(p,q):
+    Cay = LPS.LPS(p,q)
+    implicit = LPS.LPS(p,q,implicit = True)
+    assert implicit.implicit and implicit.degree == Cay.degree and implicit.group.order == Cay.group.order
+    assert implicit.eigenvalues == pytest.approx(Cay.eigenvalues, abs = 1e-7)
+
+@pytest.mark.parametrize("p,q", [(5,13), (13,5), (13,17)])
+def test_lps_schreier_graph(p,q):
+    special, set = LPS.lps_set(p,q)
+    assert special == LPS.is_quadratic_residue(p,q) and len(set) == p + 1
+    Sch = LPS.lps_schreier_graph(p,q,spectrum = "full")
+    assert Sch.adjacency.shape == (q + 1, q + 1) and Sch.degree == p + 1
+    # The spectrum of the Schreier graph is part of the spectrum of the LPS graph.
+    Cay = cg.CayleyGraph(LPS.LPS(p,q).group, set, spectrum = "full")
+    assert all(min(abs(e - f) for f in Cay.eigenvalues) < 1e-7 for e in Sch.eigenvalues)
+
+def test_lps_schreier_graph_invariants():
+    Sch = LPS.lps_schreier_graph(5,13)
+    values = {name: f(Sch) for name, f in sw.CAYLEY_INVARIANTS.items()}
+    assert values["order"] == 14 and values["degree"] == 6
+    assert values["girth_ratio"] == pytest.approx(values["girth"]*math.log(5)/math.log(14))
+    assert cg.distance_profile(Sch).diameter <= values["diameter"]
+
+def test_lps_schreier_graph_large():
+    # The graph on the projective line of q = 10009 has 10010 vertices, the LPS graph has about 10^12.
+    Sch = LPS.lps_schreier_graph(5,10009)
+    assert Sch.degree == 6 and cg.is_connected(Sch)
+    assert max(abs(Sch.eigenvalues[1]), abs(Sch.eigenvalues[-1])) <= 2*math.sqrt(5)/6 + 1e-6
@@ -0,0 +1,260 @@
+"""
+Tests for the cayleygraphs module.
+"""
+
+import networkx as nx
+import numpy as np
+import pytest
+import groups as gp
+import cayleygraphs as cg
+import randomgraphs as rg
+from scipy.sparse.csgraph import connected_components
+
+
+def reference_graph(group, set):
+    """
+    The Cayley graph built edge by edge as a networkx graph, which is how the module used to construct it.
+    """
+    graph = nx.Graph()
+    graph.add_nodes_from(group.elements)
+    for g in group.elements:
+        for s in set:
+            graph.add_edge(g, group.operation(s,g))
+    return graph
+
+CASES = [
+    (gp.CyclicGroup, (10,), [1, 3]),
+    (gp.CyclicGroup, (7,), [0, 2]),
+    (gp.SL, (2,5), [(1,1,0,1), (1,0,1,1)]),
+    (gp.SL, (2,7), [(1,2,0,1), (1,0,2,1), (2,0,0,4)]),
+    (gp.PSL, (2,5), [(4,0,0,4), (1,1,0,1)]),
+]
+
+@pytest.mark.parametrize("group,args,set", CASES)
+def test_adjacency_matches_networkx_construction(group, args, set):
+    G = group(*args)
+    Cay = cg.CayleyGraph(G, set)
+    reference = nx.to_numpy_array(reference_graph(G, set), nodelist = G.element_list)
+    assert (Cay.adjacency.toarray() == reference).all()
+    assert nx.utils.graphs_equal(Cay.graph, reference_graph(G, set))
+
+def test_set_outside_group():
+    with pytest.raises(ValueError):
+        cg.CayleyGraph(gp.SL(2,5), [(1,1,1,1)])
+
+SPECTRAL_FUNCTIONS = [cg.is_connected, cg.is_bipartite, cg.adjacency_spectral_gap, cg.adjacency_star, cg.laplacian_spectral_gap]
+
+@pytest.mark.parametrize("group,args,set", CASES + [
+    (gp.SL, (2,11), [(1,1,0,1), (1,0,1,1)]),
+    (gp.SL, (2,11), [(1,1,0,1)]),
+    (gp.PGL, (2,11), [(1,1,0,1), (0,1,1,0)]),
+])
+def test_extremal_spectrum_matches_full_spectrum(group, args, set):
+    G = group(*args)
+    extremal = cg.CayleyGraph(G, set)
+    full = cg.CayleyGraph(G, set, spectrum = "full")
+    assert extremal.degree == full.degree
+    for f in SPECTRAL_FUNCTIONS:
+        assert f(extremal) == pytest.approx(f(full), abs = 1e-7)
+
+def test_invariants_are_lazy_and_cached():
+    Cay = cg.CayleyGraph(gp.SL(2,5), [(1,1,0,1), (1,0,1,1)])
+    assert Cay.cached_invariants() == []
+    cg.adjacency_star(Cay)
+    assert Cay.cached_invariants() == ["eigenvalues", "degree", "connected", "bipartite"]
+    eigenvalues = Cay.eigenvalues
+    cg.is_bipartite(Cay)
+    assert Cay.eigenvalues is eigenvalues
+
+@pytest.mark.parametrize("group,args,set", CASES + [(gp.PGL, (2,7), [(1,1,0,1), (0,1,1,0)]), (gp.CyclicGroup, (10,), [2])])
+def test_distance_profile_matches_networkx(group, args, set):
+    G = group(*args)
+    Cay = cg.CayleyGraph(G, set)
+    profile = cg.distance_profile(Cay)
+    lengths = nx.single_source_shortest_path_length(Cay.graph, G.identity)
+    assert profile.sphere_sizes == np.bincount(list(lengths.values())).tolist()
+    if nx.is_connected(Cay.graph):
+        assert cg.diameter(Cay) == profile.diameter == nx.diameter(Cay.graph)
+        assert profile.mean_distance == pytest.approx(nx.average_shortest_path_length(Cay.graph))
+    else:
+        assert cg.diameter(Cay) == "Not connected."
+
+@pytest.mark.parametrize("group,args,set", CASES + [(gp.PGL, (2,7), [(1,1,0,1), (0,1,1,0)]), (gp.CyclicGroup, (12,), [3,4])])
+def test_girth_matches_networkx(group, args, set):
+    Cay = cg.CayleyGraph(group(*args), set)
+    assert cg.girth(Cay) == nx.girth(Cay.graph)
+
+@pytest.mark.parametrize("group,args,set", [(gp.SL, (2,5), [(1,1,0,1), (1,0,1,1)]), (gp.PGL, (2,7), [(1,1,0,1), (0,1,1,0)]), (gp.SL, (2,7), [(1,2,0,1), (1,0,2,1), (2,0,0,4)])])
+def test_injectivity_radius_matches_random_graph_version(group, args, set):
+    Cay = cg.CayleyGraph(group(*args), set)
+    assert (rg.injectivity_radius(Cay.adjacency.toarray()) == cg.injectivity_radius(Cay)).all()
+
+@pytest.mark.parametrize("group,args,set", CASES + [(gp.SL, (2,11), [(1,1,0,1)])])
+def test_implicit_operator_matches_adjacency(group, args, set):
+    G = group(*args)
+    Cay = cg.CayleyGraph(G, set)
+    implicit = cg.CayleyGraph(G, set, implicit = True)
+    assert implicit.implicit and not Cay.implicit
+    assert (implicit.adjacency.toarray() == Cay.adjacency.toarray()).all()
+    assert implicit.degree == Cay.degree
+    assert implicit.adjacency.components() == connected_components(Cay.adjacency, return_labels = False)
+
+def test_implicit_operator_table():
+    G = gp.ImplicitPSL(13)
+    generators = G.encode([(1,1,0,1), (1,0,1,1)])
+    x = np.random.default_rng(0).standard_normal(G.order)
+    stored = cg.CayleyOperator(G, generators, block_size = 100)
+    recomputed = cg.CayleyOperator(G, generators, block_size = 100, max_entries = 10)
+    assert stored.table is None
+    y = stored.matvec(x)
+    # The neighbours are kept after the first product if the table is small enough.
+    assert stored.table is not None and stored.table.dtype == np.int32 and stored.table.shape == (4, G.order)
+    assert (stored.table == G.mul(stored.generators[:,None], np.arange(G.order)[None,:])).all()
+    assert np.allclose(stored.matvec(x), y)
+    assert np.allclose(recomputed.matvec(x), y) and recomputed.table is None
+    assert stored.components() == recomputed.components() == 1
+
+@pytest.mark.parametrize("group,args,set", [
+    (gp.SL, (2,11), [(1,1,0,1), (1,0,1,1)]),
+    (gp.SL, (2,11), [(1,1,0,1)]),
+    (gp.PGL, (2,11), [(1,1,0,1), (0,1,1,0)]),
+])
+def test_implicit_spectrum(group, args, set):
+    G = group(*args)
+    Cay = cg.CayleyGraph(G, set)
+    implicit = cg.CayleyGraph(G, set, implicit = True)
+    for f in SPECTRAL_FUNCTIONS:
+        assert f(implicit) == pytest.approx(f(Cay), abs = 1e-7)
+
+def test_implicit_projective_group_graph():
+    set = [(1,1,0,1), (1,0,1,1)]
+    Cay = cg.CayleyGraph(gp.PSL(2,13), set)
+    implicit = cg.CayleyGraph(gp.ImplicitPSL(13), set, implicit = True)
+    assert implicit.eigenvalues == pytest.approx(Cay.eigenvalues, abs = 1e-7)
+    with pytest.raises(ValueError): implicit.girth
+    with pytest.raises(ValueError): implicit.diameter
+
+def reference_schreier_graph(points, set, act):
+    graph = nx.Graph()
+    graph.add_nodes_from(points)
+    for x in points:
+        for s in set:
+            graph.add_edge(x, act(s, x))
+    return graph
+
+def moebius(s, x, q):
+    a, b, c, d = s
+    u, v = (a*x[0] + b*x[1])%q, (c*x[0] + d*x[1])%q
+    return ((u*pow(v,-1,q))%q, 1) if v != 0 else (1, 0)
+
+@pytest.mark.parametrize("q,set", [(5, [(1,1,0,1), (1,0,1,1)]), (7, [(1,2,0,1), (0,1,6,0)]), (11, [(2,0,0,6), (1,1,0,1)]), (13, [(1,1,0,1), (1,0,1,1)])])
+def test_projective_line_schreier_graph(q, set):
+    Sch = cg.SchreierGraph(cg.ProjectiveLineAction(q), set, spectrum = "full")
+    reference = reference_schreier_graph(Sch.action.points, set, lambda s, x: moebius(s, x, q))
+    assert nx.utils.graphs_equal(Sch.graph, reference)
+    assert (Sch.adjacency.sum(axis = 1) == Sch.degree).all()
+    assert (Sch.adjacency != Sch.adjacency.T).nnz == 0
+    if nx.is_connected(reference): assert cg.diameter(Sch) == nx.diameter(reference)
+    else: assert cg.diameter(Sch) == "Not connected."
+    assert cg.girth(Sch) == (1 if nx.number_of_selfloops(reference) > 0 else nx.girth(reference))
+
+    # The projective line is the set of cosets of the upper triangular matrices.
+    G = gp.SL(2,q)
+    Cos = cg.SchreierGraph(cg.CosetAction(G, [g for g in G.element_list if g[2] == 0]), set, spectrum = "full")
+    assert Cos.degree == Sch.degree and Cos.eigenvalues == pytest.approx(Sch.eigenvalues, abs = 1e-7)
+    assert Cos.diameter == Sch.diameter and Cos.girth == Sch.girth
+    # The projective line is a quotient of PSL(2,q), which acts faithfully, so s and -s give the same permutation.
+    Cay = np.array(cg.CayleyGraph(gp.PSL(2,q), set, spectrum = "full").eigenvalues)
+    assert all(np.isclose(Cay, e, atol = 1e-7).any() for e in Sch.eigenvalues)
+    extremal = cg.SchreierGraph(cg.ProjectiveLineAction(q), set)
+    for f in SPECTRAL_FUNCTIONS:
+        assert f(extremal) == pytest.approx(f(Sch), abs = 1e-7)
+
+def test_coset_schreier_graph():
+    # The cosets of the subgroup {0,4,8} of Z/12Z form the cycle Z/4Z.
+    Sch = cg.SchreierGraph(cg.CosetAction(gp.CyclicGroup(12), [0,4,8]), [1])
+    assert Sch.action.points == [0,1,2,3]
+    assert nx.utils.graphs_equal(Sch.graph, nx.cycle_graph(4))
+    assert Sch.degree == 2 and Sch.diameter == 2 and Sch.girth == 4
+    with pytest.raises(ValueError):
+        cg.CosetAction(gp.CyclicGroup(12), [0,5])
+
+def test_schreier_graph_distance_profile():
+    # The cosets of {0,4,8} in Z/12Z form the cycle Z/4Z, in which the coset of 0 has one point at distance 2.
+    Sch = cg.SchreierGraph(cg.CosetAction(gp.CyclicGroup(12), [0,4,8]), [1])
+    assert Sch.order == 4 and Sch.base_vertex == 0
+    profile = cg.distance_profile(Sch)
+    assert profile.diameter == 2 and profile.sphere_sizes == [1,2,1] and profile.mean_distance == pytest.approx(4/3)
+
+def test_schreier_graph_errors():
+    with pytest.raises(ValueError):
+        cg.SchreierGraph(cg.ProjectiveLineAction(5), [(1,1,1,1)])
+    with pytest.raises(ValueError):
+        cg.ProjectiveLineAction(9)
+    with pytest.raises(ValueError):
+        cg.SchreierGraph(cg.ProjectiveLineAction(5), [(1,1,0,1)], spectrum = "some")
+
+@pytest.mark.parametrize("group,args,set", CASES)
+def test_generated_subgroup_and_connectivity(group, args, set):
+    G = group(*args)
+    Cay = cg.CayleyGraph(G, set)
+    H, adjacency = cg.generated_subgroup(G, set, G.order, block_size = 4)
+    assert (H.order == G.order) == cg.is_connected(Cay)
+    if H.order == G.order:
+        assert H.element_list == G.element_list
+        assert (adjacency != Cay.adjacency).nnz == 0
+    else:
+        assert connected_components(Cay.adjacency, directed = False)[0] == G.order//H.order
+
+@pytest.mark.parametrize("group,args,set", [
+    (gp.SL, (2,7), [(1,1,0,1), (1,0,1,1)]),
+    (gp.PSL, (2,7), [(1,1,0,1), (1,0,1,1)]),
+    (gp.SL, (2,6), [(1,1,0,1), (1,0,1,1), (5,0,0,5)]),
+])
+def test_generated_subgroup_without_group(group, args, set):
+    # The matrices are multiplied directly, so G is only built for the comparison.
+    G = group(*args)
+    scalars = gp.roots_of_unity(*args) if group is gp.PSL else (1,)
+    H, adjacency = cg.generated_subgroup(args + (scalars,), set, G.order)
+    assert (H.matrices == G.matrices).all()
+    assert (adjacency != cg.CayleyGraph(G, set).adjacency).nnz == 0
+
+def test_generated_subgroup_of_non_generating_set():
+    G = gp.SL(2,7)
+    set = [(1,1,0,1), (1,6,0,1)]
+    H, adjacency = cg.generated_subgroup(G, set, G.order)
+    assert H.order == 7 and H.is_group()
+    assert not cg.is_connected(cg.CayleyGraph(G, set))
+    Cay = cg.CayleyGraph(H, set, adjacency = adjacency)
+    assert cg.is_connected(Cay) and Cay.diameter == 3
+    # The cosets of a subgroup are the components of the Cayley graph of the group.
+    assert connected_components(cg.CayleyGraph(G, set).adjacency, directed = False)[0] == G.order//H.order
+    assert cg.generated_subgroup(G, [(1,1,0,1)], adjacency = False)[1] is None
+    with pytest.raises(ValueError):
+        cg.generated_subgroup(G, set, order = 5)
+
+def test_generated_subgroup_of_implicit_group():
+    G = gp.ImplicitPSL(13)
+    set = [(1,1,0,1), (1,0,1,1)]
+    H, adjacency = cg.generated_subgroup(G, set, G.order)
+    assert H.order == G.order
+    assert (adjacency.toarray() == cg.CayleyGraph(G, set, implicit = True).adjacency.toarray()).all()
+    # Without the adjacency matrix the search stops as soon as the whole group is found.
+    assert cg.generated_subgroup(G, set, G.order, adjacency = False)[0].order == G.order
+    H, adjacency = cg.generated_subgroup(G, [(1,1,0,1)])
+    assert H.order == 13 and H.encode([(1,5,0,1), (1,0,1,1)]).tolist() == [5, -1]
+    assert (H.mul(np.arange(13), H.invert(np.arange(13))) == H.identity_id).all()
+
+@pytest.mark.parametrize("adjacency", [True, False])
+def test_generated_subgroup_order_bound(adjacency):
+    # The set generates SL(2,7), which has 336 elements.
+    set = [(1,1,0,1), (1,0,1,1)]
+    for order in [100, 200, 335]:
+        with pytest.raises(ValueError):
+            cg.generated_subgroup(gp.SL(2,7), set, order, adjacency = adjacency)
+        with pytest.raises(ValueError):
+            cg.generated_subgroup((2,7), set, order, adjacency = adjacency)
+    H, _ = cg.generated_subgroup(gp.SL(2,7), set, 336, adjacency = adjacency)
+    assert H.order == 336 and H.is_group()
+    H, _ = cg.generated_subgroup((2,7), set, 1000, adjacency = adjacency)
+    assert H.order == 336 and H.is_group()
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import cayleygraphs as cg
+import generatorsearch as gs
+import groups as gp
+
+@pytest.mark.parametrize("degree", [2,3,4,5])
+def test_sample_symmetric(degree):
+    # 5 is the only element of order 2 in Z/10Z.
+    searcher = gs.GeneratorSearch(gp.CyclicGroup(10))
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        positions = searcher.sample(degree, rng)
+        elements = set(searcher.ids[positions].tolist())
+        assert len(elements) == degree
+        assert elements == {(-g)%10 for g in elements}
+        assert 0 not in elements
+
+def test_sample_even_degree_with_involution():
+    # The only element of order 2 of SL(2,5) is -I, so it can never be part of a set with an even number of elements.
+    group = gp.SL(2,5)
+    searcher = gs.GeneratorSearch(group)
+    minus_identity = group.encode([(4,0,0,4)])[0]
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        assert minus_identity not in searcher.ids[searcher.sample(4, rng)]
+
+def test_generates():
+    group = gp.CyclicGroup(12)
+    searcher = gs.GeneratorSearch(group)
+    position = lambda elements: np.searchsorted(searcher.ids, group.encode(elements))
+    assert searcher.generates(position([1,11]))
+    assert searcher.generates(position([4,8,3,9]))
+    assert not searcher.generates(position([3,9]))
+    assert not searcher.generates(position([2,10,4,8]))
+
+def test_adjacency():
+    group = gp.SL(2,5)
+    searcher = gs.GeneratorSearch(group)
+    positions = searcher.sample(4, np.random.default_rng(2))
+    expected = cg.cayley_adjacency(group, searcher.ids[positions])
+    assert (searcher.adjacency(positions) != expected).nnz == 0
+
+def test_search():
+    group = gp.SL(2,7)
+    best = gs.search(group, 4, 100, top = 5, seed = 0, workers = 1, tol = 0)
+    assert len(best) == 5
+    scores = [candidate.score for candidate in best]
+    assert scores == sorted(scores, reverse = True)
+    for candidate in best:
+        Cay = cg.CayleyGraph(group, candidate.set)
+        assert Cay.degree == 4 and cg.is_connected(Cay)
+        assert candidate.score == pytest.approx(cg.adjacency_spectral_gap(Cay), abs = 1e-7)
+    parallel = gs.search(group, 4, 100, top = 5, seed = 0, workers = 2, batch_size = 16, tol = 0)
+    assert [(c.score, c.set) for c in parallel] == [(c.score, c.set) for c in best]
+
+def test_search_scores():
+    group = gp.CyclicGroup(12)
+    for score in gs.SCORES:
+        best = gs.search(group, 2, 20, top = 1, score = score, seed = 0, workers = 1)
+        Cay = cg.CayleyGraph(group, best[0].set)
+        assert best[0].score == pytest.approx(getattr(cg, score)(Cay), abs = 1e-7)
+    with pytest.raises(ValueError):
+        gs.search(group, 2, 20, score = "girth")
+
+def test_non_generating_sets_are_pruned():
+    # A cyclic group of prime order is generated by any element except the identity.
+    assert len(gs.search(gp.CyclicGroup(7), 2, 50, top = 10, seed = 0, workers = 1)) == 3
+    # In Z/12Z only 1, 5, 7 and 11 generate.
+    best = gs.search(gp.CyclicGroup(12), 2, 100, top = 10, seed = 0, workers = 1)
+    assert sorted(sorted(c.set) for c in best) == [[1,11], [5,7]]
+
+def test_random_pool():
+    group = gp.SL(2,7)
+    searcher = gs.GeneratorSearch(group, pool_size = 20, seed = 0, max_entries = 100*group.order)
+    assert 20 <= len(searcher.ids) < group.order
+    assert set(group.invert(searcher.ids).tolist()) == set(searcher.ids.tolist())
+    assert (searcher.table == group.multiplication_table(searcher.ids)).all()
+    pool = [(1,1,0,1), (1,0,1,1)]
+    searcher = gs.GeneratorSearch(group, pool = pool)
+    assert len(searcher.ids) == 4
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import cayleygraphs as cg
+import graphcache as gc
+import groups as gp
+import LPS
+import sweeps as sw
+
+@pytest.mark.parametrize("name,n,q", [("SL",2,7), ("PSL",2,7), ("PGL",2,5), ("GL",2,4)])
+def test_group_roundtrip(tmp_path, name, n, q):
+    cache = gc.GraphCache(str(tmp_path))
+    built = cache.group(name,n,q)
+    loaded = cache.group(name,n,q)
+    assert cache.stats["misses"] == 1 and cache.stats["hits"] == 1
+    assert type(loaded) is type(built) and isinstance(loaded.matrices, np.memmap)
+    assert (loaded.matrices == built.matrices).all() and loaded.scalars == built.scalars
+    assert loaded.elements == built.elements and loaded.identity_id == built.identity_id
+    ids = np.arange(built.order)
+    assert (loaded.mul(ids, ids[::-1]) == built.mul(ids, ids[::-1])).all()
+    assert (loaded.inverse_ids == built.inverse_ids).all()
+
+def test_multiplication_table(tmp_path):
+    cache = gc.GraphCache(str(tmp_path))
+    table = cache.group("SL",2,5,table = True).table
+    loaded = cache.group("SL",2,5)
+    assert isinstance(loaded.table, np.memmap)
+    assert (loaded.table == table).all() and (loaded.table == gp.SL(2,5).multiplication_table()).all()
+
+def test_cayley_graph(tmp_path):
+    cache = gc.GraphCache(str(tmp_path))
+    generators = [(1,1,0,1), (1,0,1,1)]
+    reference = cg.CayleyGraph(gp.SL(2,7), generators)
+    first = cache.cayley_graph("SL",2,7,generators)
+    second = cache.cayley_graph("SL",2,7,generators[::-1])
+    assert cache.stats["hits"] == 2 and cache.stats["misses"] == 2
+    for Cay in (first, second):
+        assert (Cay.adjacency != reference.adjacency).nnz == 0
+        assert cg.girth(Cay) == cg.girth(reference) and cg.diameter(Cay) == cg.diameter(reference)
+
+def test_lps(tmp_path):
+    cache = gc.GraphCache(str(tmp_path))
+    reference = LPS.LPS(5,13)
+    for _ in range(2):
+        Cay = LPS.LPS(5,13,cache = cache)
+        assert (Cay.adjacency != reference.adjacency).nnz == 0
+    assert cache.stats["hits"] == 2
+
+def test_uncached_group(tmp_path):
+    cache = gc.GraphCache(str(tmp_path))
+    Cay = cg.CayleyGraph(gp.CyclicGroup(10), [1], cache = cache)
+    assert cg.girth(Cay) == 10 and cache.entries() == []
+
+def test_eviction(tmp_path):
+    cache = gc.GraphCache(str(tmp_path), max_bytes = 0)
+    cache.group("SL",2,5)
+    cache.group("SL",2,7)
+    assert len(cache.entries()) == 1 and cache.stats["evictions"] == 1
+    cache.max_bytes = 2**30
+    cache.group("SL",2,5)
+    cache.group("SL",2,7)
+    cache.group("SL",2,5)
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    assert cache.entries() == [gc.content_key({"group": "SL", "n": 2, "q": 5})]
+
+def test_staged_entries_are_not_evicted(tmp_path):
+    # A temporary directory of store in another process already contains meta.json before it is renamed.
+    staged = tmp_path / ".tmpstaged"
+    staged.mkdir()
+    (staged / "meta.json").write_text("{}")
+    np.save(staged / "matrices.npy", np.zeros(1000))
+    cache = gc.GraphCache(str(tmp_path), max_bytes = 0)
+    assert cache.entries() == [] and cache.size() == 0
+    cache.group("SL",2,5)
+    cache.group("SL",2,7)
+    cache.clear()
+    assert (staged / "meta.json").exists() and (staged / "matrices.npy").exists()
+
+def test_sweep_with_cache(tmp_path):
+    cache = gc.GraphCache(str(tmp_path))
+    generators = [(1,1,0,1), (1,0,1,1)]
+    reference = sw.sweep("SL2", [(5,), (7,)], generators = generators, workers = 1)
+    assert sw.sweep("SL2", [(5,), (7,)], generators = generators, cache = cache, workers = 1).rows == reference.rows
+    assert sw.sweep("SL2", [(5,), (7,)], generators = generators, cache = cache, workers = 1).rows == reference.rows
+    assert cache.stats["hits"] == 4
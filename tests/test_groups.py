@@ -0,0 +1,182 @@
+"""
+Tests for the groups module.
+For cardinality formulas of linear groups we refer to https://groupprops.subwiki.org/wiki/Order_formulas_for_linear_groups
+"""
+
+import itertools
+import math
+import random
+import numpy as np
+import pytest
+import groups as gp
+
+
+def prime_factorization(q):
+    """
+    Returns the dictionary {p: k} with q = prod p**k.
+    """
+    factors = {}
+    p = 2
+    while q > 1:
+        while q%p == 0:
+            factors[p] = factors.get(p,0) + 1
+            q //= p
+        p += 1
+    return factors
+
+def order_GL(n,q):
+    """
+    |GL_n(Z/qZ)| is multiplicative in q and |GL_n(Z/p^kZ)| = p^((k-1)n^2) * prod_{i<n} (p^n - p^i).
+    """
+    order = 1
+    for p, k in prime_factorization(q).items():
+        order *= p**((k-1)*n*n) * math.prod(p**n - p**i for i in range(n))
+    return order
+
+def euler_phi(q):
+    return sum(1 for k in range(1,q+1) if math.gcd(k,q) == 1)
+
+def order_SL(n,q):
+    return order_GL(n,q)//euler_phi(q)
+
+def order_PGL(n,q):
+    return order_GL(n,q)//euler_phi(q)
+
+def order_PSL(n,q):
+    """
+    For a prime q the center of SL_n(Z/qZ) consists of the gcd(n,q-1) scalar matrices given by nth roots of unity.
+    """
+    return order_SL(n,q)//math.gcd(n,q-1)
+
+
+@pytest.mark.parametrize("n,q", [(1,7), (2,2), (2,3), (2,4), (2,6), (2,9), (2,10), (3,2), (3,3)])
+def test_GL_order(n,q):
+    assert len(gp.GL(n,q).elements) == order_GL(n,q)
+
+@pytest.mark.parametrize("n,q", [(2,2), (2,3), (2,4), (2,6), (2,9), (2,15), (2,35), (3,2), (3,3), (3,4)])
+def test_SL_order(n,q):
+    assert len(gp.SL(n,q).elements) == order_SL(n,q)
+
+@pytest.mark.parametrize("n,q", [(2,2), (2,3), (2,5), (2,7), (2,13), (3,2), (3,3)])
+def test_PGL_order(n,q):
+    assert len(gp.PGL(n,q).elements) == order_PGL(n,q)
+
+@pytest.mark.parametrize("n,q", [(2,3), (2,5), (2,7), (2,13), (2,29), (3,2), (3,3)])
+def test_PSL_order(n,q):
+    assert len(gp.PSL(n,q).elements) == order_PSL(n,q)
+
+@pytest.mark.parametrize("group,args", [(gp.CyclicGroup,(12,)), (gp.GL,(2,3)), (gp.GL,(3,2)), (gp.SL,(2,3)), (gp.SL,(3,2)), (gp.PGL,(2,3)), (gp.PGL,(3,2)), (gp.PSL,(2,3)), (gp.PSL,(3,2)), (gp.PSL,(2,5))])
+def test_is_group(group, args):
+    assert group(*args).is_group()
+
+def test_is_group_randomized():
+    assert gp.SL(2,35).is_group(samples=10**5, seed=0)
+
+def test_is_group_detects_non_groups():
+    assert not gp.FiniteGroup([0,1,2], 0, lambda a,b: (a*b)%3).is_group()
+    assert not gp.FiniteGroup([0,1,2], 0, lambda a,b: (a+b)%4).is_group()
+
+def test_cyclic_group_encode_reduces():
+    G = gp.CyclicGroup(10)
+    assert G.encode([3, 13, -7, 3 + 9]).tolist() == [3, 3, 3, 2]
+    assert G.decode(G.encode([25])) == [5]
+
+def test_inverse():
+    G = gp.GL(2,3)
+    assert G.inverse((1,1,0,1)) == (1,2,0,1)
+    assert G.inverse((0,0,0,0)) == False
+
+@pytest.mark.parametrize("group,args", [(gp.CyclicGroup,(12,)), (gp.GL,(2,4)), (gp.SL,(3,3)), (gp.PGL,(2,5)), (gp.PSL,(2,7))])
+def test_inverse_ids(group, args):
+    group = group(*args)
+    everything = np.arange(group.order)
+    assert (group.mul(everything, group.inverse_ids) == group.identity_id).all()
+
+@pytest.mark.parametrize("group,args", [(gp.CyclicGroup,(12,)), (gp.GL,(2,4)), (gp.PGL,(2,5)), (gp.PSL,(2,7))])
+def test_indexed_mode_matches_operation(group, args):
+    group = group(*args)
+    elements = group.element_list
+    assert group.decode(group.encode(elements)) == elements
+    table = group.multiplication_table()
+    for a, b in itertools.product(range(0, group.order, 7), range(0, group.order, 5)):
+        assert elements[table[a,b]] == group.operation(elements[a], elements[b])
+
+def test_projective_identity_is_representative():
+    for G in [gp.PGL(2,5), gp.PSL(2,7), gp.PSL(3,4)]:
+        assert G.identity in G.elements
+        assert G.encode([tuple((-a)%G.q for a in G.identity)])[0] == (G.identity_id if G.q - 1 in gp.roots_of_unity(G.n, G.q) else -1)
+
+@pytest.mark.parametrize("n,q", [(2,6), (3,2), (3,3)])
+def test_determinants_mod(n,q):
+    matrices = np.array(list(itertools.product(range(q), repeat = n*n))).reshape(-1,n,n)
+    assert (gp.determinants_mod(matrices, q) == np.round(np.linalg.det(matrices)).astype(int)%q).all()
+
+@pytest.mark.parametrize("n,q", [(1,6), (2,2), (2,6), (2,7), (3,2), (3,4)])
+def test_enumerate_matrices(n,q):
+    # For q = 6 the cofactors (2,3) generate Z/6Z without a unit, so those first rows are tested instead of solved.
+    matrices = np.array(list(itertools.product(range(q), repeat = n*n))).reshape(-1,n,n)
+    determinants = gp.determinants_mod(matrices, q)
+    for accept in [lambda det: np.gcd(det, q) == 1, lambda det: det == 1%q, lambda det: det == (q-1)%q]:
+        expected = matrices[accept(determinants)]
+        for block_size in [2**8, 2**22]:
+            assert (gp.enumerate_matrices(n, q, accept, block_size = block_size) == expected).all()
+
+def leibniz_determinant(A, q):
+    n = len(A)
+    return sum((-1)**sum(p[i] > p[j] for i in range(n) for j in range(i+1,n))*math.prod(A[i][p[i]] for i in range(n)) for p in itertools.permutations(range(n)))%q
+
+@pytest.mark.parametrize("q", [12, 36, 97, 2**31 - 1, 2**61 - 1, 10**30 + 57])
+@pytest.mark.parametrize("n", [1, 2, 3, 4])
+def test_determinants_and_inverses_mod_large_q(n,q):
+    rng = random.Random(n)
+    matrices = np.array([[[rng.randrange(q) for j in range(n)] for i in range(n)] for _ in range(30)], dtype = object)
+    determinants = gp.determinants_mod(matrices, q)
+    assert [int(d) for d in determinants] == [leibniz_determinant(A.tolist(), q) for A in matrices]
+    invertible = matrices[[math.gcd(int(d), q) == 1 for d in determinants]]
+    assert len(invertible) > 0
+    products = gp.matmul_mod(invertible, gp.inverses_mod(invertible, q), q)
+    assert (products == np.identity(n, dtype = np.int64)).all()
+    with pytest.raises(ValueError):
+        gp.inverses_mod(np.zeros((1,n,n), dtype = np.int64), q)
+
+def test_matmul_mod_does_not_overflow():
+    q = 2**61 - 1
+    A = np.full((1,3,3), q - 1, dtype = np.int64)
+    # (q-1)^2 = 1 and each entry is a sum of 3 such products.
+    assert (gp.matmul_mod(A, A, q) == 3).all()
+    assert gp.product_dtype(4, 1000) == np.int32 and gp.product_dtype(4, 2**30) == np.int64 and gp.product_dtype(2, 2**62) == object
+
+@pytest.mark.parametrize("n,q", [(2,2**31 - 1), (3,10**30 + 57)])
+def test_matrix_operation_large_q(n,q):
+    op = gp.matrix_operation(n,q)
+    A = tuple(q - 1 - i for i in range(n*n))
+    B = tuple(i + 1 for i in range(n*n))
+    expected = [[sum(A[i*n+k]*B[k*n+j] for k in range(n))%q for j in range(n)] for i in range(n)]
+    assert op(A,B) == tuple(itertools.chain(*expected))
+
+@pytest.mark.parametrize("implicit,group", [(gp.ImplicitPGL, gp.PGL), (gp.ImplicitPSL, gp.PSL)])
+@pytest.mark.parametrize("q", [3, 5, 7])
+def test_implicit_projective_group(implicit, group, q):
+    G, H = implicit(q), group(2,q)
+    ids = np.arange(G.order)
+    assert G.order == H.order
+    assert (G.encode_matrices(G.unrank(ids)) == ids).all()
+    # Sending the elements of the enumerated group to the ids of the implicit group is a bijection and a homomorphism.
+    image = G.encode_matrices(H.matrices)
+    assert (np.sort(image) == ids).all()
+    a, b = np.meshgrid(np.arange(H.order), np.arange(H.order))
+    assert (image[H.mul(a,b)] == G.mul(image[a], image[b])).all()
+    assert (G.mul(ids, G.inverse_ids) == G.identity_id).all()
+    assert G.is_group()
+
+def test_implicit_projective_group_large_q():
+    G = gp.ImplicitPSL(1297)
+    assert G.dtype == np.int64
+    a, b, c = np.random.default_rng(0).integers(0, G.order, size=(3,1000))
+    assert (G.encode_matrices(G.unrank(a)) == a).all()
+    assert (G.mul(G.mul(a,b),c) == G.mul(a,G.mul(b,c))).all()
+
+def test_implicit_projective_group_rejects_non_members():
+    assert gp.ImplicitPSL(7).encode([(1,1,1,1), (3,0,0,1)]).tolist() == [-1, -1]
+    assert gp.ImplicitPGL(7).encode([(1,1,1,1)]).tolist() == [-1]
+    with pytest.raises(ValueError): gp.ImplicitPGL(9)
@@ -0,0 +1,24 @@
+"""
+Importing the modules of this repository must not construct groups or graphs.
+We guard against regressions by timing the import in a fresh interpreter, after the third party packages have been imported.
+"""
+
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_IMPORT_SECONDS = 0.5
+
+@pytest.mark.parametrize("module", ["groups", "cayleygraphs", "LPS", "randomgraphs", "representations"])
+def test_import_time(module):
+    script = f"""
+import time
+import numpy, networkx, scipy.sparse, scipy.sparse.linalg, scipy.sparse.csgraph
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert float(result.stdout) < MAX_IMPORT_SECONDS
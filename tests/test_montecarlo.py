@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+import montecarlo as mc
+import randomgraphs as rg
+
+def test_chunks():
+    assert mc.chunks(10,4) == [(0,4), (4,8), (8,10)]
+    assert mc.chunks(0,4) == []
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_independent_of_workers(workers):
+    reference = mc.run(12,2,50,seed = 3,workers = 1,chunk_size = 7)
+    results = mc.run(12,2,50,seed = 3,workers = workers,chunk_size = 7)
+    assert set(results) == set(mc.QUANTITIES)
+    for key in mc.QUANTITIES:
+        assert results[key].shape == (50,)
+        assert (results[key] == reference[key]).all()
+
+def test_sample_invariants():
+    seed = np.random.SeedSequence(1)
+    results = mc.sample_invariants(16,2,5,seed)
+    A = rg.random_simple_adjacency_matrices(16,2,5,rng = np.random.default_rng(seed))
+    for i in range(5):
+        assert results["diameter"][i] == rg.diameter(A[i])
+        assert results["girth"][i] == rg.girth(A[i])
+        assert results["adjacency_spectral_gap"][i] == rg.adjacency_spectral_gap(A[i])
+        assert results["mean_injectivity_radius"][i] == rg.mean_injectivity_radius(A[i])
+
+def test_running_statistics():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size = 100)
+    values[[3,50]] = np.inf
+    stats = mc.RunningStatistics(["x"], {"x": np.arange(-3,4)})
+    for batch in np.split(values, [10,11,60]): stats.update({"x": batch})
+    finite = values[np.isfinite(values)]
+    summary = stats.summary()["x"]
+    assert np.isclose(summary["mean"], finite.mean()) and np.isclose(summary["std"], finite.std())
+    assert summary["min"] == finite.min() and summary["max"] == finite.max() and summary["infinite"] == 2
+    assert (stats.histograms["x"] == np.histogram(finite, bins = np.arange(-3,4))[0]).all()
+
+def test_streaming_matches_run():
+    results = mc.run(12,2,40,seed = 5,workers = 1,chunk_size = 8)
+    summary = mc.run_streaming(12,2,40,seed = 5,workers = 2,chunk_size = 8).summary()
+    for key in mc.QUANTITIES:
+        assert np.isclose(summary[key]["mean"], results[key].mean())
+        assert np.isclose(summary[key]["std"], results[key].std())
+        assert summary[key]["max"] == results[key].max()
+
+def test_checkpoint_resume(tmp_path, monkeypatch):
+    path = str(tmp_path / "run.npz")
+    reference = mc.run_streaming(12,2,40,seed = 5,workers = 1,chunk_size = 8)
+
+    sample_invariants = mc.sample_invariants
+    calls = []
+    def interrupted(*args):
+        calls.append(args)
+        if len(calls) == 4: raise KeyboardInterrupt
+        return sample_invariants(*args)
+    monkeypatch.setattr(mc, "sample_invariants", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        mc.run_streaming(12,2,40,seed = 5,workers = 1,chunk_size = 8,checkpoint = path,checkpoint_every = 2)
+    monkeypatch.setattr(mc, "sample_invariants", sample_invariants)
+
+    stats, metadata = mc.RunningStatistics.load(path)
+    assert metadata["done"] == 2 and stats.count[0] == 16
+    resumed = mc.run_streaming(12,2,40,workers = 1,chunk_size = 8,checkpoint = path)
+    for key in ("count", "mean", "m2", "min", "max"):
+        assert (getattr(resumed, key) == getattr(reference, key)).all()
+    for key in reference.histograms:
+        assert (resumed.histograms[key] == reference.histograms[key]).all()
+    with pytest.raises(ValueError):
+        mc.run_streaming(12,2,48,workers = 1,chunk_size = 8,checkpoint = path)
+    with pytest.raises(ValueError):
+        mc.run_streaming(12,2,40,seed = 6,workers = 1,chunk_size = 8,checkpoint = path)
+    resumed = mc.run_streaming(12,2,40,seed = 5,workers = 1,chunk_size = 8,checkpoint = path)
+    assert (resumed.mean == reference.mean).all()
@@ -0,0 +1,97 @@
+"""
+Tests for the randomgraphs module.
+"""
+
+import networkx as nx
+import numpy as np
+import pytest
+import cayleygraphs as cg
+import randomgraphs as rg
+
+
+@pytest.mark.parametrize("n,d", [(10,1), (32,1), (32,2), (64,3)])
+def test_girth_matches_networkx(n,d):
+    for A in rg.random_simple_adjacency_matrices(n,d,20,rng = n*d):
+        assert rg.girth(A) == nx.girth(nx.from_numpy_array(A))
+
+def test_girth_of_small_graphs():
+    assert rg.girth(np.array([[0,1,0],[1,0,1],[0,1,0]])) == np.inf
+    assert rg.girth(np.array([[0,2],[2,0]])) == 2
+    assert rg.girth(np.array([[1,1],[1,0]])) == 1
+
+def test_shortest_cycles_through():
+    # A triangle with a pendant path 0-1-2: the search from 0 only finds the triangle at radius 2.
+    graph = nx.Graph([(0,1), (1,2), (2,3), (3,4), (4,2)])
+    lengths = rg.shortest_cycles_through(nx.to_numpy_array(graph))
+    assert lengths.tolist() == [7, 5, 3, 3, 3]
+
+def reference_injectivity_radius(graph, v):
+    """
+    Largest r such that distinct non-backtracking walks of length at most r from v end at distinct vertices, by enumerating the walks.
+    """
+    walks = [(v,)]
+    ends = {v}
+    r = 0
+    while True:
+        walks = [w + (u,) for w in walks for u in graph[w[-1]] if len(w) < 2 or u != w[-2]]
+        new_ends = [w[-1] for w in walks]
+        if len(set(new_ends)) < len(new_ends) or ends & set(new_ends): return r
+        ends |= set(new_ends)
+        r += 1
+
+@pytest.mark.parametrize("n,d", [(16,2), (32,2), (24,3)])
+def test_injectivity_radius(n,d):
+    A = rg.random_simple_adjacency_matrix(n,d,rng = n+d)
+    graph = nx.from_numpy_array(A)
+    assert rg.injectivity_radius(A).tolist() == [reference_injectivity_radius(graph, v) for v in range(n)]
+
+@pytest.mark.parametrize("model", ["permutation", "configuration"])
+def test_batched_sampler(model):
+    neighbours = rg.random_regular_neighbours(20,2,200,model = model,rng = 0)
+    assert neighbours.shape == (200,20,4)
+    assert rg.is_simple_neighbours(neighbours).all()
+    A = rg.neighbours_to_adjacency(neighbours)
+    assert (A == A.transpose(0,2,1)).all()
+    assert (A.sum(axis=2) == 4).all() and A.max() == 1
+    assert (rg.random_regular_neighbours(20,2,200,model = model,rng = 0) == neighbours).all()
+
+def test_global_seed():
+    np.random.seed(7)
+    A = rg.random_simple_adjacency_matrix(30,2)
+    np.random.seed(7)
+    assert (rg.random_simple_adjacency_matrix(30,2) == A).all()
+
+def test_is_simple_neighbours():
+    neighbours = np.array([[[1,2],[2,0],[0,1]], [[0,2],[2,0],[0,1]], [[1,1],[0,0],[0,1]]])
+    assert rg.is_simple_neighbours(neighbours).tolist() == [True, False, False]
+
+def test_spectral_summary():
+    A = rg.random_simple_adjacency_matrices(16,1,50,rng = 2)
+    summary = rg.spectral_summary(A)
+    for i in range(len(A)):
+        evals = rg.sorted_eigenvalues(A[i])
+        assert np.allclose(summary["eigenvalues"][i], evals[[0,1,-2,-1]])
+        assert summary["is_connected"][i] == (evals[1] < 1)
+        assert summary["is_bipartite"][i] == (evals[1] < 1 and evals[-1] == -1)
+        assert np.isclose(summary["adjacency_spectral_gap"][i], 1 - max(abs(evals[1]), abs(evals[-1])))
+        assert np.isclose(summary["laplacian_spectral_gap"][i], 1 - evals[1])
+    assert not summary["is_connected"].all()
+
+def test_spectral_summary_sparse(monkeypatch):
+    A = rg.random_simple_adjacency_matrices(40,2,3,rng = 5)
+    dense = rg.spectral_summary(A)
+    monkeypatch.setattr(cg, "DENSE_LIMIT", 10)
+    sparse = rg.spectral_summary(A)
+    for key in dense: assert np.allclose(dense[key], sparse[key])
+
+def test_spectral_summary_sparse_disconnected_bipartite(monkeypatch):
+    # Two disjoint 20-cycles: the eigenvalues 1 and -1 both have multiplicity 2.
+    cycle = np.roll(np.identity(20, dtype=int), 1, axis=1)
+    cycle = cycle + cycle.T
+    A = np.zeros((1,40,40), dtype=int)
+    A[0,:20,:20] = A[0,20:,20:] = cycle
+    dense = rg.spectral_summary(A)
+    monkeypatch.setattr(cg, "DENSE_LIMIT", 10)
+    sparse = rg.spectral_summary(A)
+    assert np.allclose(sparse["eigenvalues"], [[1,1,-1,-1]])
+    for key in dense: assert np.allclose(dense[key], sparse[key])
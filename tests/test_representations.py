@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import cayleygraphs as cg
+import groups as gp
+import representations as rt
+
+def dense_eigenvalues(group, generators):
+    generators = np.unique(np.concatenate([generators, group.invert(generators)]))
+    return np.sort(np.linalg.eigvalsh(cg.cayley_adjacency(group, generators).toarray()))[::-1]
+
+@pytest.mark.parametrize("group,args", [(gp.SL, (2,q)) for q in [3,5,7,11]] + [(gp.PSL, (2,q)) for q in [3,5,7,11,13]] +
+                                       [(gp.ImplicitPSL, (q,)) for q in [5,7]] + [(gp.CyclicGroup, (n,)) for n in [1,2,12,35]])
+def test_spectrum_matches_dense(group, args):
+    G = group(*args)
+    rng = np.random.default_rng(0)
+    for size in (1,2,3):
+        generators = rng.choice(G.order, size = min(size, G.order), replace = False)
+        values, multiplicities = rt.spectrum(G, generators)
+        assert multiplicities.sum() == G.order
+        assert np.allclose(rt.eigenvalues(G, generators), dense_eigenvalues(G, generators))
+
+def test_special_generators():
+    # Upper triangular matrices, -I and the identity take the other branches of the discrete series.
+    G = gp.SL(2,11)
+    generators = G.encode([(1,3,0,1), (2,0,0,6), (10,0,0,10), (1,0,0,1), (0,1,10,0)])
+    assert np.allclose(rt.eigenvalues(G, generators), dense_eigenvalues(G, generators))
+
+def test_supports():
+    assert rt.supports(gp.SL(2,7)) and rt.supports(gp.PSL(2,7)) and rt.supports(gp.ImplicitPSL(7)) and rt.supports(gp.CyclicGroup(5))
+    assert not rt.supports(gp.SL(2,9)) and not rt.supports(gp.PGL(2,7)) and not rt.supports(gp.GL(2,3)) and not rt.supports(gp.ImplicitPGL(7))
+    with pytest.raises(ValueError):
+        rt.spectrum(gp.PGL(2,5), [1])
+
+def test_large_psl():
+    # The dense adjacency matrix of PSL(2,31) has 14880 rows, the largest blocks have 32.
+    G = gp.ImplicitPSL(31)
+    generators = G.encode([(1,2,0,1), (1,0,2,1)])
+    values, multiplicities = rt.spectrum(G, generators)
+    assert multiplicities.sum() == G.order
+    values = np.sort(values)[::-1]
+    assert values[0] == pytest.approx(4)
+    extremal = cg.extremal_eigenvalues(cg.cayley_adjacency(G, np.concatenate([generators, G.invert(generators)])))
+    assert values[[1,-2,-1]] == pytest.approx(extremal[[1,-2,-1]], abs = 1e-8)
+
+def test_cayley_graph_full_spectrum():
+    G = gp.PSL(2,13)
+    Cay = cg.CayleyGraph(G, [(1,1,0,1), (1,0,1,1)], spectrum = "full")
+    assert len(Cay.eigenvalues) == G.order
+    assert np.allclose(Cay.eigenvalues, dense_eigenvalues(G, G.encode(Cay.set))/Cay.degree)
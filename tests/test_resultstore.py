@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import resultstore as rs
+import sweeps as sw
+
+GENERATORS = [(1,1,0,1), (1,0,1,1)]
+
+def test_store_roundtrip(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    store = rs.ResultStore(path)
+    key = rs.fingerprint({"group": "SL", "n": 2, "q": 5})
+    store.put(key, {"girth": np.int64(5), "gap": np.float64(0.25), "diameter": "Not connected.", "radius": np.inf})
+    store.close()
+    store = rs.ResultStore(path)
+    assert store.get(key) == {"girth": 5, "gap": 0.25, "diameter": "Not connected.", "radius": np.inf}
+    assert store.get(key, ["girth", "order"]) == {"girth": 5}
+    assert store.get(rs.fingerprint({"group": "SL", "n": 2, "q": 7})) == {}
+    assert len(store) == 1
+
+def test_fingerprint():
+    assert rs.fingerprint({"a": 1, "b": 2}) == rs.fingerprint({"b": 2, "a": 1})
+    assert rs.fingerprint({"a": 1}) != rs.fingerprint({"a": 2})
+    assert sw.sl2_description(5, [(6,1,0,1), (1,0,1,1)]) == sw.sl2_description(5, [(1,0,1,1), (1,1,0,1)])
+
+def test_sweep_only_computes_missing(monkeypatch):
+    store = rs.ResultStore(":memory:")
+    reference = sw.sweep("SL2", [(5,), (7,)], ("order", "girth"), generators = GENERATORS, workers = 1)
+    assert sw.sweep("SL2", [(5,), (7,)], ("order", "girth"), generators = GENERATORS, workers = 1, store = store).rows == reference.rows
+
+    evaluated = []
+    evaluate = sw.evaluate
+    def record(family, point, invariants, options):
+        evaluated.append((point, list(invariants)))
+        return evaluate(family, point, invariants, options)
+    monkeypatch.setattr(sw, "evaluate", record)
+    table = sw.sweep("SL2", [(5,), (7,), (4,)], ("order", "girth", "diameter"), generators = GENERATORS, workers = 1, store = store)
+    assert evaluated == [((7,), ["diameter"]), ((5,), ["diameter"]), ((4,), ["order", "girth", "diameter"])]
+    assert table.rows == sw.sweep("SL2", [(5,), (7,), (4,)], ("order", "girth", "diameter"), generators = GENERATORS, workers = 1).rows
+    evaluated.clear()
+    sw.sweep("SL2", [(5,), (7,), (4,)], ("order", "girth", "diameter"), generators = GENERATORS, workers = 1, store = store)
+    assert evaluated == []
+
+def test_unseeded_random_graphs_are_not_stored():
+    store = rs.ResultStore(":memory:")
+    sw.sweep("random", [(16,2)], ("girth",), workers = 1, store = store)
+    assert len(store) == 0
+    sw.sweep("random", [(16,2)], ("girth",), workers = 1, store = store, seed = 1)
+    assert len(store) == 1
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import cayleygraphs as cg
+import groups as gp
+import LPS
+import sweeps as sw
+
+GENERATORS = [(1,1,0,1), (1,0,1,1)]
+
+@pytest.mark.parametrize("k", [2,3,4,6,8,9,10,12])
+def test_sl2_size(k):
+    assert sw.sl2_size(k) == gp.SL(2,k).order
+
+def test_lps_size():
+    for p,q in [(5,13), (13,5), (5,29)]:
+        assert sw.lps_size(p,q) == LPS.LPS(p,q).group.order
+
+def test_sweep_sl2():
+    table = sw.sweep("SL2", [(k,) for k in range(3,8)], generators = GENERATORS, workers = 1)
+    assert table.columns == ["point"] + list(sw.DEFAULT_INVARIANTS)
+    assert table.column("point") == [3,4,5,6,7]
+    for row in table.rows:
+        Cay = cg.CayleyGraph(gp.SL(2,row[0]), GENERATORS)
+        assert row[1:] == [Cay.group.order, cg.diameter(Cay), cg.adjacency_spectral_gap(Cay), cg.laplacian_spectral_gap(Cay),
+                           cg.girth(Cay), cg.girth(Cay)*np.log(Cay.degree - 1)/np.log(Cay.group.order), cg.injectivity_radius(Cay)]
+    assert sw.sweep("SL2", [(k,) for k in range(3,8)], generators = GENERATORS, workers = 2).rows == table.rows
+
+def test_largest_first(monkeypatch):
+    evaluated = []
+    evaluate = sw.evaluate
+    def record(family, point, invariants, options):
+        evaluated.append(point)
+        return evaluate(family, point, invariants, options)
+    monkeypatch.setattr(sw, "evaluate", record)
+    table = sw.sweep("SL2", [(3,), (7,), (5,)], ("order",), generators = lambda k: GENERATORS, workers = 1)
+    assert evaluated == [(7,), (5,), (3,)]
+    assert table.rows == [[3, 24], [7, 336], [5, 120]]
+
+def test_sweep_random():
+    first = sw.sweep("random", [(16,2), (20,1)], ("order", "degree", "girth"), seed = 4, workers = 1)
+    assert first.column("order") == [16, 20] and first.column("degree") == [4, 2]
+    assert sw.sweep("random", [(16,2), (20,1)], ("order", "degree", "girth"), seed = 4, workers = 1).rows == first.rows
+
+def test_unknown_invariant():
+    with pytest.raises(ValueError):
+        sw.sweep("random", [(16,2)], ("eigenvalues",))
+
+def test_to_latex():
+    table = sw.Table(["point", "x", "y"], [[(5,13), 2184, 0.29166], [3, 24, np.float64(0.4)]])
+    assert table.to_latex() == "(5, 13) & 2184 & 0.292 \\\\\n3 & 24 & 0.4 \\\\"